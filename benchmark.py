@@ -0,0 +1,726 @@
+"""
+Performance benchmarks for AT Commander.
+
+Usage:
+    python benchmark.py            # run all benchmarks
+    python benchmark.py adaptive   # run selected benchmarks by name
+
+GUI benchmarks run with the offscreen Qt platform unless QT_QPA_PLATFORM is set.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+_app = None
+# Measurements that missed their budget; main() fails if there are any
+over_budget = []
+# Always-on sequence chart recording, per event (user-044)
+CHART_RECORD_BUDGET_NS = 500
+# Putting the chart events of several threads in order, on top of recording them (user-048)
+CHART_MERGE_BUDGET_NS = 250
+
+
+def get_app():
+    """Create the QApplication once for all GUI benchmarks"""
+    global _app
+    if _app is None:
+        from PySide6.QtWidgets import QApplication
+        _app = QApplication.instance() or QApplication(sys.argv)
+    return _app
+
+
+def report(title, rows):
+    """Print a result table: rows are (label, value) pairs"""
+    print(f"\n== {title} ==")
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f"  {label.ljust(width)} : {value}")
+
+
+def check_budget(label, value, budget, unit):
+    """value formatted for report(); noted in over_budget when it exceeds budget"""
+    if value <= budget:
+        return f"{value:.0f} {unit} (budget {budget} {unit})"
+    over_budget.append(f"{label}: {value:.0f} {unit}, budget {budget} {unit}")
+    return f"{value:.0f} {unit} OVER BUDGET of {budget} {unit}"
+
+
+def make_log_lines(count, prefix="RX"):
+    """Synthetic device log with a mix of plain and colored lines"""
+    lines = []
+    for i in range(count):
+        if i % 10 == 0:
+            lines.append(f"\x1b[33m{prefix} [{i:08d}] +CEREG: 1,\"1A2B\",\"01A2B3C4\",7\x1b[0m\r\n")
+        else:
+            lines.append(f"{prefix} [{i:08d}] dbg: task=net state=idle rssi=-71 payload=0123456789abcdef\r\n")
+    return lines
+
+
+def feed_from_thread(chunks, on_chunk, chunks_per_sec=None):
+    """
+    Emit chunks from a worker thread the way read_serial_data emits serial_data_signal, at a
+    fixed rate (as fast as possible when chunks_per_sec is None), and run the Qt event loop
+    until all are handled. Returns the elapsed time in seconds.
+    """
+    import threading
+    from PySide6.QtCore import QObject, Signal
+
+    class Feeder(QObject):
+        data = Signal(str)
+
+    app = get_app()
+    feeder = Feeder()
+    handled = [0]
+
+    def handle(chunk):
+        on_chunk(chunk)
+        handled[0] += 1
+        if handled[0] == len(chunks):
+            app.quit()
+    feeder.data.connect(handle)
+
+    def run():
+        for i, chunk in enumerate(chunks):
+            if chunks_per_sec:
+                # Paced by deadline, so the time spent emitting does not lower the rate
+                delay = start + i / chunks_per_sec - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            feeder.data.emit(chunk)
+
+    start = time.perf_counter()
+    threading.Thread(target=run, daemon=True).start()
+    app.exec()
+    return time.perf_counter() - start
+
+
+def bench_adaptive(total_lines=100000, lines_per_chunk=100, lines_per_sec=50000):
+    """
+    A log flood offered at lines_per_sec (far above the adaptive threshold), rendered once per
+    chunk as before adaptive rendering and with it: ingest rate, GUI thread time per line
+    (appending plus painting) and paints per second.
+    """
+    from terminal_widget import TerminalWidget, DEFAULT_ADAPTIVE_THRESHOLD
+    app = get_app()
+    log_lines = make_log_lines(total_lines)
+    chunks = [''.join(log_lines[i:i + lines_per_chunk]) for i in range(0, total_lines, lines_per_chunk)]
+
+    rows = []
+    for label, threshold in (("render every chunk", 0), ("adaptive rendering", DEFAULT_ADAPTIVE_THRESHOLD)):
+        terminal = TerminalWidget()
+        terminal.resize(1000, 600)
+        terminal.show()
+        terminal.set_adaptive_threshold(threshold)
+        app.processEvents()
+
+        paints = [0, 0.0]  # count, seconds outside on_chunk
+        busy = [0.0, False]  # seconds in on_chunk, inside on_chunk
+        paint_event = terminal.paintEvent
+
+        def counting_paint(event, paint_event=paint_event):
+            paint_start = time.perf_counter()
+            paint_event(event)
+            paints[0] += 1
+            if not busy[1]:
+                paints[1] += time.perf_counter() - paint_start
+        terminal.paintEvent = counting_paint
+
+        def on_chunk(chunk, terminal=terminal, threshold=threshold):
+            chunk_start = time.perf_counter()
+            busy[1] = True
+            terminal.append_text(chunk)
+            if not threshold:
+                # The old update_terminal: one full render per chunk
+                terminal.viewport().repaint()
+            elif not terminal.catching_up:
+                # Same steps as SerialTerminal.update_terminal
+                terminal.update()
+            busy[1] = False
+            busy[0] += time.perf_counter() - chunk_start
+
+        elapsed = feed_from_thread(chunks, on_chunk, lines_per_sec / lines_per_chunk)
+        # Frames still due after the last chunk
+        app.processEvents()
+        gui_time = busy[0] + paints[1]
+        rows.append((label, f"{total_lines / elapsed:,.0f} lines/s in {elapsed:.2f} s, "
+                            f"GUI thread {gui_time / total_lines * 1e6:.1f} us/line "
+                            f"({gui_time / elapsed * 100:.0f}% busy), {paints[0] / elapsed:.0f} paints/s"))
+        terminal.close()
+        terminal.deleteLater()
+        app.processEvents()
+    report(f"Adaptive rendering: {total_lines:,} lines in {len(chunks):,} chunks offered at "
+           f"{lines_per_sec:,} lines/s (threshold {DEFAULT_ADAPTIVE_THRESHOLD:,})", rows)
+
+
+def make_highlight_rules(count=50):
+    """A realistic mix of keyword, AT result code and number-pattern rules"""
+    rules = [
+        {'pattern': r'\+CM[ES] ERROR:?[^\r\n]*', 'foreground': '#ff5555', 'bold': True},
+        {'pattern': r'\bERROR\b', 'foreground': '#ff5555', 'bold': True},
+        {'pattern': r'\bFAIL(?:ED|URE)?\b', 'foreground': '#ff8c00', 'bold': True},
+        {'pattern': r'\b\d{15}\b', 'foreground': '#55aaff'},  # IMEI
+        {'pattern': r'^ASSERT', 'background': '#802020', 'bold': True},
+    ]
+    urcs = ["CEREG", "CREG", "CGREG", "CSCON", "CGEV", "QIURC", "CPIN", "CSQ", "COPS", "CTZV"]
+    i = 0
+    while len(rules) < count:
+        if i < len(urcs):
+            rules.append({'pattern': rf'^\+{urcs[i]}:', 'foreground': '#e5e510'})
+        else:
+            rules.append({'pattern': rf'\bmod{i}_(?:warn|crit)\b', 'foreground': '#bc3fbc', 'ignore_case': True})
+        i += 1
+    return rules
+
+
+def bench_highlight(total_lines=100000, lines_per_chunk=100, rule_count=50):
+    """Per-line append cost without highlight rules and with 50 compiled rules"""
+    from terminal_widget import TerminalWidget
+    get_app()
+    log_lines = make_log_lines(total_lines)
+    chunks = [''.join(log_lines[i:i + lines_per_chunk]) for i in range(0, total_lines, lines_per_chunk)]
+
+    rows = []
+    base_cost = None
+    for label, rules in (("no rules", []), (f"{rule_count} rules", make_highlight_rules(rule_count))):
+        terminal = TerminalWidget()
+        terminal.set_highlight_rules(rules)
+        start = time.perf_counter()
+        for chunk in chunks:
+            terminal.append_text(chunk)
+        elapsed = time.perf_counter() - start
+        per_line = elapsed / total_lines * 1e6
+        if base_cost is None:
+            base_cost = per_line
+            rows.append((label, f"{per_line:.2f} us/line"))
+        else:
+            extra = per_line - base_cost
+            rows.append((label, f"{per_line:.2f} us/line (+{extra:.2f} us, "
+                                f"{extra * 1000 / 1e6:.2%} of one core at 1000 lines/s)"))
+        terminal.deleteLater()
+    report(f"Highlight rules: append {total_lines:,} lines", rows)
+
+
+def make_binary_payloads(count, size=64):
+    """Deterministic payloads that contain every byte value, including the delimiters"""
+    import random
+    rng = random.Random(1234)
+    return [bytes(rng.randrange(256) for _ in range(size)) for _ in range(count)]
+
+
+def bench_framers(frame_count=20000, frame_size=64, read_size=4096):
+    """Throughput of every RX framer on a stream fed in fixed-size reads"""
+    import framers
+    payloads = make_binary_payloads(frame_count, frame_size)
+    log_stream = ''.join(make_log_lines(frame_count)).encode('utf-8')
+    cases = [
+        ("line (ANSI log)", framers.LineFramer, log_stream),
+        ("SLIP", framers.SlipFramer, b''.join(framers.slip_encode(p) for p in payloads)),
+        ("COBS", framers.CobsFramer, b''.join(framers.cobs_encode(p) for p in payloads)),
+        ("length prefix (2 bytes)", framers.LengthPrefixFramer,
+         b''.join(len(p).to_bytes(2, 'big') + p for p in payloads)),
+    ]
+
+    rows = []
+    for label, framer_class, stream in cases:
+        framer = framer_class()
+        reads = [stream[i:i + read_size] for i in range(0, len(stream), read_size)]
+        frames = 0
+        start = time.perf_counter()
+        for data in reads:
+            frames += len(framer.feed(data, 0.0))
+        elapsed = time.perf_counter() - start
+        rows.append((label, f"{len(stream) / elapsed / 1e6:7.1f} MB/s, {frames / elapsed:,.0f} frames/s "
+                            f"({frames:,} frames)"))
+
+    # Timing framer: one read per frame, each read after an inter-frame gap
+    framer = framers.TimingFramer(115200)
+    frames = 0
+    start = time.perf_counter()
+    for i, payload in enumerate(payloads):
+        frames += len(framer.feed(payload, i * 0.01))
+    frames += len(framer.poll(frame_count * 0.01))
+    elapsed = time.perf_counter() - start
+    rows.append(("timing gap (t3.5)", f"{frame_count * frame_size / elapsed / 1e6:7.1f} MB/s, "
+                                      f"{frames / elapsed:,.0f} frames/s ({frames:,} frames)"))
+    report(f"RX framers: {frame_count:,} frames of {frame_size} bytes, {read_size}-byte reads", rows)
+
+
+def percentiles_ms(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return f"p50 {pick(0.5):6.3f} ms, p99 {pick(0.99):6.3f} ms, max {ordered[-1] * 1000:6.3f} ms"
+
+
+def bench_control_api(calls=2000):
+    """
+    Round-trip latency of the JSON-RPC control API with the Qt event loop running:
+    a call answered on the asyncio thread, one that hops to the GUI thread, RX event delivery,
+    and send with expect (request, GUI write, simulated response matched on the asyncio side).
+    """
+    import socket
+    import tempfile
+    import threading
+    from PySide6.QtCore import QTimer
+    from control_api import ControlServer, ControlClient
+
+    app = get_app()
+    server = ControlServer({
+        "status": lambda: {"connected": True},
+        # The simulated device answers as soon as the command is written
+        "send": lambda command, hex=False: (
+            QTimer.singleShot(0, lambda: server.publish_rx([("OK\r\n", time.time())])),
+            {"bytes": len(command), "timestamp": time.time()})[1],
+    })
+    if hasattr(socket, "AF_UNIX"):
+        address = os.path.join(tempfile.mkdtemp(), "bench.sock")
+    else:
+        address = "127.0.0.1:7099"
+    server.start(address)
+    results = {}
+
+    def client():
+        c = ControlClient(address)
+        for name, call in (("ping", lambda: c.call("ping")),
+                           ("status", lambda: c.call("status")),
+                           ("send+expect", lambda: c.call("send", command="AT", expect="OK"))):
+            samples = []
+            for _ in range(calls):
+                start = time.perf_counter()
+                call()
+                samples.append(time.perf_counter() - start)
+            results[name] = samples
+        c.call("subscribe")
+        samples = []
+        while len(samples) < calls:
+            event = c.next_notification()
+            samples.append(time.time() - event["params"]["timestamp"])
+        results["rx event"] = samples
+        c.close()
+
+    thread = threading.Thread(target=client, daemon=True)
+    thread.start()
+    publisher = QTimer()
+    publisher.timeout.connect(lambda: server.publish_rx([("+CEREG: 1\r\n", time.time())]))
+    publisher.start(1)
+    watcher = QTimer()
+    watcher.timeout.connect(lambda: thread.is_alive() or app.quit())
+    watcher.start(50)
+    app.exec()
+    watcher.stop()
+    publisher.stop()
+    server.stop()
+
+    report(f"Control API: {calls:,} calls each", [
+        ("ping (asyncio thread)", percentiles_ms(results["ping"])),
+        ("status (GUI thread hop)", percentiles_ms(results["status"])),
+        ("send with expect", percentiles_ms(results["send+expect"])),
+        ("rx event (publish -> client)", percentiles_ms(results["rx event"])),
+    ])
+
+
+def write_capture(path, lines, read_size, baudrate):
+    """Capture of a log arriving in read_size reads at the given baudrate (10 bits per byte)"""
+    from session_replay import SessionRecorder
+    stream = ''.join(lines).encode('utf-8')
+    recorder = SessionRecorder(path)
+    read_time = read_size * 10 / baudrate
+    for i, offset in enumerate(range(0, len(stream), read_size)):
+        recorder.record("RX", stream[offset:offset + read_size], i * read_time)
+    recorder.close()
+    return len(stream) * 10 / baudrate
+
+
+def bench_replay(total_lines=50000, read_size=1024, baudrate=921600, realtime_sec=2.0):
+    """
+    A recorded log replayed through the full SerialTerminal RX path (framer, pipeline, terminal):
+    as fast as possible, and at original speed for the first realtime_sec seconds.
+    """
+    import tempfile
+    from PySide6.QtCore import QTimer, QEventLoop
+    from serial_terminal import SerialTerminal
+
+    app = get_app()
+    window = SerialTerminal()
+    window.resize(1000, 700)
+    window.show()
+    app.processEvents()
+    lines = make_log_lines(total_lines)
+    bytes_per_sec = baudrate / 10
+    line_bytes = len(''.join(lines[:100]).encode('utf-8')) / 100
+    cases = [
+        ("as fast as possible", 0.0, lines),
+        (f"original speed ({baudrate} bps)", 1.0, lines[:int(realtime_sec * bytes_per_sec / line_bytes)]),
+    ]
+    directory = tempfile.mkdtemp()
+    for label, speed, case_lines in cases:
+        path = os.path.join(directory, "bench.atcap")
+        duration = write_capture(path, case_lines, read_size, baudrate)
+        window.clear_terminal()
+        window.start_replay(path, speed, show_report=False)
+        # A local loop: QApplication.quit() would also close the window
+        loop = QEventLoop()
+        watcher = QTimer()
+        watcher.timeout.connect(lambda: window.session_replay is None and loop.quit())
+        watcher.start(20)
+        loop.exec()
+        watcher.stop()
+        report(f"Replay {label}: {len(case_lines):,} lines, {duration:.1f} s at {baudrate} bps, "
+               f"{read_size}-byte reads", window.last_replay_report.rows())
+    window.close()
+
+
+def bench_chart(message_count=200000, batch=100):
+    """
+    Sequence chart event store fed message_count events in pipeline-sized batches while the
+    chart is closed (cost per event, with and without eviction), then the chart opened on it:
+    open time, paint time of a full view, and layout changes (resize, hex toggle). Last, three
+    sources submitting out of step are merged into timestamp order and painted as three lanes.
+    """
+    from PySide6.QtGui import QImage
+    from rx_pipeline import RxFrame
+    from sequence_chart import SequenceChartWindow, ChartEventStore, EventMerger, MERGE_WINDOW_SEC
+
+    app = get_app()
+    now = time.time()
+    frames = [RxFrame("TX", "AT+CEREG?\r\n", b"AT+CEREG?\r\n", now + i * 0.01) if i % 5 == 0 else
+              RxFrame("RX", f"+CEREG: {i},\"1A2B\",\"01A2B3C4\",7\r\n", None, now + i * 0.01)
+              for i in range(message_count)]
+    batches = [frames[offset:offset + batch] for offset in range(0, message_count, batch)]
+
+    def fill(budget_bytes, repeat=3):
+        """(best ns per event, filled store)"""
+        best = None
+        for _ in range(repeat):
+            store = ChartEventStore(budget_bytes=budget_bytes)
+            start = time.perf_counter()
+            for chunk in batches:
+                store.extend(chunk)
+            elapsed = (time.perf_counter() - start) / message_count * 1e9
+            best = elapsed if best is None else min(best, elapsed)
+        return best, store
+
+    record_ns, store = fill(1 << 30)
+    evict_ns, small = fill(1 << 20)
+
+    start = time.perf_counter()
+    window = SequenceChartWindow(store)
+    window.resize(700, 800)
+    window.show()
+    app.processEvents()
+    open_ms = (time.perf_counter() - start) * 1000
+    chart = window.chart_widget
+
+    image = QImage(chart.viewport().size(), QImage.Format.Format_ARGB32)
+
+    def timed(action, repeat=20):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            action()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    paint_ms = timed(lambda: chart.viewport().render(image))
+    resize_ms = timed(lambda: (window.resize(900, 800), window.resize(700, 800)), repeat=10) / 2
+    hex_ms = timed(lambda: (window.toggle_hex_mode(True), chart.viewport().render(image),
+                            window.toggle_hex_mode(False)), repeat=10)
+    group_ms = timed(lambda: (window.set_coalesce(True, 1.0), window.set_coalesce(False, 1.0)), repeat=5) / 2
+    window.set_coalesce(True, 1.0)
+    grouped_paint_ms = timed(lambda: chart.viewport().render(image))
+    # The only part of an export that runs on the GUI thread
+    copy_ms = timed(lambda: store.copy(), repeat=5)
+    report(f"Sequence chart: {message_count:,} events in batches of {batch}", [
+        ("record (per event)", f"{check_budget('chart record', record_ns, CHART_RECORD_BUDGET_NS, 'ns')}, "
+                               f"{store.bytes / 1048576:.1f} MB accounted"),
+        ("record with eviction (per event)", f"{check_budget('chart record with eviction', evict_ns, CHART_RECORD_BUDGET_NS, 'ns')}, "
+                                             f"{len(small):,} kept in 1 MB"),
+        ("open chart on recorded events", f"{open_ms:.1f} ms"),
+        ("paint visible rows", f"{paint_ms:.2f} ms"),
+        ("resize", f"{resize_ms:.2f} ms"),
+        ("hex toggle + paint", f"{hex_ms:.2f} ms"),
+        ("group RX (regroup all)", f"{group_ms:.1f} ms, {len(chart.rows):,} rows"),
+        ("paint grouped rows", f"{grouped_paint_ms:.2f} ms"),
+        ("export snapshot (all events)", f"{copy_ms:.1f} ms"),
+    ])
+
+    # Two ports and an external command, each submitting its own batches in order, one batch
+    # period (well inside the merge window) apart from the others
+    sources = [[RxFrame("RX" if i % 4 else "TX", f"{lane} message {i}\r\n", None, now + i * 0.001, lane)
+                for i in range(message_count // 3)] for lane in ("COM1", "COM2", "External command")]
+    merger = EventMerger()
+    lanes = ChartEventStore(budget_bytes=1 << 30)
+    last_time = 0.0
+    in_order = True
+    record_time = 0.0
+    start = time.perf_counter()
+    for offset in range(0, message_count // 3, batch):
+        for source in sources:
+            merger.add(source[offset:offset + batch])
+        released = merger.release(sources[0][offset].timestamp)
+        if released:
+            # Released batches are sorted; nothing may come out older than what was already released
+            in_order = in_order and released[0].timestamp >= last_time
+            last_time = released[-1].timestamp
+        record_start = time.perf_counter()
+        lanes.extend(released)
+        record_time += time.perf_counter() - record_start
+    lanes.extend(merger.release())
+    total_ns = (time.perf_counter() - start) / len(lanes) * 1e9
+    merge_ns = total_ns - record_time / len(lanes) * 1e9
+    lanes_window = SequenceChartWindow(lanes)
+    lanes_window.resize(700, 800)
+    lanes_window.show()
+    app.processEvents()
+    lanes_paint_ms = timed(lambda: lanes_window.chart_widget.viewport().render(image))
+    report(f"Sequence chart lanes: {len(lanes):,} events from 3 sources", [
+        ("merge (per event)", f"{check_budget('chart merge', merge_ns, CHART_MERGE_BUDGET_NS, 'ns')}, "
+                              f"{MERGE_WINDOW_SEC * 1000:.0f} ms window, {'in order' if in_order else 'OUT OF ORDER'}"),
+        ("merge + record (per event)", f"{total_ns:.0f} ns"),
+        ("paint 3 lanes", f"{lanes_paint_ms:.2f} ms"),
+    ])
+    lanes_window.close()
+    window.close()
+
+
+def bench_latency(command_count=20000, urcs_per_command=20, batch=100):
+    """
+    Command latency tracking over chart events: cost per event for AT command/response traffic
+    with unsolicited lines in between, and the time to build the statistics table.
+    """
+    from rx_pipeline import RxFrame
+    from latency_stats import LatencyTracker
+
+    now = time.time()
+    frames = []
+    for i in range(command_count):
+        t = now + i
+        frames.append(RxFrame("TX", f"AT+CMD{i % 50}?\r\n", None, t))
+        frames.append(RxFrame("RX", f"+CMD{i % 50}: {i}\r\n", None, t + 0.02))
+        frames.append(RxFrame("RX", "OK\r\n" if i % 20 else "ERROR\r\n", None, t + 0.03))
+        frames.extend(RxFrame("RX", f"+CEREG: 1,\"1A2B\",\"{j:08X}\",7\r\n", None, t + 0.1 + j * 0.01)
+                      for j in range(urcs_per_command))
+    tracker = LatencyTracker()
+    start = time.perf_counter()
+    for offset in range(0, len(frames), batch):
+        tracker.feed(frames[offset:offset + batch], offset)
+    feed_time = time.perf_counter() - start
+    start = time.perf_counter()
+    rows = tracker.rows()
+    table_ms = (time.perf_counter() - start) * 1000
+    report(f"Command latency: {len(frames):,} events, {tracker.transactions:,} transactions", [
+        ("feed (per event)", f"{feed_time / len(frames) * 1e9:.0f} ns"),
+        ("statistics table", f"{table_ms:.1f} ms for {len(rows)} commands"),
+    ])
+
+
+def bench_command_list_save(item_count=100, keystrokes=200, interval=0.01):
+    """
+    Typing into one command of an item_count-item list, one keystroke every interval seconds:
+    GUI thread time per keystroke when every keystroke rewrites the YAML (as before) and with
+    the debounced background saver, and how many writes each needs.
+    """
+    import tempfile
+    import yaml
+    from command_lists import CommandListSaver
+
+    app = get_app()
+    commands = [{"index": i, "checked": False, "title": {"text": f"AT+CMD{i}?", "disabled": False},
+                 "time": 0.5, "hexmode": False} for i in range(item_count)]
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "commands.yaml")
+        sync_time = 0.0
+        for i in range(keystrokes):
+            commands[0]["title"]["text"] += "x"
+            start = time.perf_counter()
+            with open(path, "w", encoding="utf-8") as f:
+                yaml.safe_dump(commands, f, allow_unicode=True, sort_keys=False)
+            sync_time += time.perf_counter() - start
+
+        saver = CommandListSaver()
+        gui_time = 0.0
+        for i in range(keystrokes):
+            commands[0]["title"]["text"] += "y"
+            start = time.perf_counter()
+            saver.schedule(path, commands)
+            app.processEvents()  # a debounce timeout copies the list on the GUI thread
+            gui_time += time.perf_counter() - start
+            time.sleep(interval)
+        start = time.perf_counter()
+        saver.flush()
+        flush_ms = (time.perf_counter() - start) * 1000
+        with open(path, encoding="utf-8") as f:
+            saved = yaml.safe_load(f)[0]["title"]["text"] == commands[0]["title"]["text"]
+    report(f"Command list save: {keystrokes} keystrokes {interval * 1000:.0f} ms apart, {item_count} items", [
+        ("rewrite per keystroke (GUI thread)", f"{sync_time / keystrokes * 1e6:.0f} us, {keystrokes} writes"),
+        ("debounced saver (GUI thread)", f"{gui_time / keystrokes * 1e6:.0f} us, {saver.writes} writes"),
+        ("flush", f"{flush_ms:.1f} ms, {'latest text saved' if saved else 'STALE FILE'}"),
+    ])
+
+
+def bench_command_list_cache(group_count=10, item_count=10, switches=200):
+    """
+    Switching between group_count command groups of item_count commands: parsing and validating
+    the file on every switch (as before) with the pure Python and the libyaml loader, and
+    lookups in the preloaded cache; then how long an outside edit takes to show up.
+    """
+    import tempfile
+    import yaml
+    from PySide6.QtCore import QEventLoop, QTimer
+    from command_lists import CommandListSaver, CommandListCache, YamlLoader
+    from serial_terminal import SerialTerminal
+
+    app = get_app()
+    validate = lambda data: SerialTerminal.validate_config_structure(None, data)  # uses no window state
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for group in range(group_count):
+            path = os.path.join(folder, f"group_{group}.yaml")
+            commands = [{"index": i, "checked": False, "title": {"text": f"AT+G{group}CMD{i}?", "disabled": False},
+                         "time": 0.5, "hexmode": False} for i in range(item_count)]
+            with open(path, "w", encoding="utf-8") as f:
+                yaml.safe_dump(commands, f, allow_unicode=True, sort_keys=False)
+            paths.append(path)
+
+        def switch_from_disk(loader):
+            start = time.perf_counter()
+            for i in range(switches):
+                with open(paths[i % group_count], "r", encoding="utf-8") as f:
+                    validate(yaml.load(f, Loader=loader))
+            return (time.perf_counter() - start) / switches * 1e6
+
+        python_us = switch_from_disk(yaml.SafeLoader)
+        libyaml_us = switch_from_disk(YamlLoader)
+
+        cache = CommandListCache(validate, CommandListSaver())
+        start = time.perf_counter()
+        cache.preload(paths)
+        while len(cache.entries) < group_count:
+            app.processEvents()
+        preload_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for i in range(switches):
+            cache.get(paths[i % group_count])
+        cached_us = (time.perf_counter() - start) / switches * 1e6
+
+        loop = QEventLoop()
+        cache.changed.connect(loop.quit)
+        QTimer.singleShot(2000, loop.quit)
+        start = time.perf_counter()
+        with open(paths[0], "a", encoding="utf-8") as f:
+            f.write("- {index: 99, checked: false, title: {text: AT, disabled: false}, time: 1}\n")
+        loop.exec()
+        reload_ms = (time.perf_counter() - start) * 1000
+        reloaded = len(cache.get(paths[0])[0]) == item_count + 1
+    report(f"Command list cache: {switches} switches between {group_count} groups of {item_count}", [
+        ("parse per switch (SafeLoader)", f"{python_us:.0f} us"),
+        (f"parse per switch ({YamlLoader.__name__})", f"{libyaml_us:.0f} us"),
+        ("preload all groups (background)", f"{preload_ms:.1f} ms"),
+        ("cached switch", f"{cached_us:.2f} us, {cache.parses} parses in total"),
+        ("outside edit picked up", f"{reload_ms:.0f} ms" if reloaded else "NOT RELOADED"),
+    ])
+
+
+class LoopbackPort:
+    """In-memory serial port that returns everything written to it, for throughput tests"""
+    is_open = True
+
+    def __init__(self):
+        import threading
+        self.buffer = bytearray()
+        self.lock = threading.Lock()
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def read(self, size):
+        with self.lock:
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+        return data
+
+    def write(self, data):
+        with self.lock:
+            self.buffer += data
+        return len(data)
+
+    def close(self):
+        self.is_open = False
+
+
+def bench_throughput(baudrates=(3000000, 6000000, 12000000), rate_steps=(25, 50, 100), stage_sec=2.0):
+    """
+    The Throughput Test stages against an in-memory loopback port, so the link is never the
+    limit: shows the first rate at which the reader, parser or renderer falls behind.
+    """
+    import threading
+    from PySide6.QtCore import QTimer, QEventLoop
+    from serial_terminal import SerialTerminal
+    from framers import LineFramer
+    from throughput_test import ThroughputTest, MODE_LOOPBACK, RESULT_HEADERS
+
+    app = get_app()
+    window = SerialTerminal()
+    window.resize(1000, 700)
+    window.show()
+    app.processEvents()
+    for baudrate in baudrates:
+        window.clear_terminal()
+        window.serial = LoopbackPort()
+        window.baudrate = baudrate
+        window.framer = LineFramer()
+        window.running = True
+        reader = threading.Thread(target=window.read_serial_data, daemon=True)
+        reader.start()
+        test = ThroughputTest(window, MODE_LOOPBACK, [baudrate], [window.flow_control], list(rate_steps), stage_sec)
+        loop = QEventLoop()
+        test.finished.connect(loop.quit)
+        QTimer.singleShot(0, test.start)
+        loop.exec()
+        window.running = False
+        reader.join()
+        rows = []
+        for result in test.results:
+            cells = dict(zip(RESULT_HEADERS, result.cells()))
+            rows.append((f"{cells['Target KB/s']} KB/s target",
+                         f"TX {cells['TX KB/s']} / RX {cells['RX KB/s']} KB/s, lost {cells['Lost']}, "
+                         f"latency {cells['Latency p50/p99 ms']} ms, parser {cells['Parser busy %']}%, "
+                         f"render lag {cells['Render lag ms']} ms: {cells['Result']}"))
+        report(f"Throughput at {baudrate:,} bps (loopback, {stage_sec:g} s stages)", rows)
+    window.serial = None
+    window.close()
+
+
+BENCHMARKS = {
+    "adaptive": bench_adaptive,
+    "highlight": bench_highlight,
+    "framers": bench_framers,
+    "control_api": bench_control_api,
+    "replay": bench_replay,
+    "throughput": bench_throughput,
+    "chart": bench_chart,
+    "latency": bench_latency,
+    "cmdlist_save": bench_command_list_save,
+    "cmdlist_cache": bench_command_list_cache,
+}
+
+
+def main(argv):
+    names = argv or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}")
+        print(f"Available: {', '.join(BENCHMARKS)}")
+        return 1
+    for name in names:
+        BENCHMARKS[name]()
+    if over_budget:
+        print("\nOver budget:")
+        for line in over_budget:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
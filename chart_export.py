@@ -0,0 +1,351 @@
+import csv
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QComboBox, QDateTimeEdit, QLineEdit, QPushButton,
+    QProgressBar, QLabel, QCheckBox, QFileDialog, QMessageBox
+)
+from PySide6.QtGui import QColor, QFont, QFontInfo, QFontMetrics, QPainter, QPdfWriter, QPageSize
+from PySide6.QtSvg import QSvgGenerator
+from PySide6.QtCore import Qt, QObject, Signal, QDateTime, QRectF, QSize
+from sequence_chart import (
+    ChartRows, TOP_Y, STEP_Y, RIGHT_MARGIN, BOTTOM_MARGIN, DISPLAY_TEXT_LEN,
+    lifeline_positions, paint_lifelines, paint_lifeline_labels, paint_rows
+)
+
+EXPORT_FORMATS = [("PDF", ".pdf"), ("SVG", ".svg"), ("CSV", ".csv"), ("JSONL", ".jsonl")]
+EXPORT_FILTERS = {
+    "PDF": "PDF Files (*.pdf)",
+    "SVG": "SVG Files (*.svg)",
+    "CSV": "CSV Files (*.csv)",
+    "JSONL": "JSON Lines (*.jsonl)",
+}
+# (lifeline, tx, rx, time) printed on white, independent of the window theme
+PRINT_COLORS = (QColor(Qt.black), QColor(0, 100, 0), QColor(Qt.black), QColor(Qt.darkGray))
+PDF_RESOLUTION = 300
+PAGE_MARGIN = 20
+EXPORT_CHUNK_ROWS = 500  # rows between progress updates and cancel checks
+DATETIME_FORMAT = "yyyy-MM-dd HH:mm:ss.zzz"
+
+
+def pixel_sized(font):
+    font = QFont(font)
+    font.setPixelSize(QFontInfo(font).pixelSize())
+    return font
+
+
+class ChartExporter(QObject):
+    """
+    Writes a detached copy of the chart events (ChartEventStore.copy) to a file on a worker
+    thread, so the live chart is neither repainted nor blocked. PDF and SVG are painted from
+    the events with the print palette; CSV and JSONL list one event per row.
+    The file appears under its final name only when the export completes.
+    """
+    progress = Signal(int)  # percent done
+    finished = Signal()
+
+    def __init__(self, store, path, export_format, hex_mode=False, fonts=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.path = path
+        self.export_format = export_format
+        self.hex_mode = hex_mode
+        if fonts is None:
+            text_font = QFont()
+            text_font.setPointSize(11)
+            time_font = QFont()
+            time_font.setPointSize(8)
+            fonts = (text_font, time_font, QFont())
+        # Pixel sizes, so text keeps its on-screen size relative to the chart on a 300 dpi page
+        self.text_font, self.time_font, self.label_font = (pixel_sized(font) for font in fonts)
+        self.exported = 0
+        self.error = None
+        self.cancelled = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        part_path = self.path + ".part"
+        writers = {"PDF": self._write_pdf, "SVG": self._write_svg, "CSV": self._write_csv, "JSONL": self._write_jsonl}
+        try:
+            writers[self.export_format](part_path)
+            if self.cancelled:
+                os.remove(part_path)
+            else:
+                os.replace(part_path, self.path)
+        except (OSError, ValueError) as e:
+            self.error = str(e)
+            if os.path.exists(part_path):
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+        self.finished.emit()
+
+    def _report(self, done, total):
+        self.exported = done
+        self.progress.emit(done * 100 // max(total, 1))
+
+    def _layout(self):
+        """(lifeline xs, content width) fitted to the widest message of the export"""
+        store = self.store
+        if self.hex_mode:
+            metrics = QFontMetrics(self.text_font)
+            char_width = max(metrics.horizontalAdvance(c) for c in "0123456789ABCDEF ")
+            text_width = min(store.extents()[1] * 3 - 1, DISPLAY_TEXT_LEN + 3) * char_width
+        else:
+            metrics = QFontMetrics(self.text_font)
+            text_width = 0
+            for row in range(len(store)):
+                if self.cancelled:
+                    break
+                text_width = max(text_width, metrics.horizontalAdvance(store.display_text(row, False)))
+        xs = lifeline_positions(text_width, 0, len(store.lifeline_names()))
+        return xs, xs[-1] + RIGHT_MARGIN
+
+    def _paint(self, painter, rows, first, last, xs):
+        paint_rows(painter, rows, first, last, xs, (self.text_font, self.time_font), PRINT_COLORS, self.hex_mode)
+
+    def _write_pdf(self, path):
+        rows = ChartRows(self.store)
+        count = len(rows)
+        xs, content_width = self._layout()
+        names = self.store.lifeline_names()
+        writer = QPdfWriter(path)
+        writer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
+        writer.setResolution(PDF_RESOLUTION)
+        writer.setCreator("AT Commander")
+        writer.setTitle("Sequence Chart")
+        painter = QPainter()
+        if not painter.begin(writer):
+            raise OSError(f"Could not write {os.path.basename(path)}")
+        try:
+            page_rect = writer.pageLayout().paintRectPixels(writer.resolution())
+            scale = (page_rect.width() - 2 * PAGE_MARGIN) / content_width
+            page_height = (page_rect.height() - 2 * PAGE_MARGIN) / scale
+            # Whole rows per page, each page with its own lifeline labels
+            rows_per_page = max(1, int((page_height - TOP_Y) // STEP_Y))
+            for first in range(0, max(count, 1), rows_per_page):
+                if self.cancelled:
+                    return
+                if first:
+                    writer.newPage()
+                last = min(count, first + rows_per_page)
+                painter.save()
+                painter.translate(PAGE_MARGIN, PAGE_MARGIN)
+                painter.scale(scale, scale)
+                paint_lifeline_labels(painter, self.label_font, xs, names, PRINT_COLORS[0])
+                paint_lifelines(painter, xs, 20, TOP_Y + (last - first - 0.5) * STEP_Y, PRINT_COLORS[0])
+                painter.translate(0, -first * STEP_Y)
+                self._paint(painter, rows, first, last, xs)
+                painter.restore()
+                self._report(last, count)
+        finally:
+            painter.end()
+
+    def _write_svg(self, path):
+        rows = ChartRows(self.store)
+        count = len(rows)
+        xs, content_width = self._layout()
+        content_height = TOP_Y + count * STEP_Y + BOTTOM_MARGIN
+        generator = QSvgGenerator()
+        generator.setFileName(path)
+        generator.setSize(QSize(int(content_width), int(content_height)))
+        generator.setViewBox(QRectF(0, 0, content_width, content_height))
+        generator.setTitle("Sequence Chart")
+        painter = QPainter()
+        if not painter.begin(generator):
+            raise OSError(f"Could not write {os.path.basename(path)}")
+        try:
+            painter.fillRect(QRectF(0, 0, content_width, content_height), QColor(Qt.white))
+            paint_lifeline_labels(painter, self.label_font, xs, self.store.lifeline_names(), PRINT_COLORS[0])
+            paint_lifelines(painter, xs, 20, content_height - BOTTOM_MARGIN, PRINT_COLORS[0])
+            for first in range(0, count, EXPORT_CHUNK_ROWS):
+                if self.cancelled:
+                    return
+                last = min(count, first + EXPORT_CHUNK_ROWS)
+                self._paint(painter, rows, first, last, xs)
+                self._report(last, count)
+        finally:
+            painter.end()
+
+    def _records(self):
+        """(row, timestamp, direction, lane, text, hex, note) for every event, checking for cancel"""
+        store = self.store
+        count = len(store)
+        for row, (timestamp, direction, text, raw, lane) in enumerate(store.events()):
+            if row % EXPORT_CHUNK_ROWS == 0:
+                if self.cancelled:
+                    return
+                self._report(row, count)
+            yield (row, timestamp, direction, lane, text.rstrip("\r\n"), raw.hex(' ').upper() if raw else "",
+                   store.annotation_at(row) or "")
+        self._report(count, count)
+
+    def _write_csv(self, path):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "epoch", "direction", "lane", "text", "hex", "note"])
+            for row, timestamp, direction, lane, text, hex_text, note in self._records():
+                stamp = datetime.fromtimestamp(timestamp).isoformat(sep=" ", timespec="milliseconds")
+                writer.writerow([stamp, f"{timestamp:.6f}", direction, lane, text, hex_text, note])
+
+    def _write_jsonl(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for row, timestamp, direction, lane, text, hex_text, note in self._records():
+                record = {"time": round(timestamp, 6), "direction": direction, "lane": lane, "text": text}
+                if hex_text:
+                    record["hex"] = hex_text
+                if note:
+                    record["note"] = note
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class ChartExportDialog(QDialog):
+    """Exports a time range of the sequence chart in the background, with progress and cancel"""
+
+    def __init__(self, chart_widget, last_save_dir, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Sequence Chart")
+        self.chart_widget = chart_widget
+        self.store = chart_widget.model
+        self.last_save_dir = last_save_dir if os.path.exists(last_save_dir) else os.path.expanduser("~")
+        self.exporter = None
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.format_combo = QComboBox()
+        self.format_combo.addItems([name for name, _ in EXPORT_FORMATS])
+        self.format_combo.currentIndexChanged.connect(self.update_extension)
+        form.addRow("Format:", self.format_combo)
+
+        store = self.store
+        first_time = store.time_at(0) if len(store) else datetime.now().timestamp()
+        last_time = store.time_at(len(store) - 1) if len(store) else first_time
+        self.from_edit = self._datetime_edit(first_time)
+        self.to_edit = self._datetime_edit(last_time)
+        form.addRow("From:", self.from_edit)
+        form.addRow("To:", self.to_edit)
+        self.count_label = QLabel()
+        form.addRow("", self.count_label)
+        self.hex_check = QCheckBox("Payloads as HEX (PDF/SVG)")
+        self.hex_check.setChecked(chart_widget.hex_mode)
+        form.addRow("", self.hex_check)
+
+        path_layout = QHBoxLayout()
+        default_name = f"sequence_chart_{datetime.now().strftime('%m%d_%H%M%S')}.pdf"
+        self.path_edit = QLineEdit(os.path.join(self.last_save_dir, default_name))
+        path_layout.addWidget(self.path_edit)
+        browse_btn = QPushButton("Browse...")
+        browse_btn.clicked.connect(self.browse)
+        path_layout.addWidget(browse_btn)
+        form.addRow("File:", path_layout)
+        layout.addLayout(form)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        self.export_btn = QPushButton("Export")
+        self.export_btn.clicked.connect(self.start_export)
+        btn_layout.addWidget(self.export_btn)
+        self.cancel_btn = QPushButton("Cancel Export")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_export)
+        btn_layout.addWidget(self.cancel_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.from_edit.dateTimeChanged.connect(self.update_count)
+        self.to_edit.dateTimeChanged.connect(self.update_count)
+        self.update_count()
+
+    def _datetime_edit(self, timestamp):
+        edit = QDateTimeEdit(QDateTime.fromMSecsSinceEpoch(int(timestamp * 1000)))
+        edit.setDisplayFormat(DATETIME_FORMAT)
+        edit.setCalendarPopup(True)
+        return edit
+
+    def time_range(self):
+        # The edits show milliseconds; include the whole last millisecond
+        return (self.from_edit.dateTime().toMSecsSinceEpoch() / 1000,
+                (self.to_edit.dateTime().toMSecsSinceEpoch() + 1) / 1000)
+
+    def update_count(self, *args):
+        start_time, end_time = self.time_range()
+        store = self.store
+        count = max(0, bisect_right(store.times, end_time, store.start) - bisect_left(store.times, start_time, store.start))
+        self.count_label.setText(f"{count:,} of {len(store):,} events")
+
+    def update_extension(self, index):
+        path = self.path_edit.text()
+        if path:
+            self.path_edit.setText(os.path.splitext(path)[0] + EXPORT_FORMATS[index][1])
+
+    def browse(self):
+        export_format = self.format_combo.currentText()
+        path, _ = QFileDialog.getSaveFileName(self, "Export Sequence Chart", self.path_edit.text(),
+                                              EXPORT_FILTERS[export_format])
+        if path:
+            self.path_edit.setText(path)
+
+    def start_export(self):
+        path = self.path_edit.text().strip()
+        if not path:
+            return
+        self.last_save_dir = os.path.dirname(path) or self.last_save_dir
+        start_time, end_time = self.time_range()
+        chart = self.chart_widget
+        chart.refresh()
+        store = self.store.copy(start_time, end_time)
+        if not len(store):
+            self.status_label.setText("No events in the selected range")
+            return
+        self.exporter = ChartExporter(store, path, self.format_combo.currentText(), self.hex_check.isChecked(),
+                                      (chart.text_font, chart.time_font, chart.label_font), self)
+        self.exporter.progress.connect(self.progress_bar.setValue)
+        self.exporter.finished.connect(self.on_export_finished)
+        self.export_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.status_label.setText(f"Exporting {len(store):,} events...")
+        self.exporter.start()
+
+    def cancel_export(self):
+        if self.exporter is not None:
+            self.exporter.cancel()
+
+    def on_export_finished(self):
+        exporter, self.exporter = self.exporter, None
+        self.export_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        if exporter.error:
+            self.status_label.setText("Export failed")
+            QMessageBox.warning(self, "Export Sequence Chart", f"Could not export:\n{exporter.error}")
+        elif exporter.cancelled:
+            self.status_label.setText("Export cancelled")
+        else:
+            self.progress_bar.setValue(100)
+            self.status_label.setText(f"Exported {len(exporter.store):,} events to {os.path.basename(exporter.path)}")
+
+    def reject(self):
+        self.cancel_export()
+        super().reject()
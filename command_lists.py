@@ -0,0 +1,183 @@
+import copy
+import os
+import queue
+import threading
+import yaml
+from PySide6.QtCore import QObject, QTimer, Signal, QFileSystemWatcher
+
+# Edits closer together than this are saved with one write
+SAVE_DEBOUNCE_MS = 300
+# libyaml parses several times faster when PyYAML was built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def write_yaml_atomic(path, data):
+    """Dump data to path through a temp file (fsync, rename), so a crash never leaves half a file"""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CommandListSaver(QObject):
+    """
+    Saves command lists off the GUI thread. schedule() only remembers the latest data per file;
+    once edits pause for delay_ms it is copied and written by a worker thread, in order.
+    flush() writes everything pending and waits, e.g. before the file is read back or on exit.
+    """
+    failed = Signal(str, str)  # path, error message
+
+    def __init__(self, delay_ms=SAVE_DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.pending = {}  # path -> data, written at the next timeout
+        self.writes = 0
+        self._in_flight = {}  # path -> writes queued but not done
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._submit)
+
+    def schedule(self, path, data):
+        self.pending[path] = data
+        self._timer.start()  # restarted by every edit
+
+    def flush(self):
+        self._submit()
+        self._queue.join()
+
+    def busy(self, path):
+        """True while edits of path are waiting or being written"""
+        with self._lock:
+            return path in self.pending or path in self._in_flight
+
+    def _submit(self):
+        self._timer.stop()
+        if not self.pending:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        with self._lock:
+            for path, data in self.pending.items():
+                self._in_flight[path] = self._in_flight.get(path, 0) + 1
+                # The GUI keeps editing the list while the worker dumps this copy
+                self._queue.put((path, copy.deepcopy(data)))
+            self.pending = {}
+
+    def _run(self):
+        while True:
+            path, data = self._queue.get()
+            try:
+                write_yaml_atomic(path, data)
+                self.writes += 1
+            except Exception as e:
+                self.failed.emit(path, str(e))
+            finally:
+                with self._lock:
+                    self._in_flight[path] -= 1
+                    if not self._in_flight[path]:
+                        del self._in_flight[path]
+                self._queue.task_done()
+
+
+def read_command_list(path, validate):
+    """(data, error, problem): error is the exception reading or parsing failed with, problem the
+    message of validate(data) for a list that parsed but has the wrong structure"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=YamlLoader)
+    except Exception as e:
+        return None, e, None
+    is_valid, message = validate(data)
+    return data, None, None if is_valid else message
+
+
+class CommandListCache(QObject):
+    """
+    Parsed command lists by path, so switching groups and pages never reads the disk.
+    preload() parses files on a worker thread; a cached file is only parsed and validated
+    again when the watcher reports it changed and no save of ours is in progress. Lists
+    edited in the app are handed to save(), which updates the cache and schedules the write.
+    """
+    changed = Signal(str)  # path whose content was changed by another program
+    # path, read_command_list() result, save count of path when read (None for a preload)
+    _parsed = Signal(str, object, object)
+
+    def __init__(self, validate, saver, parent=None):
+        super().__init__(parent)
+        self.validate = validate
+        self.saver = saver
+        self.entries = {}  # path -> (data, error, problem)
+        self.saves = {}    # path -> number of save() calls
+        self.parses = 0
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_file_changed)
+        self._parsed.connect(self._on_parsed)
+
+    def get(self, path):
+        """(data, error, problem) of a list, read now if it was not preloaded"""
+        entry = self.entries.get(path)
+        if entry is None:
+            entry = self._read(path)
+            if not isinstance(entry[1], OSError):
+                # A missing or unreadable file is tried again next time
+                self._store(path, entry)
+        return entry
+
+    def save(self, path, data):
+        """Edited in the app: cache it as is and write it in the background"""
+        self.entries[path] = (data, None, None)
+        self.saves[path] = self.saves.get(path, 0) + 1
+        self.saver.schedule(path, data)
+
+    def invalidate(self, path):
+        """Read path again on the next get(), e.g. after another part of the app wrote it"""
+        self.saver.flush()
+        self.entries.pop(path, None)
+
+    def preload(self, paths):
+        paths = [path for path in dict.fromkeys(paths) if path and path not in self.entries]
+        if paths:
+            threading.Thread(target=self._parse_all, args=(paths, None), daemon=True).start()
+
+    def _read(self, path):
+        self.parses += 1
+        return read_command_list(path, self.validate)
+
+    def _parse_all(self, paths, saves):
+        for path in paths:
+            self._parsed.emit(path, self._read(path), saves)
+
+    def _store(self, path, entry):
+        self.entries[path] = entry
+        if path not in self.watcher.files() and os.path.exists(path):
+            self.watcher.addPath(path)
+
+    def _on_parsed(self, path, entry, saves):
+        if isinstance(entry[1], OSError):
+            return
+        if path not in self.entries:
+            self._store(path, entry)
+        elif (saves is not None and saves == self.saves.get(path, 0) and not self.saver.busy(path)
+              and entry[0] != self.entries[path][0]):
+            # Changed by another program, and not edited here since it was read
+            self._store(path, entry)
+            self.changed.emit(path)
+
+    def _on_file_changed(self, path):
+        # Saved files are replaced by a rename, which ends the watch on some platforms
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        if path in self.entries and not self.saver.busy(path):
+            threading.Thread(target=self._parse_all, args=([path], self.saves.get(path, 0)),
+                             daemon=True).start()
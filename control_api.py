@@ -0,0 +1,459 @@
+import asyncio
+import concurrent.futures
+import ipaddress
+import json
+import os
+import re
+import socket
+import threading
+import time
+from collections import deque
+from PySide6.QtCore import QObject, Signal
+import utils
+
+DEFAULT_TCP_ADDRESS = "127.0.0.1:7010"
+SOCKET_FILE = "atcmder.sock"
+MAX_REQUEST_BYTES = 1024 * 1024
+# RX text kept by one wait_for while it looks for its pattern
+WAIT_BUFFER_CHARS = 64 * 1024
+# RX notifications queued per subscriber; a client that stops reading loses the oldest
+SUBSCRIBER_QUEUE = 10000
+DEFAULT_WAIT_TIMEOUT = 5.0
+
+# JSON-RPC 2.0 error codes, application errors from -32000 down
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+TIMEOUT_ERROR = -32000
+NOT_CONNECTED = -32001
+CONNECT_FAILED = -32002
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def default_address():
+    """Unix socket in the config folder where available, localhost TCP otherwise"""
+    if hasattr(socket, "AF_UNIX") and os.name == "posix":
+        return utils.get_user_config_path(SOCKET_FILE)
+    return DEFAULT_TCP_ADDRESS
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_address(address):
+    """
+    'host:port' or a bare port number is TCP, anything else a Unix socket path.
+    The API has no authentication, so ValueError is raised for a host other than loopback.
+    """
+    address = str(address or default_address()).strip()
+    if address.isdigit():
+        return ("tcp", "127.0.0.1", int(address))
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address and "\\" not in address:
+        host = host.strip("[]") or "127.0.0.1"
+        if not is_loopback(host):
+            raise ValueError(f"Control API only listens on this machine (127.0.0.1, ::1 or localhost), not {host}")
+        return ("tcp", host, int(port))
+    return ("unix", os.path.expanduser(address))
+
+
+class _Connection:
+    def __init__(self, writer):
+        self.writer = writer
+        self.subscribed = False
+        self.events = deque()
+        self.events_dropped = 0
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+    def send(self, message):
+        if not self.closed:
+            self.writer.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def queue_event(self, message):
+        self.events.append(message)
+        if len(self.events) > SUBSCRIBER_QUEUE:
+            self.events.popleft()
+            self.events_dropped += 1
+        self.wakeup.set()
+
+
+class _Waiter:
+    def __init__(self, pattern, future):
+        self.pattern = pattern
+        self.future = future
+        self.buffer = ""
+
+
+class ControlServer(QObject):
+    """
+    Newline-delimited JSON-RPC 2.0 on a Unix socket or localhost TCP, served by an asyncio thread.
+
+    gui_methods maps method names to callables that run on the GUI thread with the request's
+    params; they return a JSON-serializable result or raise RpcError. Calls reach the GUI
+    through a queued signal, so neither side ever blocks the other's event loop.
+    Waiting for RX (wait_for, send with expect) and RX event subscriptions are handled on the
+    asyncio side and fed by publish_rx().
+    """
+    gui_call = Signal(object)
+
+    def __init__(self, gui_methods, parent=None):
+        super().__init__(parent)
+        self.gui_methods = gui_methods
+        self.address = None
+        self.loop = None
+        self._thread = None
+        self._server = None
+        self._connections = set()
+        self._waiters = []
+        self._listening = False  # any waiter or subscriber, read without locking by publish_rx
+        self.async_methods = {
+            "ping": self._ping,
+            "wait_for": self._wait_for,
+            "send": self._send,
+            "run_sequence": self._run_sequence,
+            "run_group": self._run_group,
+            "subscribe": self._subscribe,
+            "unsubscribe": self._unsubscribe,
+        }
+        self.gui_call.connect(self._run_gui_call)
+
+    def is_running(self):
+        return self._thread is not None
+
+    def start(self, address=None):
+        """Raises OSError if the address cannot be bound, ValueError if it is not local"""
+        self.stop()
+        self.address = parse_address(address)
+        ready = threading.Event()
+        result = {}
+        self._thread = threading.Thread(target=self._serve, args=(ready, result), daemon=True)
+        self._thread.start()
+        ready.wait()
+        if "error" in result:
+            self._thread.join()
+            self._thread = None
+            raise result["error"]
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.loop.call_soon_threadsafe(self._shutdown)
+        self._thread.join(2.0)
+        self._thread = None
+        if self.address[0] == "unix":
+            try:
+                os.unlink(self.address[1])
+            except OSError:
+                pass
+
+    def publish_rx(self, items):
+        """Called on the GUI thread with (text, timestamp) pairs of received data"""
+        if self._listening and items:
+            self.loop.call_soon_threadsafe(self._on_rx, items)
+
+    # asyncio thread
+
+    def _serve(self, ready, result):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self._server = self.loop.run_until_complete(self._listen())
+        except OSError as e:
+            result["error"] = e
+            self.loop.close()
+            ready.set()
+            return
+        ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    async def _listen(self):
+        if self.address[0] == "tcp":
+            return await asyncio.start_server(self._handle, self.address[1], self.address[2],
+                                              limit=MAX_REQUEST_BYTES)
+        path = self.address[1]
+        if os.path.exists(path):
+            # A socket left behind by a crashed instance is reused, a live one is not
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                raise OSError(f"Another instance is listening on {path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(path)
+            finally:
+                probe.close()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Created 0600 rather than chmod'ed after bind, so other users never get a window to connect
+        umask = os.umask(0o077)
+        try:
+            sock.bind(path)
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        return await asyncio.start_unix_server(self._handle, sock=sock, limit=MAX_REQUEST_BYTES)
+
+    def _shutdown(self):
+        self._server.close()
+        for conn in list(self._connections):
+            conn.closed = True
+            conn.writer.close()
+        for waiter in self._waiters:
+            waiter.future.cancel()
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+        self.loop.call_soon(self.loop.stop)
+
+    def _update_listening(self):
+        self._listening = bool(self._waiters) or any(c.subscribed for c in self._connections)
+
+    async def _handle(self, reader, writer):
+        conn = _Connection(writer)
+        self._connections.add(conn)
+        sender = asyncio.ensure_future(self._send_events(conn))
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    conn.send(self._error(None, INVALID_REQUEST, "Request too large"))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(self._dispatch(conn, line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            conn.closed = True
+            self._connections.discard(conn)
+            self._update_listening()
+            for task in tasks:
+                task.cancel()
+            sender.cancel()
+            writer.close()
+
+    async def _send_events(self, conn):
+        while not conn.closed:
+            await conn.wakeup.wait()
+            conn.wakeup.clear()
+            while conn.events:
+                conn.send(conn.events.popleft())
+            try:
+                await conn.writer.drain()
+            except ConnectionError:
+                return
+
+    async def _dispatch(self, conn, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            conn.send(self._error(None, PARSE_ERROR, f"Parse error: {e}"))
+            return
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            conn.send(self._error(None, INVALID_REQUEST, "Invalid request"))
+            return
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params") or {}
+        try:
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "params must be an object")
+            if method in self.async_methods:
+                result = await self.async_methods[method](conn, **params)
+            elif method in self.gui_methods:
+                result = await self.call_gui(method, params)
+            else:
+                raise RpcError(METHOD_NOT_FOUND, f"Unknown method: {method}")
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except RpcError as e:
+            response = self._error(request_id, e.code, e.message)
+        except TypeError as e:
+            # "f() got an unexpected keyword argument 'x'" without the internal function name
+            response = self._error(request_id, INVALID_PARAMS, f"{method}: {str(e).split('() ', 1)[-1]}")
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            response = self._error(request_id, INTERNAL_ERROR, str(e))
+        if "id" in request:
+            conn.send(response)
+
+    @staticmethod
+    def _error(request_id, code, message):
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+    async def call_gui(self, method, params):
+        future = concurrent.futures.Future()
+        self.gui_call.emit((method, params, future))
+        return await asyncio.wrap_future(future)
+
+    def _run_gui_call(self, call):
+        method, params, future = call
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(self.gui_methods[method](**params))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _on_rx(self, items):
+        for waiter in list(self._waiters):
+            if waiter.future.done():
+                continue
+            for text, timestamp in items:
+                waiter.buffer += text
+                match = waiter.pattern.search(waiter.buffer)
+                if match:
+                    waiter.future.set_result({
+                        "match": match.group(0),
+                        "groups": list(match.groups()),
+                        "text": waiter.buffer[:match.end()],
+                        "timestamp": timestamp,
+                    })
+                    break
+                if len(waiter.buffer) > WAIT_BUFFER_CHARS:
+                    waiter.buffer = waiter.buffer[-WAIT_BUFFER_CHARS // 2:]
+        subscribers = [conn for conn in self._connections if conn.subscribed]
+        for text, timestamp in items:
+            event = {"jsonrpc": "2.0", "method": "rx", "params": {"text": text, "timestamp": timestamp}}
+            for conn in subscribers:
+                conn.queue_event(event)
+
+    def _add_waiter(self, pattern, ignore_case=False):
+        try:
+            compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        except (re.error, TypeError) as e:
+            raise RpcError(INVALID_PARAMS, f"Invalid pattern: {e}")
+        waiter = _Waiter(compiled, self.loop.create_future())
+        self._waiters.append(waiter)
+        self._update_listening()
+        return waiter
+
+    async def _await_waiter(self, waiter, timeout):
+        try:
+            return await asyncio.wait_for(waiter.future, timeout)
+        except asyncio.TimeoutError:
+            raise RpcError(TIMEOUT_ERROR, f"Timed out after {timeout}s waiting for {waiter.pattern.pattern!r}")
+        finally:
+            self._waiters.remove(waiter)
+            self._update_listening()
+
+    # async methods: (conn, **params)
+
+    async def _ping(self, conn):
+        return time.time()
+
+    async def _wait_for(self, conn, pattern, timeout=DEFAULT_WAIT_TIMEOUT, ignore_case=False):
+        """Wait for RX matching pattern, counting only data received after the call"""
+        return await self._await_waiter(self._add_waiter(pattern, ignore_case), float(timeout))
+
+    async def _send(self, conn, command, hex=False, expect=None, timeout=DEFAULT_WAIT_TIMEOUT, ignore_case=False):
+        """Send a command; with expect, also wait for the response (armed before the write)"""
+        waiter = self._add_waiter(expect, ignore_case) if expect is not None else None
+        try:
+            result = await self.call_gui("send", {"command": command, "hex": hex})
+        except BaseException:
+            if waiter:
+                self._waiters.remove(waiter)
+                self._update_listening()
+            raise
+        if waiter:
+            result["response"] = await self._await_waiter(waiter, float(timeout))
+        return result
+
+    async def _run_sequence(self, conn, commands, interval=1.0, expect=None, timeout=DEFAULT_WAIT_TIMEOUT):
+        """
+        Send commands in order. Each item is a string or an object with command, hex,
+        interval and expect; after a command with expect the interval starts once it matched.
+        """
+        results = []
+        for item in commands:
+            if isinstance(item, str):
+                item = {"command": item}
+            step_expect = item.get("expect", expect)
+            results.append(await self._send(conn, item["command"], item.get("hex", False), step_expect,
+                                            item.get("timeout", timeout)))
+            await asyncio.sleep(float(item.get("interval", interval)))
+        return results
+
+    async def _run_group(self, conn, group=None, expect=None, timeout=DEFAULT_WAIT_TIMEOUT):
+        """Run the checked commands of a command group with their configured intervals"""
+        commands = await self.call_gui("group_commands", {"group": group})
+        return await self._run_sequence(conn, commands, expect=expect, timeout=timeout)
+
+    async def _subscribe(self, conn):
+        """Receive RX as 'rx' notifications with text and timestamp"""
+        conn.subscribed = True
+        self._update_listening()
+        return True
+
+    async def _unsubscribe(self, conn):
+        conn.subscribed = False
+        self._update_listening()
+        return conn.events_dropped
+
+
+class ControlClient:
+    """Minimal blocking client, for scripts and the benchmark"""
+
+    def __init__(self, address=None, timeout=10.0):
+        kind, *target = parse_address(address)
+        if kind == "tcp":
+            self.sock = socket.create_connection(tuple(target), timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(target[0])
+        self.file = self.sock.makefile("rb")
+        self.next_id = 0
+        self.notifications = deque()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def call(self, method, **params):
+        self.next_id += 1
+        request_id = self.next_id
+        self.sock.sendall(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method,
+                                      "params": params}).encode("utf-8") + b"\n")
+        while True:
+            message = self.read_message()
+            if message.get("id") == request_id:
+                if "error" in message:
+                    raise RpcError(message["error"]["code"], message["error"]["message"])
+                return message["result"]
+            if "id" not in message:
+                self.notifications.append(message)
+
+    def read_message(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Control API connection closed")
+        return json.loads(line)
+
+    def next_notification(self):
+        return self.notifications.popleft() if self.notifications else self.read_message()
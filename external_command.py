@@ -0,0 +1,187 @@
+import codecs
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from PySide6.QtCore import QObject, Signal
+
+READ_CHUNK_SIZE = 4096
+# Bytes of serial RX waiting for the process's stdin; new RX is dropped past this
+STDIN_QUEUE_BYTES = 1024 * 1024
+TERMINATE_TIMEOUT_SEC = 2.0
+
+STDOUT_COLOR = "\x1b[36m"
+STDERR_COLOR = "\x1b[31m"
+
+
+def build_shell_command(cmd):
+    """Run through the login shell's rc file so PATH and aliases match the user's terminal"""
+    if sys.platform == "darwin":
+        cmd_escaped = cmd.replace("'", "'\\''")
+        return f"zsh -c 'source ~/.zshrc; {cmd_escaped}'"
+    elif sys.platform == "linux":
+        cmd_escaped = cmd.replace("'", "'\\''")
+        return f"bash -c 'source ~/.bashrc; {cmd_escaped}'"
+    return cmd
+
+
+class ExternalCommand(QObject):
+    """
+    A shell command whose stdout/stderr are streamed as they arrive.
+    on_output(text, timestamp) is called from the reader threads with ANSI-colored text.
+    With pipe_stdin, feed() queues bytes for the process's stdin without blocking.
+    """
+    finished = Signal(int)  # exit code, negative if terminated by a signal
+
+    def __init__(self, cmd, on_output, pipe_stdin=False, parent=None):
+        super().__init__(parent)
+        self.cmd = cmd
+        self.on_output = on_output
+        self.pipe_stdin = pipe_stdin
+        self.process = None
+        self.stdin_dropped = 0
+        self.cancelled = False
+        self._stdin_queue = queue.Queue()
+        self._stdin_queued = 0  # bytes in _stdin_queue or being written
+        self._stdin_lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        kwargs = {}
+        if os.name == "posix":
+            # Own process group, so cancelling also stops the shell's children
+            kwargs['start_new_session'] = True
+        elif hasattr(subprocess, "CREATE_NEW_PROCESS_GROUP"):
+            kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        self.process = subprocess.Popen(
+            build_shell_command(self.cmd),
+            shell=True,
+            stdin=subprocess.PIPE if self.pipe_stdin else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+            **kwargs
+        )
+        readers = [
+            threading.Thread(target=self._read_stream, args=(self.process.stdout, STDOUT_COLOR), daemon=True),
+            threading.Thread(target=self._read_stream, args=(self.process.stderr, STDERR_COLOR), daemon=True),
+        ]
+        self._threads = list(readers)
+        if self.pipe_stdin:
+            self._threads.append(threading.Thread(target=self._write_stdin, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        threading.Thread(target=self._wait, args=(readers,), daemon=True).start()
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _read_stream(self, stream, color):
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        try:
+            while True:
+                # Returns as soon as any output is available, so progress lines show up live
+                data = stream.read(READ_CHUNK_SIZE)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    self.on_output(f"{color}{text}\x1b[0m", time.time())
+        except (OSError, ValueError):
+            pass
+
+    def _write_stdin(self):
+        stdin = self.process.stdin
+        while True:
+            data = self._stdin_queue.get()
+            if data is None:
+                break
+            try:
+                stdin.write(data)
+            except (OSError, ValueError):
+                break
+            finally:
+                with self._stdin_lock:
+                    self._stdin_queued -= len(data)
+        try:
+            stdin.close()
+        except (OSError, ValueError):
+            pass
+
+    def feed(self, data):
+        """Queue bytes for stdin; drops them if the process is not keeping up"""
+        if not self.pipe_stdin or not self.is_running():
+            return
+        with self._stdin_lock:
+            if self._stdin_queued + len(data) > STDIN_QUEUE_BYTES:
+                self.stdin_dropped += len(data)
+                return
+            self._stdin_queued += len(data)
+        self._stdin_queue.put(data)
+
+    def _wait(self, readers):
+        for thread in readers:
+            thread.join()
+        code = self.process.wait()
+        if self.pipe_stdin:
+            self._stdin_queue.put(None)
+        self.finished.emit(code)
+
+    def cancel(self):
+        """Terminate the command (and its children), killing it if it does not exit in time"""
+        if not self.is_running():
+            return
+        self.cancelled = True
+        threading.Thread(target=self._terminate, daemon=True).start()
+
+    def _terminate(self):
+        process = self.process
+        deadline = time.monotonic() + TERMINATE_TIMEOUT_SEC
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                # Sent to the process group created in start(), so the shell's children get it too
+                os.kill(process.pid, signal.CTRL_BREAK_EVENT)
+            process.wait(TERMINATE_TIMEOUT_SEC)
+            if os.name != "posix" or not self._group_alive(process.pid, deadline):
+                return
+        except subprocess.TimeoutExpired:
+            pass
+        except OSError:
+            if process.poll() is not None:
+                return
+        self._kill(process)
+
+    def _group_alive(self, pgid, deadline):
+        """Wait until deadline for the children left in the process group after the shell exited"""
+        while True:
+            try:
+                os.killpg(pgid, 0)
+            except OSError:
+                return False
+            if time.monotonic() >= deadline:
+                return True
+            time.sleep(0.05)
+
+    def _kill(self, process):
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                # kill() would only end the shell; /T ends the whole process tree
+                subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               timeout=TERMINATE_TIMEOUT_SEC)
+        except (OSError, subprocess.SubprocessError):
+            try:
+                process.kill()
+            except OSError:
+                pass
+        try:
+            process.wait(TERMINATE_TIMEOUT_SEC)
+        except subprocess.TimeoutExpired:
+            pass
@@ -0,0 +1,255 @@
+import re
+import utils
+
+FRAMING_LINE = "Line"
+FRAMING_SLIP = "SLIP"
+FRAMING_COBS = "COBS"
+FRAMING_LENGTH_PREFIX = "Length prefix"
+FRAMING_TIMING = "Timing gap"
+FRAMING_MODES = [FRAMING_LINE, FRAMING_SLIP, FRAMING_COBS, FRAMING_LENGTH_PREFIX, FRAMING_TIMING]
+DEFAULT_FRAME_GAP_CHARS = 3.5  # Modbus RTU t3.5
+MIN_FRAME_GAP_SEC = 0.00175    # Modbus RTU fixed t3.5 above 19200 bps
+LINE_FLUSH_SEC = 0.05          # emit an unterminated line after this much silence
+PARTIAL_FRAME_FLUSH_SEC = 0.5  # pass on a stuck length-prefixed frame after this much silence
+
+LINE_SPLIT_PATTERN = re.compile(rb'(\r\n|\n|\r)')
+
+SLIP_END = 0xC0
+SLIP_ESC = 0xDB
+
+
+class Framer:
+    """
+    Splits the RX byte stream into frames.
+    feed() takes the bytes of one read and poll() is called while the port is idle;
+    both return a list of (frame_bytes, timestamp). Binary framers return decoded payloads.
+    """
+    binary = True
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.last_time = None
+
+    def reset(self):
+        self.buffer = bytearray()
+        self.last_time = None
+
+    def feed(self, data, timestamp):
+        raise NotImplementedError
+
+    def poll(self, now):
+        return []
+
+
+class LineFramer(Framer):
+    """Lines ending in CR, LF or CRLF; a line is held back while it ends inside an ANSI sequence"""
+    binary = False
+
+    def feed(self, data, timestamp):
+        self.last_time = timestamp
+        self.buffer += data
+        if b'\n' not in data and b'\r' not in data:
+            return []
+        pieces = LINE_SPLIT_PATTERN.split(self.buffer)
+        frames = []
+        i = 0
+        while i < len(pieces) - 1:
+            full_line = pieces[i] + pieces[i + 1]
+            if b'\x1b' in full_line:
+                is_complete, _ = utils.is_ansi_sequence_complete(full_line.decode('latin-1'))
+                if not is_complete:
+                    break
+            frames.append((full_line, timestamp))
+            i += 2
+        self.buffer = bytearray(b''.join(pieces[i:]))
+        return frames
+
+    def poll(self, now):
+        if self.buffer and now - self.last_time > LINE_FLUSH_SEC:
+            frame = bytes(self.buffer)
+            self.buffer = bytearray()
+            return [(frame, self.last_time)]
+        return []
+
+
+def slip_decode(frame):
+    if SLIP_ESC not in frame:
+        return frame
+    # ESC ESC_END -> END and ESC ESC_ESC -> ESC; done in this order a decoded ESC cannot pair up again
+    return frame.replace(b'\xdb\xdc', b'\xc0').replace(b'\xdb\xdd', b'\xdb')
+
+
+def slip_encode(payload):
+    return b'\xc0' + payload.replace(b'\xdb', b'\xdb\xdd').replace(b'\xc0', b'\xdb\xdc') + b'\xc0'
+
+
+def cobs_decode(frame):
+    """Decode one COBS frame (without the 0x00 delimiter); None if malformed"""
+    out = bytearray()
+    i = 0
+    n = len(frame)
+    while i < n:
+        code = frame[i]
+        end = i + code
+        if code == 0 or end > n:
+            return None
+        out += frame[i + 1:end]
+        i = end
+        if code < 0xFF and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+def cobs_encode(payload):
+    out = bytearray()
+    for block in payload.split(b'\x00'):
+        while len(block) >= 0xFE:
+            out.append(0xFF)
+            out += block[:0xFE]
+            block = block[0xFE:]
+        out.append(len(block) + 1)
+        out += block
+    out.append(0)
+    return bytes(out)
+
+
+class DelimitedFramer(Framer):
+    """Frames between single-byte delimiters; malformed frames are passed on undecoded"""
+    delimiter = b''
+
+    def decode(self, frame):
+        return frame
+
+    def feed(self, data, timestamp):
+        self.last_time = timestamp
+        self.buffer += data
+        if self.delimiter not in data:
+            return []
+        parts = self.buffer.split(self.delimiter)
+        self.buffer = parts.pop()
+        frames = []
+        for part in parts:
+            if part:
+                part = bytes(part)
+                decoded = self.decode(part)
+                frames.append((part if decoded is None else decoded, timestamp))
+        return frames
+
+
+class SlipFramer(DelimitedFramer):
+    delimiter = bytes([SLIP_END])
+
+    def decode(self, frame):
+        return slip_decode(frame)
+
+
+class CobsFramer(DelimitedFramer):
+    delimiter = b'\x00'
+
+    def decode(self, frame):
+        return cobs_decode(frame)
+
+
+class LengthPrefixFramer(Framer):
+    """Frames led by an unsigned length field of 1, 2 or 4 bytes"""
+
+    def __init__(self, prefix_bytes=2, byteorder='big', includes_header=False):
+        super().__init__()
+        self.prefix_bytes = prefix_bytes
+        self.byteorder = byteorder
+        self.includes_header = includes_header
+
+    def feed(self, data, timestamp):
+        self.last_time = timestamp
+        self.buffer += data
+        buffer = self.buffer
+        header = self.prefix_bytes
+        frames = []
+        pos = 0
+        while len(buffer) - pos >= header:
+            length = int.from_bytes(buffer[pos:pos + header], self.byteorder)
+            if self.includes_header:
+                length -= header
+                if length < 0:
+                    pos += 1  # impossible length, resync on the next byte
+                    continue
+            end = pos + header + length
+            if end > len(buffer):
+                break
+            frames.append((bytes(buffer[pos + header:end]), timestamp))
+            pos = end
+        if pos:
+            del buffer[:pos]
+        return frames
+
+    def poll(self, now):
+        # A frame that never completes would stall the stream; pass it on and resync
+        if self.buffer and now - self.last_time > PARTIAL_FRAME_FLUSH_SEC:
+            frame = bytes(self.buffer)
+            self.buffer = bytearray()
+            return [(frame, self.last_time)]
+        return []
+
+
+class TimingFramer(Framer):
+    """
+    A frame ends after a silence of gap_chars character times (Modbus RTU style).
+    Gaps are measured between reads, so the resolution is the reader's polling interval
+    plus any buffering in the USB-serial adapter.
+    """
+
+    def __init__(self, baudrate=115200, gap_chars=DEFAULT_FRAME_GAP_CHARS, bits_per_char=10):
+        super().__init__()
+        self.gap = max(gap_chars * bits_per_char / baudrate, MIN_FRAME_GAP_SEC)
+
+    def feed(self, data, timestamp):
+        frames = self.poll(timestamp)
+        self.buffer += data
+        self.last_time = timestamp
+        return frames
+
+    def poll(self, now):
+        if self.buffer and now - self.last_time > self.gap:
+            frame = bytes(self.buffer)
+            self.buffer = bytearray()
+            return [(frame, self.last_time)]
+        return []
+
+
+def bits_per_char(bytesize=8, parity='None', stopbits=1):
+    """Start bit + data bits + parity bit + stop bits"""
+    return 1 + bytesize + (0 if parity == 'None' else 1) + stopbits
+
+
+# Keys of the 'serial' settings section that select and configure the framer
+FRAMING_DEFAULTS = {
+    'framing': FRAMING_LINE,
+    'frame_gap_chars': DEFAULT_FRAME_GAP_CHARS,
+    'length_prefix_bytes': 2,
+    'length_prefix_byteorder': 'big',
+    'length_includes_header': False,
+}
+
+
+def framing_settings(serial_settings):
+    """The framing keys of the serial settings with defaults filled in"""
+    return {key: serial_settings.get(key, default) for key, default in FRAMING_DEFAULTS.items()}
+
+
+def create_framer(serial_settings, baudrate=115200, parity='None'):
+    """Build the framer selected in the serial settings"""
+    mode = serial_settings.get('framing', FRAMING_LINE)
+    if mode == FRAMING_SLIP:
+        return SlipFramer()
+    if mode == FRAMING_COBS:
+        return CobsFramer()
+    if mode == FRAMING_LENGTH_PREFIX:
+        return LengthPrefixFramer(
+            int(serial_settings.get('length_prefix_bytes', 2)),
+            serial_settings.get('length_prefix_byteorder', 'big'),
+            bool(serial_settings.get('length_includes_header', False)),
+        )
+    if mode == FRAMING_TIMING:
+        return TimingFramer(baudrate, float(serial_settings.get('frame_gap_chars', DEFAULT_FRAME_GAP_CHARS)),
+                            bits_per_char(parity=parity))
+    return LineFramer()
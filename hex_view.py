@@ -0,0 +1,275 @@
+from array import array
+from bisect import bisect_right
+from PySide6.QtWidgets import QAbstractScrollArea, QApplication, QMenu
+from PySide6.QtGui import QPainter, QColor, QFont, QFontMetrics
+from PySide6.QtCore import Qt, QTimer
+
+# Raw RX bytes kept for the hex view; the oldest bytes are dropped past this size
+MAX_RAW_BYTES = 16 * 1024 * 1024
+BYTES_PER_ROW = 16
+
+# bytes.translate table: printable ASCII as-is, everything else as '.'
+ASCII_TABLE = bytes(b if 0x20 <= b < 0x7f else 0x2e for b in range(256))
+
+
+class RawByteStore:
+    """
+    RX bytes exactly as read from the port, with the offset and time of every chunk.
+    Offsets are absolute (they keep counting after old data is trimmed).
+    """
+
+    def __init__(self, max_bytes=MAX_RAW_BYTES):
+        self.max_bytes = max_bytes
+        self.data = bytearray()
+        self.base_offset = 0            # absolute offset of data[0]
+        self.chunk_offsets = array('q')  # absolute start offset per chunk
+        self.chunk_times = array('d')
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def end_offset(self):
+        return self.base_offset + len(self.data)
+
+    def clear(self):
+        self.base_offset = self.end_offset
+        self.data = bytearray()
+        self.chunk_offsets = array('q')
+        self.chunk_times = array('d')
+
+    def append(self, raw, timestamp):
+        if not raw:
+            return
+        self.chunk_offsets.append(self.end_offset)
+        self.chunk_times.append(timestamp)
+        self.data += raw
+        # Trim in large steps so deleting from the front stays amortized
+        if len(self.data) > self.max_bytes + self.max_bytes // 4:
+            self._trim(len(self.data) - self.max_bytes)
+
+    def _trim(self, count):
+        del self.data[:count]
+        self.base_offset += count
+        first = bisect_right(self.chunk_offsets, self.base_offset) - 1
+        if first > 0:
+            del self.chunk_offsets[:first]
+            del self.chunk_times[:first]
+
+    def read(self, start, end):
+        """Bytes between two absolute offsets"""
+        start = max(start, self.base_offset) - self.base_offset
+        end = min(end, self.end_offset) - self.base_offset
+        return bytes(self.data[start:end]) if end > start else b""
+
+    def time_at(self, offset):
+        """Timestamp of the chunk containing an absolute offset"""
+        index = bisect_right(self.chunk_offsets, offset) - 1
+        return self.chunk_times[index] if index >= 0 else None
+
+    def offset_at_time(self, timestamp):
+        """Absolute offset of the first chunk read at or after timestamp"""
+        index = bisect_right(self.chunk_times, timestamp)
+        if index > 0 and self.chunk_times[index - 1] == timestamp:
+            index -= 1
+        if index >= len(self.chunk_offsets):
+            return self.end_offset
+        return max(self.chunk_offsets[index], self.base_offset)
+
+
+class HexDumpWidget(QAbstractScrollArea):
+    """
+    Offset / hex / ASCII dump of a RawByteStore.
+    Only the visible rows are formatted, in one bytes.hex() and one bytes.translate() call per paint.
+    """
+
+    def __init__(self, store, font_family="Monaco", font_size=11, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.font = QFont(font_family, font_size)
+        self.font.setStyleHint(QFont.StyleHint.Monospace)
+        self.font.setFixedPitch(True)
+        self._update_metrics()
+        self.follow = True
+        self.selection_start = None  # absolute byte offsets, end exclusive
+        self.selection_end = None
+        self._drag_anchor = None
+
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+
+        # Batch refreshes from many small RX chunks into one per frame
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(16)
+        self._update_timer.timeout.connect(self.refresh)
+
+    def _update_metrics(self):
+        fm = QFontMetrics(self.font)
+        self.char_width = fm.horizontalAdvance('0')
+        self.line_height = fm.height()
+        self.ascent = fm.ascent()
+        self.offset_x = 4
+        self.hex_x = self.offset_x + 10 * self.char_width
+        self.ascii_x = self.hex_x + (BYTES_PER_ROW * 3 + 1) * self.char_width
+
+    def set_font(self, font):
+        self.font = QFont(font)
+        self._update_metrics()
+        self.refresh()
+
+    def _first_row(self):
+        return self.store.base_offset // BYTES_PER_ROW
+
+    def _row_count(self):
+        return -(-self.store.end_offset // BYTES_PER_ROW) - self._first_row()
+
+    def _visible_rows(self):
+        return max(1, self.viewport().height() // self.line_height)
+
+    def data_appended(self):
+        if self.isVisible() and not self._update_timer.isActive():
+            self._update_timer.start()
+
+    def refresh(self):
+        scrollbar = self.verticalScrollBar()
+        scrollbar.blockSignals(True)
+        scrollbar.setRange(0, max(0, self._row_count() - self._visible_rows()))
+        scrollbar.setPageStep(self._visible_rows())
+        if self.follow:
+            scrollbar.setValue(scrollbar.maximum())
+        scrollbar.blockSignals(False)
+        self.viewport().update()
+
+    def _on_scroll(self, value):
+        self.follow = value >= self.verticalScrollBar().maximum()
+        self.viewport().update()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.refresh()
+
+    def scroll_to_offset(self, offset):
+        row = offset // BYTES_PER_ROW - self._first_row()
+        self.follow = False
+        self.verticalScrollBar().setValue(max(0, row - self._visible_rows() // 3))
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font)
+        painter.fillRect(self.viewport().rect(), QColor(30, 30, 30))
+
+        first_row = self._first_row() + self.verticalScrollBar().value()
+        rows = self._visible_rows() + 1
+        start = first_row * BYTES_PER_ROW
+        block = self.store.read(start, start + rows * BYTES_PER_ROW)
+        # Leading bytes of the first row may already be trimmed
+        lead = max(0, self.store.base_offset - start)
+        hex_text = block.hex(' ').upper()
+        ascii_text = block.translate(ASCII_TABLE).decode('latin-1')
+
+        sel_start, sel_end = self.selection_start, self.selection_end
+        offset_color = QColor(120, 120, 120)
+        text_color = QColor(200, 200, 200)
+        sel_color = QColor(60, 90, 140)
+
+        for row in range(rows):
+            row_offset = start + row * BYTES_PER_ROW
+            if row_offset >= self.store.end_offset:
+                break
+            y = row * self.line_height
+            first = max(0, row * BYTES_PER_ROW - lead)
+            last = min(len(block), (row + 1) * BYTES_PER_ROW - lead)
+            if last <= first:
+                continue
+            pad = first + lead - row * BYTES_PER_ROW  # column of the first byte still stored
+
+            if sel_start is not None and sel_start < row_offset + BYTES_PER_ROW and sel_end > row_offset:
+                col_start = max(sel_start - row_offset, pad)
+                col_end = min(sel_end - row_offset, pad + last - first)
+                if col_end > col_start:
+                    painter.fillRect(self.hex_x + col_start * 3 * self.char_width, y,
+                                     ((col_end - col_start) * 3 - 1) * self.char_width, self.line_height, sel_color)
+                    painter.fillRect(self.ascii_x + col_start * self.char_width, y,
+                                     (col_end - col_start) * self.char_width, self.line_height, sel_color)
+
+            baseline = y + self.ascent
+            painter.setPen(offset_color)
+            painter.drawText(self.offset_x, baseline, f"{row_offset:08X}")
+            painter.setPen(text_color)
+            painter.drawText(self.hex_x + pad * 3 * self.char_width, baseline, hex_text[first * 3:last * 3 - 1])
+            painter.drawText(self.ascii_x + pad * self.char_width, baseline, ascii_text[first:last])
+        painter.end()
+
+    def _offset_at(self, pos):
+        """Absolute byte offset under a viewport position, or None"""
+        row = self._first_row() + self.verticalScrollBar().value() + int(pos.y() // self.line_height)
+        x = pos.x()
+        if self.hex_x <= x < self.ascii_x:
+            col = int((x - self.hex_x) // (3 * self.char_width))
+        elif x >= self.ascii_x:
+            col = int((x - self.ascii_x) // self.char_width)
+        else:
+            col = 0
+        col = min(max(col, 0), BYTES_PER_ROW - 1)
+        offset = row * BYTES_PER_ROW + col
+        return min(max(offset, self.store.base_offset), max(self.store.base_offset, self.store.end_offset - 1))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            offset = self._offset_at(event.position())
+            self._drag_anchor = offset
+            self.selection_start, self.selection_end = offset, offset + 1
+            self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_anchor is not None:
+            offset = self._offset_at(event.position())
+            self.selection_start = min(self._drag_anchor, offset)
+            self.selection_end = max(self._drag_anchor, offset) + 1
+            self.viewport().update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_anchor = None
+        super().mouseReleaseEvent(event)
+
+    def selected_bytes(self):
+        if self.selection_start is None:
+            return b""
+        return self.store.read(self.selection_start, self.selection_end)
+
+    def copy_selection(self, as_hex=True):
+        data = self.selected_bytes()
+        if data:
+            text = data.hex(' ').upper() if as_hex else data.translate(ASCII_TABLE).decode('latin-1')
+            QApplication.clipboard().setText(text)
+
+    def keyPressEvent(self, event):
+        if event.modifiers() & (Qt.KeyboardModifier.ControlModifier | Qt.KeyboardModifier.MetaModifier):
+            if event.key() == Qt.Key.Key_C:
+                self.copy_selection()
+                return
+            if event.key() == Qt.Key.Key_A and len(self.store):
+                self.selection_start, self.selection_end = self.store.base_offset, self.store.end_offset
+                self.viewport().update()
+                return
+        super().keyPressEvent(event)
+
+    def show_context_menu(self, pos):
+        menu = QMenu(self)
+        has_selection = bool(self.selected_bytes())
+        copy_hex = menu.addAction("Copy as Hex")
+        copy_hex.setEnabled(has_selection)
+        copy_hex.triggered.connect(lambda: self.copy_selection(True))
+        copy_ascii = menu.addAction("Copy as ASCII")
+        copy_ascii.setEnabled(has_selection)
+        copy_ascii.triggered.connect(lambda: self.copy_selection(False))
+        menu.exec(self.viewport().mapToGlobal(pos))
@@ -0,0 +1,258 @@
+import re
+from PySide6.QtGui import QColor
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Compiled alternations are cached per set of candidate rules
+COMBINED_CACHE_SIZE = 256
+# Global inline flags, only valid at the start of a pattern: (?i), (?s), (?ix) ...
+GLOBAL_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+
+# Rules are tried in order; when two rules match at the same position the first one wins
+DEFAULT_HIGHLIGHT_RULES = [
+    {'pattern': r'\+CM[ES] ERROR:?[^\r\n]*', 'foreground': '#ff5555', 'background': '', 'bold': True, 'ignore_case': False},
+    {'pattern': r'\bERROR\b', 'foreground': '#ff5555', 'background': '', 'bold': True, 'ignore_case': False},
+    {'pattern': r'\bFAIL(?:ED|URE)?\b', 'foreground': '#ff8c00', 'background': '', 'bold': True, 'ignore_case': False},
+]
+
+
+def parse_color(value):
+    """'#rrggbb' or a color name -> QColor, None if empty or invalid"""
+    if not value:
+        return None
+    color = QColor(value)
+    return color if color.isValid() else None
+
+
+def required_literal(pattern):
+    """
+    Longest literal every match of pattern must contain, or None.
+    Used to skip rules that cannot match a line with a plain substring test.
+    """
+    try:
+        items = sre_parse.parse(pattern).data
+    except Exception:
+        return None
+    best = current = ""
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            current += chr(av)
+            if len(current) > len(best):
+                best = current
+        elif op is sre_parse.AT:
+            continue  # anchors and word boundaries take no characters
+        else:
+            current = ""
+    return best or None
+
+
+def wrap_rule_pattern(pattern, name, ignore_case=False):
+    """
+    (alternative, flags): pattern as named group name of the combined alternation. Global
+    inline flags at its start would not be at the start of the alternation, so they are
+    moved into a scoped group, e.g. (?i)error -> (?P<h0>(?i:error)).
+    """
+    flags = ""
+    match = GLOBAL_FLAGS.match(pattern)
+    while match is not None:
+        flags += match.group(1)
+        pattern = pattern[match.end():]
+        match = GLOBAL_FLAGS.match(pattern)
+    if ignore_case:
+        flags += "i"
+    flags = "".join(dict.fromkeys(flags))
+    if "x" in flags:
+        pattern += "\n"  # a trailing comment would swallow the closing parentheses
+    return f"(?P<{name}>(?{flags}:{pattern}))", flags
+
+
+def numbered_reference(pattern):
+    """
+    True if pattern refers to a group by number (\\1, (?(1)...)): the numbers shift once the
+    rule is wrapped and combined with others, so such rules would match the wrong text.
+    """
+    source = sre_parse.Tokenizer(pattern)
+    recent = []
+    while source.next is not None:
+        token = source.get()
+        if token[0] == "\\" and token[1:2].isdigit() and token[1] != "0":
+            return True
+        if token.isdigit() and recent[-3:] == ["(", "?", "("]:
+            return True
+        recent.append(token)
+    return False
+
+
+class HighlightRule:
+    __slots__ = ("pattern", "foreground", "background", "bold", "ignore_case")
+
+    def __init__(self, pattern, foreground=None, background=None, bold=False, ignore_case=False):
+        self.pattern = pattern
+        self.foreground = foreground
+        self.background = background
+        self.bold = bold
+        self.ignore_case = ignore_case
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get('pattern', ''),
+            parse_color(data.get('foreground')),
+            parse_color(data.get('background')),
+            bool(data.get('bold', False)),
+            bool(data.get('ignore_case', False)),
+        )
+
+
+class HighlightEngine:
+    """
+    Rules are compiled into one alternation of named groups, so each line is scanned once.
+    Python's regex engine tries every alternative at every position, so rules with a
+    required literal are left out of the alternation unless the literal occurs in the line
+    (one search over all literals rules out most lines at once); the alternation for each
+    set of candidate rules is compiled once and cached.
+    apply() returns the line's style runs recolored by the matching rules plus the
+    background/bold marks that cannot be expressed as a foreground color.
+    """
+
+    def __init__(self, rules):
+        self.rules = {}
+        self.errors = []
+        self.rejected = []    # positions in rules of the rules left out
+        self._alternatives = []
+        self._group_names = set()
+        self._always = []     # rule indexes without a usable literal
+        self._literals = []   # (index, literal) of case-sensitive rules
+        self._literals_ci = []  # (index, lowercase literal) of case-insensitive rules
+        self._combined = {}
+        self._gates = []      # match if any literal occurs in the line
+        for position, data in enumerate(rules):
+            rule = data if isinstance(data, HighlightRule) else HighlightRule.from_dict(data)
+            if not rule.pattern:
+                continue
+            index = len(self._alternatives)
+            name = f"h{index}"
+            alternative, flags = wrap_rule_pattern(rule.pattern, name, rule.ignore_case)
+            error = self._check(alternative, rule.pattern)
+            if error is not None:
+                # Only this rule is left out, the others keep working
+                self.errors.append(f"{rule.pattern}: {error}")
+                self.rejected.append(position)
+                continue
+            self._alternatives.append(alternative)
+            self.rules[name] = rule
+
+            if "i" in flags:
+                rule.ignore_case = True  # global (?i) in the pattern itself
+            literal = required_literal(rule.pattern)
+            if literal is None:
+                self._always.append(index)
+            elif rule.ignore_case:
+                self._literals_ci.append((index, literal.lower()))
+            else:
+                self._literals.append((index, literal))
+
+        # Kept apart so each gate is a plain alternation of literals, which the regex
+        # engine scans with a first-character prefilter
+        for literals, flags in ((self._literals, 0), (self._literals_ci, re.IGNORECASE)):
+            if literals:
+                self._gates.append(re.compile("|".join(re.escape(literal) for _, literal in literals), flags))
+
+        self._always_key = tuple(self._always)
+
+    def __bool__(self):
+        return bool(self._alternatives)
+
+    def _check(self, alternative, pattern):
+        """Error message if alternative cannot join the alternation, else None"""
+        try:
+            re.compile(pattern)  # error positions as the user wrote the pattern
+            names = re.compile(alternative).groupindex.keys()
+        except re.error as e:
+            return str(e) if e.pattern == pattern else e.msg
+        if numbered_reference(pattern):
+            return "groups can only be referred to by name, e.g. (?P<x>...)(?P=x)"
+        used = self._group_names.intersection(names)
+        if used:
+            return f"group name {sorted(used)[0]!r} is used by another rule"
+        self._group_names.update(names)
+        return None
+
+    def _get_regex(self, indexes):
+        regex = self._combined.get(indexes)
+        if regex is None:
+            if len(self._combined) >= COMBINED_CACHE_SIZE:
+                self._combined.clear()
+            regex = re.compile("|".join(self._alternatives[i] for i in indexes))
+            self._combined[indexes] = regex
+        return regex
+
+    def _candidates(self, text):
+        """Indexes of the rules that can match text, in rule order"""
+        if not any(gate.search(text) for gate in self._gates):
+            return self._always_key
+        candidates = [index for index, literal in self._literals if literal in text]
+        if self._literals_ci:
+            lowered = text.lower()
+            candidates.extend(index for index, literal in self._literals_ci if literal in lowered)
+        if self._always:
+            candidates.extend(self._always)
+        if len(candidates) > 1:
+            candidates.sort()
+        return tuple(candidates)
+
+    def apply(self, line_parts, text):
+        """Return (line_parts, marks); marks is None or a list of (start, end, background, bold)"""
+        candidates = self._candidates(text)
+        if not candidates:
+            return line_parts, None
+        regex = self._get_regex(candidates)
+        first = regex.search(text)
+        if first is None:
+            return line_parts, None
+        spans = []
+        marks = None
+        for match in regex.finditer(text, first.start()):
+            start, end = match.span()
+            if start == end:
+                continue
+            rule = self.rules[match.lastgroup]
+            if rule.foreground is not None:
+                spans.append((start, end, rule.foreground))
+            if rule.background is not None or rule.bold:
+                if marks is None:
+                    marks = []
+                marks.append((start, end, rule.background, rule.bold))
+        if spans:
+            line_parts = recolor_parts(line_parts, spans)
+        return line_parts, marks
+
+
+def recolor_parts(line_parts, spans):
+    """Split (text, color) runs at the span boundaries and apply the span colors"""
+    result = []
+    span_iter = iter(spans)
+    span = next(span_iter, None)
+    offset = 0
+    for part, color in line_parts:
+        part_end = offset + len(part)
+        pos = offset
+        while pos < part_end:
+            while span is not None and span[1] <= pos:
+                span = next(span_iter, None)
+            if span is None or span[0] >= part_end:
+                piece_end, piece_color = part_end, color
+            elif span[0] > pos:
+                piece_end, piece_color = span[0], color
+            else:
+                piece_end, piece_color = min(span[1], part_end), span[2]
+            piece = part[pos - offset:piece_end - offset]
+            if result and result[-1][1] == piece_color:
+                result[-1] = (result[-1][0] + piece, piece_color)
+            else:
+                result.append((piece, piece_color))
+            pos = piece_end
+        offset = part_end
+    return result
@@ -0,0 +1,250 @@
+import csv
+import os
+from array import array
+from datetime import datetime
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView,
+    QFileDialog, QMessageBox, QLabel
+)
+from PySide6.QtCore import Qt, QTimer
+import utils
+
+LATENCY_HEADERS = ["Command", "Count", "Min (ms)", "Median (ms)", "P95 (ms)", "Max (ms)",
+                   "First RX median (ms)", "Errors", "Error rate", "No final result"]
+REFRESH_INTERVAL_MS = 1000
+
+
+class Transaction:
+    __slots__ = ("command", "sent_at", "event_id", "lane", "first_rx", "final", "response_time")
+
+    def __init__(self, command, sent_at, event_id, lane=None):
+        self.command = command
+        self.sent_at = sent_at
+        self.event_id = event_id   # chart event id of the TX
+        self.lane = lane           # port the command was written to
+        self.first_rx = None       # seconds from the write to the first RX byte
+        self.final = None          # final result code, e.g. 'OK' or '+CME ERROR: 10'
+        self.response_time = None  # seconds from the write to the final result code
+
+    @property
+    def is_error(self):
+        return self.final is not None and self.final != "OK" and not self.final.startswith("CONNECT")
+
+
+class CommandStats:
+    __slots__ = ("count", "errors", "no_final", "response_times", "first_rx_times")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.no_final = 0
+        self.response_times = array('d')
+        self.first_rx_times = array('d')
+
+    def add(self, transaction):
+        self.count += 1
+        if transaction.first_rx is not None:
+            self.first_rx_times.append(transaction.first_rx)
+        if transaction.final is None:
+            self.no_final += 1
+            return
+        self.response_times.append(transaction.response_time)
+        if transaction.is_error:
+            self.errors += 1
+
+    def values(self):
+        """min, median, p95, max response time and median first RX time in ms (None when unknown)"""
+        ordered = sorted(self.response_times)
+        first_rx = sorted(self.first_rx_times)
+        if not ordered:
+            timings = [None] * 4
+        else:
+            timings = [ordered[0] * 1000, utils.percentile(ordered, 0.5) * 1000,
+                       utils.percentile(ordered, 0.95) * 1000, ordered[-1] * 1000]
+        return timings + [utils.percentile(first_rx, 0.5) * 1000 if first_rx else None]
+
+
+class LatencyTracker:
+    """
+    Correlates the TX/RX event stream into command transactions: a TX starts one, and the first
+    RX and the final result code (OK, ERROR, +CME ERROR: ...) complete it. A command superseded
+    by the next one without a final result counts as 'no final result'. RX arriving while no
+    command is pending (URCs, logs) or from another lane is not parsed at all.
+    External command output is ignored.
+    on_transaction(transaction) is called for each completed transaction.
+    """
+
+    def __init__(self, on_transaction=None):
+        self.on_transaction = on_transaction
+        self.reset()
+
+    def reset(self):
+        self.stats = {}  # command -> CommandStats
+        self.transactions = 0
+        self.pending = None
+        self._response = None
+
+    def cancel_pending(self):
+        """Forget the command waiting for its response, e.g. when the chart events were cleared"""
+        self.pending = None
+        self._response = None
+
+    def feed(self, frames, first_id):
+        """Chart events (RxFrame) whose first one has chart event id first_id"""
+        for offset, frame in enumerate(frames):
+            if frame.direction == "TX":
+                self.command_sent(frame.text, frame.timestamp, first_id + offset, frame.lane)
+            elif self.pending is not None and frame.direction == "RX" and frame.lane == self.pending.lane:
+                self.rx(frame.text, frame.timestamp)
+
+    def command_sent(self, command, timestamp, event_id, lane=None):
+        command = command.strip()
+        if not command:
+            return
+        if self.pending is not None:
+            self._complete()
+        self.pending = Transaction(command, timestamp, event_id, lane)
+        self._response = utils.AtResponseParser(command)
+
+    def rx(self, text, timestamp):
+        transaction = self.pending
+        final = self._response.feed(text)
+        if transaction.first_rx is None and self._response.started:
+            transaction.first_rx = timestamp - transaction.sent_at
+        if final:
+            transaction.final = final
+            transaction.response_time = timestamp - transaction.sent_at
+            self._complete()
+
+    def _complete(self):
+        transaction, self.pending = self.pending, None
+        self._response = None
+        stats = self.stats.get(transaction.command)
+        if stats is None:
+            stats = self.stats[transaction.command] = CommandStats()
+        stats.add(transaction)
+        self.transactions += 1
+        if self.on_transaction is not None:
+            self.on_transaction(transaction)
+
+    def rows(self):
+        """One row per command, most frequent first: LATENCY_HEADERS values, timings in ms"""
+        rows = []
+        for command, stats in self.stats.items():
+            completed = stats.count - stats.no_final
+            error_rate = stats.errors / completed if completed else None
+            rows.append([command, stats.count] + stats.values() + [stats.errors, error_rate, stats.no_final])
+        rows.sort(key=lambda row: (-row[1], row[0]))
+        return rows
+
+
+def annotation_text(transaction):
+    """Short latency label for the command's arrow in the sequence chart"""
+    if transaction.final is None:
+        return "no final result"
+    text = f"{transaction.final} in {transaction.response_time * 1000:.0f} ms"
+    if transaction.first_rx is not None:
+        text += f" (first RX {transaction.first_rx * 1000:.0f} ms)"
+    return text
+
+
+def format_value(value, col):
+    if value is None:
+        return "-"
+    if LATENCY_HEADERS[col] == "Error rate":
+        return f"{value * 100:.1f} %"
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
+
+
+def write_latency_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(LATENCY_HEADERS)
+        for row in rows:
+            writer.writerow(["" if value is None else round(value, 3) if isinstance(value, float) else value
+                             for value in row])
+
+
+class LatencyStatsDialog(QDialog):
+    """Per-command response time statistics, refreshed while open"""
+
+    def __init__(self, tracker, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Command Latency")
+        self.resize(900, 420)
+        self.tracker = tracker
+        self.last_save_dir = os.path.expanduser("~")
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(LATENCY_HEADERS))
+        self.table.setHorizontalHeaderLabels(LATENCY_HEADERS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        btn_layout.addWidget(reset_btn)
+        btn_layout.addStretch()
+        export_btn = QPushButton("Export CSV...")
+        export_btn.clicked.connect(self.export_csv)
+        btn_layout.addWidget(export_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self._shown_transactions = -1
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        tracker = self.tracker
+        if tracker.transactions == self._shown_transactions:
+            return
+        self._shown_transactions = tracker.transactions
+        rows = tracker.rows()
+        self.summary_label.setText(f"{tracker.transactions:,} transactions, {len(rows):,} commands. "
+                                   "Response time runs from the command to its final result code.")
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for col, value in enumerate(row):
+                item = QTableWidgetItem(format_value(value, col))
+                if col:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(r, col, item)
+
+    def reset(self):
+        self.tracker.reset()
+        self.refresh()
+
+    def export_csv(self):
+        if not os.path.exists(self.last_save_dir):
+            self.last_save_dir = os.path.expanduser("~")
+        default_path = os.path.join(self.last_save_dir,
+                                    f"command_latency_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        path, _ = QFileDialog.getSaveFileName(self, "Export CSV", default_path, "CSV Files (*.csv);;All Files (*)")
+        if not path:
+            return
+        self.last_save_dir = os.path.dirname(path)
+        try:
+            write_latency_csv(path, self.tracker.rows())
+        except OSError as e:
+            QMessageBox.warning(self, "Export CSV", f"Could not save {os.path.basename(path)}:\n{e}")
@@ -0,0 +1,165 @@
+import os
+from datetime import datetime
+import yaml
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QSpinBox, QDoubleSpinBox, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox, QLabel
+)
+import utils
+
+DEFAULT_MARGIN_PERCENT = 20
+DEFAULT_MIN_MARGIN_SEC = 0.1
+# Delay for a command whose response never ended in a final result code (Sequential Send default)
+DEFAULT_STEP_TIME = 1.0
+
+
+class MacroStep:
+    __slots__ = ("command", "hexmode", "sent_at", "first_rx", "final", "response_time", "gap")
+
+    def __init__(self, command, hexmode, sent_at):
+        self.command = command
+        self.hexmode = hexmode
+        self.sent_at = sent_at
+        self.first_rx = None       # seconds from the write to the first RX byte
+        self.final = None          # final result code, e.g. 'OK' or '+CME ERROR: 10'
+        self.response_time = None  # seconds from the write to the final result code
+        self.gap = None            # seconds until the next command, when no final result came
+
+    @property
+    def latency(self):
+        return self.response_time if self.response_time is not None else self.gap
+
+
+class MacroRecorder:
+    """
+    Turns commands sent while recording into command-list steps.
+    A step's response time runs from the write to the final result code (OK, ERROR,
+    +CME ERROR: ...); a command without one keeps the time the user waited before the next.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self._response = None
+
+    def command_sent(self, command, timestamp, hexmode=False):
+        command = command.rstrip("\r\n")
+        if not command.strip():
+            return
+        if self.steps and self.steps[-1].final is None:
+            self.steps[-1].gap = timestamp - self.steps[-1].sent_at
+        self.steps.append(MacroStep(command, hexmode, timestamp))
+        self._response = utils.AtResponseParser(command)
+
+    def rx(self, text, timestamp):
+        if not self.steps:
+            return
+        step = self.steps[-1]
+        if step.final is not None:
+            return
+        final = self._response.feed(text)
+        if step.first_rx is None and self._response.started:
+            step.first_rx = timestamp - step.sent_at
+        if final:
+            step.final = final
+            step.response_time = timestamp - step.sent_at
+
+
+def step_time(step, margin_percent=DEFAULT_MARGIN_PERCENT, min_margin=DEFAULT_MIN_MARGIN_SEC):
+    """Measured latency plus a margin, as the step's 'time' in the command list"""
+    latency = step.latency
+    if latency is None:
+        return DEFAULT_STEP_TIME
+    return round(latency + max(latency * margin_percent / 100, min_margin), 2)
+
+
+def build_command_list(steps, margin_percent=DEFAULT_MARGIN_PERCENT, min_margin=DEFAULT_MIN_MARGIN_SEC):
+    """Items in the atcmder_predefined_cmd_N.yaml format"""
+    return [
+        {
+            "index": i,
+            "checked": True,
+            "title": {"text": step.command, "disabled": False},
+            "time": step_time(step, margin_percent, min_margin),
+            "hexmode": step.hexmode,
+        }
+        for i, step in enumerate(steps)
+    ]
+
+
+class MacroReviewDialog(QDialog):
+    """Recorded steps with their timings; saves them as a command list"""
+    COMMAND_COL, FIRST_RX_COL, RESULT_COL, LATENCY_COL, TIME_COL = range(5)
+
+    def __init__(self, steps, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Recorded Macro")
+        self.resize(640, 420)
+        self.steps = steps
+        self.saved_path = None
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"{len(steps)} commands recorded. 'Time' is the delay after each command "
+                                "in Sequential Send."))
+
+        form = QFormLayout()
+        self.margin_spin = QSpinBox()
+        self.margin_spin.setRange(0, 500)
+        self.margin_spin.setSuffix(" %")
+        self.margin_spin.setValue(DEFAULT_MARGIN_PERCENT)
+        self.margin_spin.valueChanged.connect(self.update_times)
+        form.addRow("Margin:", self.margin_spin)
+        self.min_margin_spin = QDoubleSpinBox()
+        self.min_margin_spin.setRange(0.0, 10.0)
+        self.min_margin_spin.setSingleStep(0.05)
+        self.min_margin_spin.setSuffix(" s")
+        self.min_margin_spin.setValue(DEFAULT_MIN_MARGIN_SEC)
+        self.min_margin_spin.valueChanged.connect(self.update_times)
+        form.addRow("Minimum margin:", self.min_margin_spin)
+        layout.addLayout(form)
+
+        self.table = QTableWidget(len(steps), 5)
+        self.table.setHorizontalHeaderLabels(["Command", "First RX", "Result", "Response time", "Time"])
+        self.table.horizontalHeader().setSectionResizeMode(self.COMMAND_COL, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        for row, step in enumerate(steps):
+            command = f"HEX: {step.command}" if step.hexmode else step.command
+            first_rx = f"{step.first_rx * 1000:.0f} ms" if step.first_rx is not None else "-"
+            result = step.final or "(no final result)"
+            latency = f"{step.latency * 1000:.0f} ms" if step.latency is not None else "-"
+            for col, value in ((self.COMMAND_COL, command), (self.FIRST_RX_COL, first_rx),
+                               (self.RESULT_COL, result), (self.LATENCY_COL, latency)):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+        layout.addWidget(self.table)
+        self.update_times()
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        save_btn = QPushButton("Save as Command List...")
+        save_btn.clicked.connect(self.save)
+        btn_layout.addWidget(save_btn)
+        discard_btn = QPushButton("Discard")
+        discard_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(discard_btn)
+        layout.addLayout(btn_layout)
+
+    def update_times(self, *args):
+        for row, step in enumerate(self.steps):
+            time_value = step_time(step, self.margin_spin.value(), self.min_margin_spin.value())
+            self.table.setItem(row, self.TIME_COL, QTableWidgetItem(f"{time_value:.2f} s"))
+
+    def save(self):
+        default_path = utils.get_user_config_path(f"atcmder_macro_{datetime.now().strftime('%Y%m%d_%H%M%S')}.yaml")
+        path, _ = QFileDialog.getSaveFileName(self, "Save Command List", default_path,
+                                              "YAML Files (*.yaml *.yml);;All Files (*)")
+        if not path:
+            return
+        items = build_command_list(self.steps, self.margin_spin.value(), self.min_margin_spin.value())
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                yaml.safe_dump(items, f, allow_unicode=True, sort_keys=False)
+        except OSError as e:
+            QMessageBox.warning(self, "Save Command List", f"Could not save {os.path.basename(path)}:\n{e}")
+            return
+        self.saved_path = path
+        self.accept()
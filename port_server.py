@@ -0,0 +1,366 @@
+import selectors
+import socket
+import threading
+import time
+import serial
+import serial.rfc2217
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QSpinBox, QComboBox, QPushButton,
+    QLabel, QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox
+)
+from PySide6.QtCore import QObject, Signal, QTimer
+
+SHARE_MODE_RAW = "Raw TCP"
+SHARE_MODE_RFC2217 = "RFC2217"
+SHARE_MODES = [SHARE_MODE_RAW, SHARE_MODE_RFC2217]
+DEFAULT_SHARE_PORT = 7000
+
+# RX bytes buffered per client; a client that stops reading loses the oldest bytes
+CLIENT_BUFFER_BYTES = 1024 * 1024
+RECV_SIZE = 4096
+MODEM_POLL_SEC = 1.0
+
+
+class SharedPortView:
+    """
+    What RFC2217 clients see of the shared port: current settings and modem lines.
+    Setting changes and buffer resets from clients are ignored, the GUI owns the port.
+    """
+
+    def __init__(self, get_serial):
+        self._get_serial = get_serial
+
+    def __getattr__(self, name):
+        port = self._get_serial()
+        if port is None or not port.is_open:
+            defaults = {'baudrate': 115200, 'bytesize': serial.EIGHTBITS, 'parity': serial.PARITY_NONE,
+                        'stopbits': serial.STOPBITS_ONE, 'rtscts': False, 'xonxoff': False}
+            return defaults.get(name, False)
+        return getattr(port, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+
+class ShareClient:
+    def __init__(self, sock, address, port_view=None):
+        self.sock = sock
+        self.address = f"{address[0]}:{address[1]}"
+        self.connected_at = time.time()
+        self.outgoing = bytearray()
+        self.lock = threading.Lock()
+        self.rx_bytes = 0       # sent to the client
+        self.tx_bytes = 0       # received from the client and written to the port
+        self.dropped = 0
+        self.manager = serial.rfc2217.PortManager(port_view, self) if port_view is not None else None
+
+    @property
+    def mode(self):
+        return SHARE_MODE_RFC2217 if self.manager else SHARE_MODE_RAW
+
+    def write(self, data):
+        """Connection interface for PortManager (telnet negotiation replies)"""
+        with self.lock:
+            self.outgoing += data
+
+    def queue_rx(self, data):
+        if self.manager:
+            data = b''.join(self.manager.escape(data))
+        with self.lock:
+            self.outgoing += data
+            overflow = len(self.outgoing) - CLIENT_BUFFER_BYTES
+            if overflow > 0:
+                del self.outgoing[:overflow]
+                self.dropped += overflow
+
+
+class PortShareServer(QObject):
+    """
+    Serves the open serial port on a local TCP socket.
+    Every client gets a copy of the RX stream; data from clients is emitted as client_tx
+    and written by the GUI through the same path as typed commands.
+    """
+    client_tx = Signal(str, bytes)  # client address, data
+    clients_changed = Signal()
+
+    def __init__(self, get_serial, parent=None):
+        super().__init__(parent)
+        self.port_view = SharedPortView(get_serial)
+        self.clients = []
+        self.port = None
+        self.mode = SHARE_MODE_RAW
+        self._lock = threading.Lock()
+        self._listener = None
+        self._thread = None
+        self._running = False
+        self._wake_r = self._wake_w = None
+
+    def is_running(self):
+        return self._running
+
+    def start(self, port=DEFAULT_SHARE_PORT, mode=SHARE_MODE_RAW, allow_remote=False):
+        """Raises OSError if the port cannot be bound"""
+        if self._running:
+            self.stop()
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            listener.bind(("0.0.0.0" if allow_remote else "127.0.0.1", port))
+            listener.listen(8)
+        except OSError:
+            listener.close()
+            raise
+        listener.setblocking(False)
+        self._listener = listener
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self.port = port
+        self.mode = mode
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wake()
+        self._thread.join(2.0)
+        self._thread = None
+
+    def broadcast(self, data):
+        """Queue RX bytes for every client; never blocks"""
+        if not data:
+            return
+        with self._lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.queue_rx(data)
+        if clients:
+            self._wake()
+
+    def snapshot(self):
+        """(address, mode, connected_at, rx_bytes, tx_bytes, dropped) per client"""
+        with self._lock:
+            return [(c.address, c.mode, c.connected_at, c.rx_bytes, c.tx_bytes, c.dropped) for c in self.clients]
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
+
+    def _serve(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self._listener, selectors.EVENT_READ)
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        last_modem_poll = time.time()
+        try:
+            while self._running:
+                with self._lock:
+                    clients = list(self.clients)
+                for client in clients:
+                    events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.outgoing else 0)
+                    selector.modify(client.sock, events, client)
+
+                for key, events in selector.select(timeout=MODEM_POLL_SEC):
+                    if key.fileobj is self._listener:
+                        self._accept(selector)
+                    elif key.fileobj is self._wake_r:
+                        try:
+                            self._wake_r.recv(4096)
+                        except OSError:
+                            pass
+                    else:
+                        client = key.data
+                        if events & selectors.EVENT_READ and not self._receive(client):
+                            self._drop(selector, client)
+                            continue
+                        if events & selectors.EVENT_WRITE and not self._send(client):
+                            self._drop(selector, client)
+
+                now = time.time()
+                if now - last_modem_poll >= MODEM_POLL_SEC:
+                    last_modem_poll = now
+                    for client in clients:
+                        if client.manager and client in self.clients:
+                            try:
+                                client.manager.check_modem_lines()
+                            except Exception:
+                                pass
+        finally:
+            with self._lock:
+                clients, self.clients = self.clients, []
+            for client in clients:
+                client.sock.close()
+            selector.close()
+            self._listener.close()
+            self._wake_r.close()
+            self._wake_w.close()
+            self.clients_changed.emit()
+
+    def _accept(self, selector):
+        try:
+            sock, address = self._listener.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = ShareClient(sock, address, self.port_view if self.mode == SHARE_MODE_RFC2217 else None)
+        with self._lock:
+            self.clients.append(client)
+        selector.register(sock, selectors.EVENT_READ, client)
+        self.clients_changed.emit()
+
+    def _receive(self, client):
+        try:
+            data = client.sock.recv(RECV_SIZE)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        if not data:
+            return False
+        if client.manager:
+            data = b''.join(client.manager.filter(data))
+        if data:
+            client.tx_bytes += len(data)
+            self.client_tx.emit(client.address, data)
+        return True
+
+    def _send(self, client):
+        with client.lock:
+            pending = bytes(client.outgoing)
+        try:
+            sent = client.sock.send(pending)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        with client.lock:
+            del client.outgoing[:sent]
+        client.rx_bytes += sent
+        return True
+
+    def _drop(self, selector, client):
+        selector.unregister(client.sock)
+        client.sock.close()
+        with self._lock:
+            if client in self.clients:
+                self.clients.remove(client)
+        self.clients_changed.emit()
+
+
+def format_rate(bytes_per_sec):
+    if bytes_per_sec >= 1024 * 1024:
+        return f"{bytes_per_sec / (1024 * 1024):.1f} MB/s"
+    if bytes_per_sec >= 1024:
+        return f"{bytes_per_sec / 1024:.1f} KB/s"
+    return f"{bytes_per_sec:.0f} B/s"
+
+
+class PortShareDialog(QDialog):
+    """Start/stop sharing and watch the connected clients"""
+
+    def __init__(self, server, settings, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Share Port over TCP")
+        self.resize(620, 360)
+        self.server = server
+        self.settings = settings
+        self._last = {}  # address -> (time, rx_bytes, tx_bytes)
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.port_spin = QSpinBox()
+        self.port_spin.setRange(1024, 65535)
+        self.port_spin.setValue(int(settings.get('port', DEFAULT_SHARE_PORT)))
+        form.addRow("TCP port:", self.port_spin)
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(SHARE_MODES)
+        self.mode_combo.setCurrentText(settings.get('mode', SHARE_MODE_RAW))
+        self.mode_combo.setToolTip("RFC2217 clients (e.g. pyserial 'rfc2217://localhost:7000') see the port settings\n"
+                                   "but cannot change them: open the client with the same baudrate and framing,\n"
+                                   "a request for different settings is answered with the current ones and rejected.")
+        form.addRow("Protocol:", self.mode_combo)
+        self.remote_check = QCheckBox("Accept connections from other hosts")
+        self.remote_check.setChecked(bool(settings.get('allow_remote', False)))
+        form.addRow("", self.remote_check)
+        layout.addLayout(form)
+
+        btn_layout = QHBoxLayout()
+        self.status_label = QLabel()
+        btn_layout.addWidget(self.status_label)
+        btn_layout.addStretch()
+        self.start_btn = QPushButton()
+        self.start_btn.clicked.connect(self.toggle_server)
+        btn_layout.addWidget(self.start_btn)
+        layout.addLayout(btn_layout)
+
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(["Client", "Protocol", "Connected", "RX sent", "TX received", "Dropped"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn)
+
+        self.server.clients_changed.connect(self.refresh)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def toggle_server(self):
+        if self.server.is_running():
+            self.server.stop()
+        else:
+            try:
+                self.server.start(self.port_spin.value(), self.mode_combo.currentText(), self.remote_check.isChecked())
+            except OSError as e:
+                self.status_label.setText(f"Cannot listen on port {self.port_spin.value()}: {e.strerror or e}")
+                return
+            self.settings['port'] = self.port_spin.value()
+            self.settings['mode'] = self.mode_combo.currentText()
+            self.settings['allow_remote'] = self.remote_check.isChecked()
+        self.refresh()
+
+    def refresh(self):
+        running = self.server.is_running()
+        self.start_btn.setText("Stop Sharing" if running else "Start Sharing")
+        for widget in (self.port_spin, self.mode_combo, self.remote_check):
+            widget.setEnabled(not running)
+        if running:
+            self.status_label.setText(f"Listening on port {self.server.port} ({self.server.mode})")
+        elif not self.status_label.text().startswith("Cannot"):
+            self.status_label.setText("Not sharing")
+
+        now = time.time()
+        rows = self.server.snapshot()
+        self.table.setRowCount(len(rows))
+        last = {}
+        for row, (address, mode, connected_at, rx_bytes, tx_bytes, dropped) in enumerate(rows):
+            prev_time, prev_rx, prev_tx = self._last.get(address, (connected_at, 0, 0))
+            elapsed = max(now - prev_time, 1e-3)
+            last[address] = (now, rx_bytes, tx_bytes)
+            values = [
+                address,
+                mode,
+                time.strftime("%H:%M:%S", time.localtime(connected_at)),
+                f"{rx_bytes:,} ({format_rate((rx_bytes - prev_rx) / elapsed)})",
+                f"{tx_bytes:,} ({format_rate((tx_bytes - prev_tx) / elapsed)})",
+                f"{dropped:,}",
+            ]
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+        self._last = last
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from PySide6.QtCore import QObject, Signal, QTimer
+
+DEFAULT_SINK_QUEUE = 10000
+TERMINAL_SINK_QUEUE = 200000
+# Main-thread time spent delivering per drain pass before yielding to painting and input
+DRAIN_BUDGET_SEC = 0.02
+
+
+class RxFrame:
+    __slots__ = ("direction", "text", "raw", "timestamp", "lane", "replayed")
+
+    def __init__(self, direction, text, raw, timestamp, lane=None, replayed=False):
+        self.direction = direction
+        self.text = text
+        self.raw = raw
+        self.timestamp = timestamp
+        self.lane = lane  # who the host talks to: port name or other source, None for the current device
+        self.replayed = replayed  # TX from a session replay, shown by the terminal sink
+
+
+class RxSink:
+    """
+    One consumer of the data stream with its own bounded queue.
+    When the queue is full the oldest frames are dropped and counted, so a slow sink
+    never holds up the reader or the other sinks. deliver() runs on the GUI thread.
+    """
+    name = "sink"
+
+    def __init__(self, max_queue=DEFAULT_SINK_QUEUE, max_batch=0, directions=None):
+        self.queue = deque()
+        self.max_queue = max_queue
+        self.max_batch = max_batch    # frames per deliver() call, 0 for everything queued
+        self.directions = directions  # None for all directions
+        self.delivered = 0
+        self.dropped = 0
+        self.max_lag = 0.0   # worst delay between a frame's timestamp and its delivery
+        self.busy_time = 0.0  # total seconds spent in deliver()
+
+    def ready(self):
+        """False while the sink cannot take frames yet; they wait in the queue"""
+        return True
+
+    def deliver(self, frames):
+        raise NotImplementedError
+
+
+class RxPipeline(QObject):
+    """
+    Fans frames out to the registered sinks.
+    submit() can be called from any thread; delivery happens in batches on the GUI thread.
+    """
+    frames_pending = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sinks = []
+        self._lock = threading.Lock()
+        self._wake_pending = False
+        self._next_sink = 0  # drain passes start where the last one ran out of time
+        self.frames_pending.connect(self.drain)
+
+    def add_sink(self, sink):
+        with self._lock:
+            self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink):
+        with self._lock:
+            if sink in self.sinks:
+                self.sinks.remove(sink)
+
+    def submit(self, frames):
+        """Queue a list of RxFrame for every sink"""
+        if not frames:
+            return
+        with self._lock:
+            for sink in self.sinks:
+                queue = sink.queue
+                if sink.directions is None:
+                    queue.extend(frames)
+                else:
+                    queue.extend(frame for frame in frames if frame.direction in sink.directions)
+                overflow = len(queue) - sink.max_queue
+                if overflow > 0:
+                    sink.dropped += overflow
+                    for _ in range(overflow):
+                        queue.popleft()
+            wake = not self._wake_pending
+            self._wake_pending = True
+        if wake:
+            # One queued signal per burst instead of one per frame
+            self.frames_pending.emit()
+
+    def wake(self):
+        """Deliver frames held back by a sink that was not ready"""
+        with self._lock:
+            wake = not self._wake_pending
+            self._wake_pending = True
+        if wake:
+            QTimer.singleShot(0, self.drain)
+
+    def drain(self):
+        with self._lock:
+            self._wake_pending = False
+            sinks = list(self.sinks)
+        if not sinks:
+            return
+        first = self._next_sink % len(sinks)
+        order = sinks[first:] + sinks[:first]
+        deadline = time.perf_counter() + DRAIN_BUDGET_SEC
+        more = False
+        for position, sink in enumerate(order):
+            if not sink.queue or not sink.ready():
+                continue
+            with self._lock:
+                if sink.max_batch and len(sink.queue) > sink.max_batch:
+                    frames = [sink.queue.popleft() for _ in range(sink.max_batch)]
+                else:
+                    frames = list(sink.queue)
+                    sink.queue.clear()
+            start = time.perf_counter()
+            try:
+                sink.deliver(frames)
+            except Exception as e:
+                print(f"RX sink '{sink.name}' failed: {e}")
+            end = time.perf_counter()
+            sink.busy_time += end - start
+            sink.delivered += len(frames)
+            lag = time.time() - frames[0].timestamp
+            if lag > sink.max_lag:
+                sink.max_lag = lag
+            if end > deadline:
+                self._next_sink = first + position + 1
+                more = True
+                break
+        if more or any(sink.queue and sink.ready() for sink in sinks):
+            with self._lock:
+                self._wake_pending = True
+            QTimer.singleShot(0, self.drain)
+
+    def stats(self):
+        """(name, queued, delivered, dropped, max_lag, busy_time) per sink"""
+        with self._lock:
+            return [(sink.name, len(sink.queue), sink.delivered, sink.dropped, sink.max_lag, sink.busy_time)
+                    for sink in self.sinks]
+
+    def reset_stats(self):
+        with self._lock:
+            for sink in self.sinks:
+                sink.delivered = sink.dropped = 0
+                sink.max_lag = sink.busy_time = 0.0
+
+
+class CallbackSink(RxSink):
+    """Sink that hands each batch to a function; ready() can be any callable"""
+
+    def __init__(self, name, callback, max_queue=DEFAULT_SINK_QUEUE, max_batch=0, directions=None, ready=None):
+        super().__init__(max_queue, max_batch, directions)
+        self.name = name
+        self.callback = callback
+        self._ready = ready
+
+    def ready(self):
+        return self._ready() if self._ready else True
+
+    def deliver(self, frames):
+        self.callback(frames)
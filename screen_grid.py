@@ -0,0 +1,340 @@
+import re
+from PySide6.QtWidgets import QWidget, QSizePolicy
+from PySide6.QtGui import QPainter, QColor
+from PySide6.QtCore import Qt, QRect, QTimer
+
+DEFAULT_ROWS = 24
+DEFAULT_COLS = 80
+
+# Alternate screen buffer switches (xterm 1049/1047 and the older 47)
+SCREEN_ENTER_PATTERN = re.compile(r'\x1b\[\?(?:1049|1047|47)h')
+SCREEN_EXIT_PATTERN = re.compile(r'\x1b\[\?(?:1049|1047|47)l')
+
+# CSI sequences, charset selection, single-character escapes and C0 controls
+CONTROL_PATTERN = re.compile(
+    r'\x1b\[([?>]?)([0-9;]*)([@-~])|\x1b[()][0-9A-Za-z]|\x1b[78=>DEMc]|[\r\n\b\t\x07\x0b\x0c]'
+)
+
+
+class ScreenGrid:
+    """
+    Character-cell screen with VT100 cursor addressing.
+    Every write compares the old and new cell so `damage` only holds cells that changed.
+    """
+
+    def __init__(self, rows=DEFAULT_ROWS, cols=DEFAULT_COLS, default_color=None, ansi_colors=None):
+        self.default_color = default_color or QColor(200, 200, 200)
+        self.ansi_colors = ansi_colors or {}
+        self.rows = rows
+        self.cols = cols
+        self.chars = [[' '] * cols for _ in range(rows)]
+        self.colors = [[self.default_color] * cols for _ in range(rows)]
+        self.cursor_row = 0
+        self.cursor_col = 0
+        self.saved_cursor = (0, 0)
+        self.current_color = self.default_color
+        self.scroll_top = 0
+        self.scroll_bottom = rows - 1
+        self.damage = set()     # (row, col) of changed cells
+        self.full_damage = True  # everything needs repainting (scroll, resize, reset)
+        self._pending = ""      # incomplete escape sequence at the end of the last feed
+
+    def take_damage(self):
+        """Return (full, cells) and reset the damage"""
+        full, cells = self.full_damage, self.damage
+        self.full_damage = False
+        self.damage = set()
+        return full, cells
+
+    def reset(self):
+        for row in range(self.rows):
+            self._erase(row, 0, self.cols)
+        self.cursor_row = self.cursor_col = 0
+        self.current_color = self.default_color
+        self.scroll_top = 0
+        self.scroll_bottom = self.rows - 1
+
+    def resize(self, rows, cols):
+        """Resize keeping the top-left content"""
+        rows = max(1, rows)
+        cols = max(1, cols)
+        if rows == self.rows and cols == self.cols:
+            return
+        chars = [[' '] * cols for _ in range(rows)]
+        colors = [[self.default_color] * cols for _ in range(rows)]
+        for row in range(min(rows, self.rows)):
+            width = min(cols, self.cols)
+            chars[row][:width] = self.chars[row][:width]
+            colors[row][:width] = self.colors[row][:width]
+        self.chars, self.colors = chars, colors
+        self.rows, self.cols = rows, cols
+        self.cursor_row = min(self.cursor_row, rows - 1)
+        self.cursor_col = min(self.cursor_col, cols - 1)
+        self.scroll_top = 0
+        self.scroll_bottom = rows - 1
+        self.damage = set()
+        self.full_damage = True
+
+    def text(self):
+        """Screen contents as plain text, one line per row"""
+        return '\n'.join(''.join(row).rstrip() for row in self.chars)
+
+    def feed(self, data):
+        """Apply output from the device to the screen"""
+        data = self._pending + data
+        self._pending = ""
+        # Keep an unterminated escape sequence for the next chunk
+        esc = data.rfind('\x1b')
+        if esc != -1 and not CONTROL_PATTERN.match(data, esc) and len(data) - esc < 32:
+            data, self._pending = data[:esc], data[esc:]
+
+        pos = 0
+        for match in CONTROL_PATTERN.finditer(data):
+            if match.start() > pos:
+                self._write(data[pos:match.start()])
+            self._control(match)
+            pos = match.end()
+        if pos < len(data):
+            self._write(data[pos:])
+
+    def _set_cell(self, row, col, char, color):
+        chars = self.chars[row]
+        colors = self.colors[row]
+        if chars[col] != char or colors[col] != color:
+            chars[col] = char
+            colors[col] = color
+            self.damage.add((row, col))
+
+    def _erase(self, row, start, end):
+        for col in range(max(0, start), min(end, self.cols)):
+            self._set_cell(row, col, ' ', self.default_color)
+
+    def _write(self, text):
+        # Drop escape characters of sequences we don't interpret
+        text = text.replace('\x1b', '')
+        for char in text:
+            if self.cursor_col >= self.cols:
+                # Auto-wrap at the right margin
+                self.cursor_col = 0
+                self._line_feed()
+            self._set_cell(self.cursor_row, self.cursor_col, char, self.current_color)
+            self.cursor_col += 1
+
+    def _line_feed(self):
+        if self.cursor_row == self.scroll_bottom:
+            self._scroll_up(1)
+        elif self.cursor_row < self.rows - 1:
+            self.cursor_row += 1
+
+    def _scroll_up(self, count):
+        top, bottom = self.scroll_top, self.scroll_bottom
+        for _ in range(min(count, bottom - top + 1)):
+            del self.chars[top]
+            del self.colors[top]
+            self.chars.insert(bottom, [' '] * self.cols)
+            self.colors.insert(bottom, [self.default_color] * self.cols)
+        self.full_damage = True
+
+    def _scroll_down(self, count):
+        top, bottom = self.scroll_top, self.scroll_bottom
+        for _ in range(min(count, bottom - top + 1)):
+            del self.chars[bottom]
+            del self.colors[bottom]
+            self.chars.insert(top, [' '] * self.cols)
+            self.colors.insert(top, [self.default_color] * self.cols)
+        self.full_damage = True
+
+    def _control(self, match):
+        token = match.group()
+        if token == '\r':
+            self.cursor_col = 0
+        elif token in ('\n', '\x0b', '\x0c'):
+            self._line_feed()
+        elif token == '\b':
+            self.cursor_col = max(0, min(self.cursor_col, self.cols - 1) - 1)
+        elif token == '\t':
+            self.cursor_col = min(self.cols - 1, (self.cursor_col // 8 + 1) * 8)
+        elif token == '\x1b7':
+            self.saved_cursor = (self.cursor_row, self.cursor_col)
+        elif token == '\x1b8':
+            self.cursor_row, self.cursor_col = self.saved_cursor
+        elif token == '\x1bD':
+            self._line_feed()
+        elif token == '\x1bE':
+            self.cursor_col = 0
+            self._line_feed()
+        elif token == '\x1bM':
+            if self.cursor_row == self.scroll_top:
+                self._scroll_down(1)
+            elif self.cursor_row > 0:
+                self.cursor_row -= 1
+        elif token == '\x1bc':
+            self.reset()
+        elif match.group(3):
+            self._csi(match.group(1), match.group(2), match.group(3))
+
+    def _csi(self, private, params, final):
+        if private:
+            return  # mode switches (cursor visibility, alternate screen) are handled by the caller
+        args = [int(p) if p else 0 for p in params.split(';')] if params else []
+
+        def arg(index, default):
+            value = args[index] if index < len(args) else 0
+            return value or default
+
+        if final in 'Hf':
+            self.cursor_row = min(self.rows - 1, arg(0, 1) - 1)
+            self.cursor_col = min(self.cols - 1, arg(1, 1) - 1)
+        elif final == 'A':
+            self.cursor_row = max(0, self.cursor_row - arg(0, 1))
+        elif final in 'Be':
+            self.cursor_row = min(self.rows - 1, self.cursor_row + arg(0, 1))
+        elif final in 'Ca':
+            self.cursor_col = min(self.cols - 1, self.cursor_col + arg(0, 1))
+        elif final == 'D':
+            self.cursor_col = max(0, min(self.cursor_col, self.cols - 1) - arg(0, 1))
+        elif final == 'E':
+            self.cursor_row = min(self.rows - 1, self.cursor_row + arg(0, 1))
+            self.cursor_col = 0
+        elif final == 'F':
+            self.cursor_row = max(0, self.cursor_row - arg(0, 1))
+            self.cursor_col = 0
+        elif final in 'G`':
+            self.cursor_col = min(self.cols - 1, arg(0, 1) - 1)
+        elif final == 'd':
+            self.cursor_row = min(self.rows - 1, arg(0, 1) - 1)
+        elif final == 'J':
+            mode = arg(0, 0)
+            row, col = self.cursor_row, min(self.cursor_col, self.cols)
+            if mode == 0:
+                self._erase(row, col, self.cols)
+                for r in range(row + 1, self.rows):
+                    self._erase(r, 0, self.cols)
+            elif mode == 1:
+                for r in range(row):
+                    self._erase(r, 0, self.cols)
+                self._erase(row, 0, col + 1)
+            else:
+                for r in range(self.rows):
+                    self._erase(r, 0, self.cols)
+        elif final == 'K':
+            mode = arg(0, 0)
+            row, col = self.cursor_row, min(self.cursor_col, self.cols)
+            if mode == 0:
+                self._erase(row, col, self.cols)
+            elif mode == 1:
+                self._erase(row, 0, col + 1)
+            else:
+                self._erase(row, 0, self.cols)
+        elif final == 'X':
+            col = min(self.cursor_col, self.cols)
+            self._erase(self.cursor_row, col, col + arg(0, 1))
+        elif final == 'r':
+            top = arg(0, 1) - 1
+            bottom = arg(1, self.rows) - 1
+            if 0 <= top < bottom < self.rows:
+                self.scroll_top, self.scroll_bottom = top, bottom
+                self.cursor_row = self.cursor_col = 0
+        elif final == 'S':
+            self._scroll_up(arg(0, 1))
+        elif final == 'T':
+            self._scroll_down(arg(0, 1))
+        elif final == 'm':
+            self._sgr(args or [0])
+        elif final == 's':
+            self.saved_cursor = (self.cursor_row, self.cursor_col)
+        elif final == 'u':
+            self.cursor_row, self.cursor_col = self.saved_cursor
+
+    def _sgr(self, codes):
+        for code in codes:
+            if code in (0, 39):
+                self.current_color = self.default_color
+            elif code in self.ansi_colors:
+                self.current_color = self.ansi_colors[code]
+
+
+class ScreenGridWidget(QWidget):
+    """Renders a ScreenGrid with the terminal's font and colors, repainting only damaged cells"""
+
+    def __init__(self, terminal_widget, parent=None):
+        super().__init__(parent)
+        self.terminal_widget = terminal_widget
+        self.grid = ScreenGrid(default_color=terminal_widget.default_color,
+                               ansi_colors=terminal_widget.ansi_colors)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, True)
+        # Where the cursor was last drawn, so moving it repaints the old cell too
+        self._cursor_cell = (0, 0)
+
+        # Coalesce damage from many small chunks into one repaint per frame
+        self._damage_timer = QTimer(self)
+        self._damage_timer.setSingleShot(True)
+        self._damage_timer.setInterval(16)
+        self._damage_timer.timeout.connect(self.flush_damage)
+
+    def feed(self, data):
+        self.grid.feed(data)
+        if not self._damage_timer.isActive():
+            self._damage_timer.start()
+
+    def reset(self):
+        self.grid.reset()
+        self.flush_damage()
+
+    def _cell_size(self):
+        return self.terminal_widget.char_width, self.terminal_widget.line_height
+
+    def flush_damage(self):
+        """Request a repaint of the changed cells only"""
+        full, cells = self.grid.take_damage()
+        previous_cursor, self._cursor_cell = self._cursor_cell, (self.grid.cursor_row, self.grid.cursor_col)
+        if full:
+            self.update()
+            return
+        cell_width, cell_height = self._cell_size()
+        spans = {}
+        # The cursor may have moved even where no cell changed: clear the old bar, draw the new one
+        for row, col in (*cells, previous_cursor, self._cursor_cell):
+            first, last = spans.get(row, (col, col))
+            spans[row] = (min(first, col), max(last, col))
+        for row, (first, last) in spans.items():
+            self.update(QRect(first * cell_width, row * cell_height,
+                              (last - first + 2) * cell_width, cell_height))
+
+    def resizeEvent(self, event):
+        cell_width, cell_height = self._cell_size()
+        if cell_width > 0 and cell_height > 0:
+            self.grid.resize(self.height() // cell_height, self.width() // cell_width)
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setFont(self.terminal_widget.font)
+        rect = event.rect()
+        painter.fillRect(rect, self.terminal_widget.background_color)
+
+        grid = self.grid
+        cell_width, cell_height = self._cell_size()
+        ascent = self.terminal_widget.font_metrics.ascent()
+        first_row = max(0, rect.top() // cell_height)
+        last_row = min(grid.rows - 1, rect.bottom() // cell_height)
+        first_col = max(0, rect.left() // cell_width)
+        last_col = min(grid.cols - 1, rect.right() // cell_width)
+
+        for row in range(first_row, last_row + 1):
+            chars = grid.chars[row]
+            colors = grid.colors[row]
+            y = row * cell_height + ascent
+            for col in range(first_col, last_col + 1):
+                char = chars[col]
+                if char != ' ':
+                    painter.setPen(colors[col])
+                    painter.drawText(col * cell_width, y, char)
+
+        if self.hasFocus() and grid.cursor_row < grid.rows:
+            painter.setPen(QColor(200, 255, 200))
+            painter.drawRect(min(grid.cursor_col, grid.cols - 1) * cell_width, grid.cursor_row * cell_height,
+                             2, cell_height)
+        painter.end()
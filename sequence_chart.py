@@ -1,520 +1,953 @@
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene, QGraphicsLineItem, 
-    QGraphicsTextItem, QGraphicsPathItem, QMainWindow, QFileDialog, QMessageBox, QPushButton
+    QAbstractScrollArea, QMainWindow, QPushButton, QToolTip
 )
 from PySide6.QtGui import (
-    QPen, QColor, QPainter, QPainterPath, QFont, QFontMetrics, QAction, 
-    QPdfWriter, QPageSize, QPalette
+    QPen, QColor, QPainter, QFont, QFontMetrics, QPalette, QPolygonF
 )
-from PySide6.QtCore import Qt, QRectF, QTimer, QEvent
-from datetime import datetime
-import re
+from PySide6.QtCore import Qt, QPointF, QTimer, QEvent
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from operator import attrgetter
 import os
+import time
+import utils
+from rx_pipeline import RxFrame
 
 DISPLAY_TEXT_LEN = 70
 
+# Row geometry in chart coordinates: arrow i is drawn at TOP_Y + i * STEP_Y
+HEADER_HEIGHT = 22
+TOP_Y = 50
+STEP_Y = 40
+ARROW_SIZE = 10
+MIN_GAP = 200
+MIN_MARGIN = 90  # room for the time labels left of the host lifeline
+RIGHT_MARGIN = 200
+BOTTOM_MARGIN = 50
+# New events are laid out and painted together once per frame
+REFRESH_INTERVAL_MS = 16
+# Widths of at most this many new events are measured per refresh
+MEASURE_LIMIT = 2000
+
+DIRECTION_NAMES = ["TX", "RX", "EXT"]
+
+
+class DirectionCodes(dict):
+    def __missing__(self, name):
+        return 1  # shown as RX
+
+
+DIRECTION_CODES = DirectionCodes((name, code) for code, name in enumerate(DIRECTION_NAMES))
+# Lifelines: the host on the left, then one per port (or other source) in order of appearance
+HOST_LANE = "Host (PC)"
+DEFAULT_LANE = "Device"  # events that do not name their port
+EXTERNAL_LANE = "External command"
+MAX_LANES = 255
+# Events from different threads are held this long and released in timestamp order
+MERGE_WINDOW_SEC = 0.1
+DEFAULT_EVENT_BUDGET_MB = 32
+EVENT_OVERHEAD_BYTES = 64  # rough per-event cost of the arrays and list slots
+COMPACT_MIN_EVENTS = 4096
+# A full store drops this fraction of its budget more than needed, so it evicts every few batches
+EVICT_SLACK = 1 / 32
+DISPLAY_CACHE_SIZE = 4096
+# RX events are grouped into one row until the next TX or a gap this long (0: TX only)
+DEFAULT_COALESCE_IDLE_MS = 1000
+GROUP_TEXT_LEN = 40
+TOOLTIP_LINES = 20
+
+
+class ChartEventStore:
+    """
+    Always-on record of the TX/RX events the chart shows, kept while the chart is closed.
+    Each event belongs to a lane: the lifeline (port, external command) it is exchanged with.
+    Bounded by a byte budget and optionally by age; the oldest events are dropped first.
+    extend() runs on the GUI thread for every pipeline batch, so it appends whole columns per
+    batch; ANSI sequences are stripped and text lengths measured only when events are shown.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_EVENT_BUDGET_MB << 20, retention_sec=0):
+        self.budget_bytes = budget_bytes
+        self.retention_sec = retention_sec  # 0 keeps events until the budget runs out
+        self.clear()
+
+    def clear(self):
+        self.times = array('d')   # epoch seconds, non-decreasing
+        self.directions = bytearray()
+        self.lanes = bytearray()  # index into lane_names
+        self.lane_names = [HOST_LANE]
+        self._lane_index = {}     # frame lane name (None for DEFAULT_LANE) -> lane
+        self.texts = []           # message text as received, ANSI sequences included
+        self.raws = []            # bytes on the wire or None
+        self.start = 0            # list index of the oldest kept event; compacted now and then
+        self.dropped = 0          # events dropped so far; row + dropped is a stable event id
+        self.bytes = 0
+        self.max_chars = 0        # longest text, for the chart layout (see extents())
+        self.max_raw = 0          # longest payload in bytes, for the hex layout
+        self._measured = 0        # list index up to which max_chars/max_raw are measured
+        self._display = {}        # (event id, hex mode) -> elided display text of painted rows
+        self.annotations = {}     # event id -> note drawn under the arrow, e.g. a command's latency
+
+    def __len__(self):
+        return len(self.times) - self.start
+
+    def set_limits(self, budget_bytes, retention_sec):
+        self.budget_bytes = budget_bytes
+        self.retention_sec = retention_sec
+        if len(self):
+            self._evict()
+
+    def lane_of(self, name):
+        """Lane index for a lane name, adding a lifeline the first time it is seen"""
+        lane = self._lane_index.get(name)
+        if lane is None:
+            label = DEFAULT_LANE if name is None else name
+            if label in self.lane_names:
+                lane = self.lane_names.index(label)
+            elif len(self.lane_names) < MAX_LANES:
+                lane = len(self.lane_names)
+                self.lane_names.append(label)
+            else:
+                lane = MAX_LANES - 1
+            self._lane_index[name] = lane
+        return lane
+
+    def lifeline_names(self):
+        """Host first, then every lane seen; at least one device lifeline"""
+        return self.lane_names if len(self.lane_names) > 1 else [HOST_LANE, DEFAULT_LANE]
+
+    def extend(self, frames):
+        """Append RxFrame-like events (direction, text, raw, timestamp, lane)"""
+        if not frames:
+            return
+        times = self.times
+        last = times[-1] if len(times) > self.start else 0.0
+        stamps = [frame.timestamp for frame in frames]
+        if stamps[0] < last or stamps != sorted(stamps):
+            stamps = clamped(stamps, last)
+        texts = [frame.text for frame in frames]
+        raws = [frame.raw for frame in frames]
+        times.fromlist(stamps)
+        self.directions.extend(bytes(map(DIRECTION_CODES.__getitem__, [frame.direction for frame in frames])))
+        lane_names = [frame.lane for frame in frames]
+        if lane_names.count(lane_names[0]) == len(lane_names):
+            # A batch usually comes from one lane
+            self.lanes.extend(bytes((self.lane_of(lane_names[0]),)) * len(lane_names))
+        else:
+            try:
+                self.lanes.extend(bytes(map(self._lane_index.__getitem__, lane_names)))
+            except KeyError:
+                self.lanes.extend([self.lane_of(name) for name in lane_names])  # a new lifeline
+        self.texts.extend(texts)
+        self.raws.extend(raws)
+        self.bytes += events_size(texts, raws)
+        if self.bytes > self.budget_bytes or (
+                self.retention_sec and times[self.start] < stamps[-1] - self.retention_sec):
+            self._evict()
+
+    def extents(self):
+        """(longest text, longest payload in bytes), measuring the events added since the last call"""
+        end = len(self.texts)
+        first = max(self._measured, self.start)
+        if first < end:
+            texts = self.texts
+            raws = self.raws
+            self.max_chars = max(self.max_chars, max(map(len, islice(texts, first, end))))
+            self.max_raw = max(self.max_raw, max(len(raws[i]) if raws[i] is not None else len(texts[i])
+                                                 for i in range(first, end)))
+        self._measured = end
+        return self.max_chars, self.max_raw
+
+    def append(self, direction, text, timestamp, raw=None, lane=None):
+        self.extend([RxFrame(direction, text, raw, timestamp, lane)])
+
+    def prepend(self, events):
+        """Put older (timestamp, direction, text, raw, lane) events, e.g. from a restored session, first"""
+        kept = list(self.events())
+        annotations = {event_id - self.dropped + len(events): note for event_id, note in self.annotations.items()}
+        self.clear()
+        for batch in (events, kept):
+            self.extend([RxFrame(direction, text, raw, timestamp, lane)
+                         for timestamp, direction, text, raw, lane in batch])
+        for event_id, note in annotations.items():
+            self.annotate(event_id, note)
+
+    def copy(self, start_time=None, end_time=None):
+        """Detached store with the events from start_time to end_time, e.g. for a background export"""
+        first = self.start if start_time is None else bisect_left(self.times, start_time, self.start)
+        end = len(self.times) if end_time is None else max(first, bisect_right(self.times, end_time, self.start))
+        copy = ChartEventStore(budget_bytes=self.budget_bytes)
+        copy.times = self.times[first:end]
+        copy.directions = self.directions[first:end]
+        copy.lanes = self.lanes[first:end]
+        copy.lane_names = list(self.lane_names)
+        copy._lane_index = dict(self._lane_index)
+        copy.texts = self.texts[first:end]
+        copy.raws = self.raws[first:end]
+        copy.bytes = self.bytes
+        first_id = self.dropped + first - self.start
+        copy.annotations = {event_id - first_id: note for event_id, note in self.annotations.items()
+                            if first_id <= event_id < first_id + end - first}
+        return copy
+
+    def _evict(self):
+        times = self.times
+        texts = self.texts
+        raws = self.raws
+        first = start = self.start
+        end = len(times)
+        if self.retention_sec:
+            # Timestamps never decrease, so the events that are too old are one run at the head
+            start = max(start, min(end - 1, bisect_left(times, times[-1] - self.retention_sec, start)))
+            self.bytes -= events_size(texts[first:start], raws[first:start])
+        if self.bytes > self.budget_bytes:
+            target = self.budget_bytes * (1 - EVICT_SLACK)
+            while self.bytes > target and start < end - 1:
+                # Estimated from the average event size, checked again on the next pass
+                count = min(end - 1 - start, int((self.bytes - target) * (end - start) / self.bytes) + 1)
+                self.bytes -= events_size(texts[start:start + count], raws[start:start + count])
+                start += count
+        texts[first:start] = raws[first:start] = [None] * (start - first)
+        self.dropped += start - self.start
+        self.start = start
+        # Compact once the dropped head is as large as what is kept
+        if start > COMPACT_MIN_EVENTS and start * 2 > end:
+            del times[:start]
+            del self.directions[:start]
+            del self.lanes[:start]
+            del texts[:start]
+            del raws[:start]
+            self._measured = max(0, self._measured - start)
+            self.start = 0
+            if self.annotations:
+                self.annotations = {event_id: note for event_id, note in self.annotations.items()
+                                    if event_id >= self.dropped}
+
+    def annotate(self, event_id, note):
+        if event_id >= self.dropped:
+            self.annotations[event_id] = note
+
+    def annotation_at(self, row):
+        return self.annotations.get(self.dropped + row) if self.annotations else None
+
+    def time_at(self, row):
+        return self.times[self.start + row]
+
+    def direction_at(self, row):
+        return self.directions[self.start + row]
+
+    def lane_at(self, row):
+        return self.lanes[self.start + row]
+
+    def row_at_time(self, timestamp):
+        return bisect_left(self.times, timestamp, self.start) - self.start
+
+    def full_text(self, row, hex_mode):
+        index = self.start + row
+        text = self.texts[index]
+        if '\x1b' in text:
+            text = utils.strip_ansi(text)
+        if not hex_mode:
+            return text.strip()
+        data = self.raws[index]
+        if data is None:
+            data = text.strip().encode('utf-8', errors='replace')
+        return data.hex(' ').upper()
+
+    def display_text(self, row, hex_mode):
+        key = (self.dropped + row, hex_mode)
+        text = self._display.get(key)
+        if text is None:
+            text = self.full_text(row, hex_mode)
+            if len(text) > DISPLAY_TEXT_LEN:
+                text = text[:DISPLAY_TEXT_LEN] + "..."
+            if len(self._display) >= DISPLAY_CACHE_SIZE:
+                self._display.clear()
+            self._display[key] = text
+        return text
+
+    def events(self, last=None):
+        """(timestamp, direction, text without ANSI sequences, raw, lane name) of the kept events
+        (or the last ones), oldest first"""
+        first = self.start if last is None else max(self.start, len(self.times) - last)
+        lane_names = self.lane_names
+        for i in range(first, len(self.times)):
+            text = self.texts[i]
+            if '\x1b' in text:
+                text = utils.strip_ansi(text)
+            yield (self.times[i], DIRECTION_NAMES[self.directions[i]], text, self.raws[i],
+                   lane_names[self.lanes[i]])
+
+
+def events_size(texts, raws):
+    """Bytes accounted for events with these texts and payloads"""
+    return sum(map(len, texts)) + sum(map(len, filter(None, raws))) + EVENT_OVERHEAD_BYTES * len(texts)
+
+
+def clamped(stamps, last):
+    """Timestamps raised where needed so they never decrease, starting from last"""
+    result = []
+    for timestamp in stamps:
+        if timestamp < last:
+            timestamp = last
+        last = timestamp
+        result.append(timestamp)
+    return result
+
+
+class EventMerger:
+    """
+    Puts events from several threads (serial reader, TX logged on the GUI thread, external
+    command readers) back into timestamp order before they reach the store. Events are held
+    for window seconds, so one that was submitted late still lands in its place.
+    Each thread submits in order, so batches are kept as runs that are already sorted: a
+    batch continues the first run it does not go back in time from. Releasing cuts every run
+    at the cutoff and merges only the released parts; frames with the same timestamp keep
+    their order within a run.
+    """
+
+    def __init__(self, window=MERGE_WINDOW_SEC):
+        self.window = window
+        self.clear()
+
+    def __len__(self):
+        return self._count
+
+    def add(self, frames):
+        if not frames:
+            return
+        stamps = [frame.timestamp for frame in frames]
+        if stamps != sorted(stamps):
+            frames = sorted(frames, key=frame_timestamp)
+            stamps = [frame.timestamp for frame in frames]
+        first = stamps[0]
+        for run_times, run_frames in self.runs:
+            if run_times[-1] <= first:
+                run_times.extend(stamps)
+                run_frames.extend(frames)
+                break
+        else:
+            self.runs.append((stamps, list(frames)))
+        self._count += len(stamps)
+
+    def release(self, now=None):
+        """Held frames older than the window (all of them when now is None), oldest first"""
+        cutoff = None if now is None else now - self.window
+        released = []
+        runs = 0
+        for run_times, run_frames in self.runs:
+            count = len(run_times) if cutoff is None else bisect_right(run_times, cutoff)
+            if count:
+                released.extend(run_frames[:count])
+                del run_times[:count]
+                del run_frames[:count]
+                runs += 1
+        if not released:
+            return released
+        self.runs = [run for run in self.runs if run[0]]
+        self._count -= len(released)
+        if runs > 1:
+            # Sorted runs one after the other: the sort merges them in one pass
+            released.sort(key=frame_timestamp)
+        return released
+
+    def clear(self):
+        self.runs = []  # (timestamps, frames), each sorted
+        self._count = 0
+
+
+frame_timestamp = attrgetter("timestamp")
+
+
+class ChartRows:
+    """
+    Chart rows over a ChartEventStore: one per event, or with coalescing on, one per run of RX
+    events between two TX events (split further at idle gaps longer than idle_gap and where the
+    lane or direction changes). An expanded
+    group is a summary row followed by a row for each of its events.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.coalesce = False
+        self.idle_gap = DEFAULT_COALESCE_IDLE_MS / 1000
+        self.reset()
+
+    def reset(self):
+        """Group the whole store again"""
+        self.starts = array('q')  # event id of the first event of each group
+        self.head = 0             # groups before this index were dropped with their events
+        self.expanded = []        # start ids of expanded groups, sorted
+        self._summaries = {}      # (start id, size) -> (lines, bytes)
+        self._next_id = self.store.dropped
+        self._dropped = self.store.dropped
+        self._last_time = 0.0
+        self._last_direction = 0
+        self._last_lane = 0
+        self.update()
+
+    def update(self):
+        """Group events added since the last call; returns the number of rows dropped from the top"""
+        store = self.store
+        previous_first = self._dropped
+        self._dropped = store.dropped
+        if not self.coalesce:
+            return store.dropped - previous_first
+        dropped_rows = self._drop_groups(previous_first) if store.dropped != previous_first else 0
+        times = store.times
+        directions = store.directions
+        lanes = store.lanes
+        base = store.dropped - store.start  # event id of list index i is i + base
+        starts = self.starts
+        last_time = self._last_time
+        last_direction = self._last_direction
+        last_lane = self._last_lane
+        idle_gap = self.idle_gap
+        for i in range(max(self._next_id - base, store.start), len(times)):
+            timestamp = times[i]
+            direction = directions[i]
+            lane = lanes[i]
+            if (direction == 0 or direction != last_direction or lane != last_lane
+                    or (idle_gap and timestamp - last_time > idle_gap)):
+                starts.append(i + base)
+            last_direction = direction
+            last_lane = lane
+            last_time = timestamp
+        self._last_time = last_time
+        self._last_direction = last_direction
+        self._last_lane = last_lane
+        self._next_id = len(times) + base
+        return dropped_rows
+
+    def _drop_groups(self, previous_first):
+        starts = self.starts
+        first_id = self.store.dropped
+        head = self.head
+        dropped_rows = 0
+        while head + 1 < len(starts) and starts[head + 1] <= first_id:
+            if self.expanded and self.expanded[0] == starts[head]:
+                dropped_rows += starts[head + 1] - max(starts[head], previous_first)
+                self.expanded.pop(0)
+            head += 1
+            dropped_rows += 1
+        if head < len(starts) and self.expanded and self.expanded[0] == starts[head]:
+            # The first group lost some of its events
+            dropped_rows += max(0, first_id - max(starts[head], previous_first))
+        self.head = head
+        if head > COMPACT_MIN_EVENTS and head * 2 > len(starts):
+            del starts[:head]
+            self.head = 0
+        return dropped_rows
+
+    def _group_bounds(self, group):
+        """First and end event rows of a group (by index into starts)"""
+        store = self.store
+        first = max(self.starts[group], store.dropped) - store.dropped
+        end = (self.starts[group + 1] - store.dropped) if group + 1 < len(self.starts) else len(store)
+        return first, end
+
+    def __len__(self):
+        if not self.coalesce:
+            return len(self.store)
+        extra = 0
+        for start_id in self.expanded:
+            group = bisect_left(self.starts, start_id, self.head)
+            first, end = self._group_bounds(group)
+            extra += end - first
+        return len(self.starts) - self.head + extra
+
+    def locate(self, row):
+        """(group, event row) for a row: event row is None for a group's summary row"""
+        if not self.coalesce:
+            return None, row
+        extra = 0
+        for start_id in self.expanded:
+            group = bisect_left(self.starts, start_id, self.head)
+            summary_row = group - self.head + extra
+            if row < summary_row:
+                break
+            first, end = self._group_bounds(group)
+            if row <= summary_row + end - first:
+                return group, (first + row - summary_row - 1 if row > summary_row else None)
+            extra += end - first
+        group = row - extra + self.head
+        first, end = self._group_bounds(group)
+        return group, (first if end - first == 1 else None)
+
+    def row_of_event(self, event_row):
+        if not self.coalesce:
+            return event_row
+        event_id = event_row + self.store.dropped
+        group = max(self.head, bisect_left(self.starts, event_id + 1, self.head) - 1)
+        row = group - self.head
+        for start_id in self.expanded:
+            expanded_group = bisect_left(self.starts, start_id, self.head)
+            first, end = self._group_bounds(expanded_group)
+            if expanded_group < group:
+                row += end - first
+            elif expanded_group == group:
+                row += 1 + event_row - first
+        return row
+
+    def is_expanded(self, group):
+        start_id = self.starts[group]
+        i = bisect_left(self.expanded, start_id)
+        return i < len(self.expanded) and self.expanded[i] == start_id
+
+    def toggle(self, row):
+        """Expand or collapse the group at a row; False if the row is not a group"""
+        group, event_row = self.locate(row)
+        if group is None:
+            return False
+        first, end = self._group_bounds(group)
+        if end - first < 2:
+            return False
+        start_id = self.starts[group]
+        if self.is_expanded(group):
+            self.expanded.remove(start_id)
+        elif event_row is None:
+            insort(self.expanded, start_id)
+        else:
+            return False
+        return True
+
+    def summary(self, group):
+        """(lines, bytes) of a group"""
+        first, end = self._group_bounds(group)
+        key = (self.starts[group], end - first)
+        summary = self._summaries.get(key)
+        if summary is None:
+            store = self.store
+            size = 0
+            for i in range(store.start + first, store.start + end):
+                raw = store.raws[i]
+                size += len(raw) if raw is not None else len(
+                    utils.strip_ansi(store.texts[i]).encode('utf-8', errors='replace'))
+            summary = (end - first, size)
+            if len(self._summaries) >= DISPLAY_CACHE_SIZE:
+                self._summaries.clear()
+            self._summaries[key] = summary
+        return summary
+
+    def time_at(self, row):
+        return self.store.time_at(self._event_row(row))
+
+    def _event_row(self, row):
+        """The event of a row; a group's first event for its summary row"""
+        group, event_row = self.locate(row)
+        return event_row if event_row is not None else self._group_bounds(group)[0]
+
+    def direction_at(self, row):
+        return self.store.direction_at(self._event_row(row))
+
+    def lane_at(self, row):
+        return self.store.lane_at(self._event_row(row))
+
+    def annotation_at(self, row):
+        if not self.store.annotations:
+            return None
+        event_row = self.locate(row)[1]
+        return self.store.annotation_at(event_row) if event_row is not None else None
+
+    def display_text(self, row, hex_mode):
+        group, event_row = self.locate(row)
+        if event_row is not None:
+            return self.store.display_text(event_row, hex_mode)
+        lines, size = self.summary(group)
+        text = self.store.full_text(self._group_bounds(group)[0], hex_mode)
+        if len(text) > GROUP_TEXT_LEN:
+            text = text[:GROUP_TEXT_LEN] + "..."
+        marker = "\u25be" if self.is_expanded(group) else "\u25b8"
+        return f"{marker} {text}  [{lines:,} lines, {size:,} bytes]"
+
+    def full_text(self, row, hex_mode):
+        group, event_row = self.locate(row)
+        if event_row is not None:
+            return self.store.full_text(event_row, hex_mode)
+        first, end = self._group_bounds(group)
+        lines, size = self.summary(group)
+        text = "\n".join(self.store.full_text(i, hex_mode) for i in range(first, min(end, first + TOOLTIP_LINES)))
+        if lines > TOOLTIP_LINES:
+            text += "\n..."
+        return f"{text}\n[{lines:,} lines, {size:,} bytes; double-click to expand]"
+
+    def row_at_time(self, timestamp):
+        return self.row_of_event(min(self.store.row_at_time(timestamp), len(self.store) - 1))
+
+
+def lifeline_positions(text_width, view_width, count=2):
+    """x of count lifelines, host first, for messages up to text_width pixels wide"""
+    target_gap = max(MIN_GAP, text_width + 100)
+    total = target_gap * (count - 1)
+    left = view_width / 2 - total / 2 if total + 2 * MIN_MARGIN <= view_width else MIN_MARGIN
+    return [left + i * target_gap for i in range(count)]
+
+
+def paint_lifelines(painter, xs, top, bottom, color):
+    pen = QPen(color)
+    pen.setWidth(2)
+    painter.setPen(pen)
+    for x in xs:
+        painter.drawLine(QPointF(x, top), QPointF(x, bottom))
+
+
+def paint_lifeline_labels(painter, font, xs, names, color):
+    painter.setFont(font)
+    painter.setPen(color)
+    metrics = QFontMetrics(font)
+    for x, label in zip(xs, names):
+        painter.drawText(QPointF(x - metrics.horizontalAdvance(label) / 2, metrics.ascent() + 2), label)
+
+
+def paint_rows(painter, rows, first, last, xs, fonts, colors, hex_mode):
+    """
+    Arrows, texts, notes and time labels of rows first..last-1 (a ChartRows) at their chart
+    y coordinates, between the host lifeline xs[0] and the lifeline of each row's lane; returns
+    the width of the widest text painted. Also used off the GUI thread by the chart export, on
+    its own painter and rows.
+    """
+    text_font, time_font = fonts
+    _, tx_color, rx_color, time_color = colors
+    host_x = xs[0]
+    right_x = xs[-1]
+    metrics = QFontMetrics(text_font)
+    time_metrics = QFontMetrics(time_font)
+    widest = 0
+    for i in range(first, last):
+        y = TOP_Y + i * STEP_Y
+        lane = min(rows.lane_at(i), len(xs) - 1)
+        lane_x = xs[lane]
+        # Text between the lane and its left neighbour, where the layout left room for it
+        center_x = (xs[lane - 1] + lane_x) / 2.0
+        if rows.direction_at(i) == 0:  # TX: host -> device
+            start_x, end_x, color, head = host_x, lane_x, tx_color, -ARROW_SIZE
+        else:
+            start_x, end_x, color, head = lane_x, host_x, rx_color, ARROW_SIZE
+        painter.setPen(QPen(color, 1))
+        painter.drawLine(QPointF(start_x, y), QPointF(end_x, y))
+        painter.setBrush(color)
+        painter.drawPolygon(QPolygonF([QPointF(end_x, y), QPointF(end_x + head, y - ARROW_SIZE / 3),
+                                       QPointF(end_x + head, y + ARROW_SIZE / 3)]))
+        painter.setBrush(Qt.NoBrush)
+
+        painter.setFont(text_font)
+        text = rows.display_text(i, hex_mode)
+        width = metrics.horizontalAdvance(text)
+        painter.drawText(QPointF(center_x - width / 2.0, y - 6), text)
+        if width > widest:
+            widest = width
+
+        painter.setFont(time_font)
+        painter.setPen(time_color)
+        note = rows.annotation_at(i)
+        if note:
+            painter.drawText(QPointF(center_x - time_metrics.horizontalAdvance(note) / 2.0,
+                                     y + time_metrics.ascent() + 3), note)
+        stamp = utils.format_timestamp(rows.time_at(i))
+        painter.drawText(QPointF(host_x - 8 - time_metrics.horizontalAdvance(stamp), y + time_metrics.ascent() / 2), stamp)
+        painter.drawText(QPointF(right_x + 8, y + time_metrics.ascent() / 2), stamp)
+    return widest
+
+
 class SequenceChartWindow(QMainWindow):
-    def __init__(self, parent=None):
+    def __init__(self, store=None, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Sequence Chart")
         self.resize(700, 800)
-        
+
         toolbar = self.addToolBar("Main")
-        save_btn = QPushButton("Save as PDF")
-        save_btn.clicked.connect(self.save_as_pdf)
-        toolbar.addWidget(save_btn)
-        
+        export_btn = QPushButton("Export...")
+        export_btn.setToolTip("Save a time range as PDF, SVG, CSV or JSONL")
+        export_btn.clicked.connect(self.show_export_dialog)
+        toolbar.addWidget(export_btn)
+
         self.hex_btn = QPushButton("HEX")
         self.hex_btn.setCheckable(True)
         self.hex_btn.clicked.connect(self.toggle_hex_mode)
         toolbar.addWidget(self.hex_btn)
-        
-        self.chart_widget = SequenceChartWidget()
+
+        self.group_btn = QPushButton("Group RX")
+        self.group_btn.setCheckable(True)
+        self.group_btn.setToolTip("Show the RX between two commands (or until an idle gap) as one message; "
+                                  "double-click a group to expand it")
+        self.group_btn.clicked.connect(self.toggle_coalesce)
+        toolbar.addWidget(self.group_btn)
+
+        self.chart_widget = SequenceChartWidget(store)
         self.setCentralWidget(self.chart_widget)
         self.last_save_dir = os.path.expanduser("~")
 
-    def add_message(self, direction, message, timestamp=None):
-        self.chart_widget.add_message(direction, message, timestamp)
+    def add_message(self, direction, message, timestamp=None, raw=None):
+        self.chart_widget.add_message(direction, message, timestamp, raw)
 
     def clear(self):
         self.chart_widget.clear()
 
-    def showEvent(self, event):
-        super().showEvent(event)
-        try:
-            QTimer.singleShot(0, self.chart_widget.initial_layout)
-        except Exception:
-            pass
+    def scroll_to_time(self, timestamp):
+        self.chart_widget.scroll_to_time(timestamp)
 
     def toggle_hex_mode(self, checked):
         self.chart_widget.set_hex_mode(checked)
 
-    def save_as_pdf(self):
-        if not os.path.exists(self.last_save_dir):
-            self.last_save_dir = os.path.expanduser("~")
-
-        timestamp = datetime.now().strftime("%m%d_%H%M%S")
-        default_name = f"sequence_chart_{timestamp}.pdf"
-        default_path = os.path.join(self.last_save_dir, default_name)
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Save as PDF", default_path, "PDF Files (*.pdf)"
-        )
-        if not file_path:
-            return
-        self.last_save_dir = os.path.dirname(file_path)
-
-        # Save current colors to restore later
-        restore_items = []
-        for msg in self.chart_widget.messages:
-            # Text
-            text_item = msg['text_item']
-            old_text_color = text_item.defaultTextColor()
-            text_item.setDefaultTextColor(Qt.black)
-            
-            # Line
-            line_item = msg['line_item']
-            old_line_pen = line_item.pen()
-            new_line_pen = QPen(Qt.black)
-            new_line_pen.setWidth(old_line_pen.width())
-            line_item.setPen(new_line_pen)
-
-            # Arrow
-            arrow_item = msg['arrow_item']
-            old_arrow_pen = arrow_item.pen()
-            old_arrow_brush = arrow_item.brush()
-            
-            new_arrow_pen = QPen(Qt.black)
-            new_arrow_pen.setWidth(old_arrow_pen.width())
-            arrow_item.setPen(new_arrow_pen)
-            arrow_item.setBrush(Qt.black)
-            
-            restore_items.append({
-                'text_item': text_item,
-                'old_text_color': old_text_color,
-                'line_item': line_item,
-                'old_line_pen': old_line_pen,
-                'arrow_item': arrow_item,
-                'old_arrow_pen': old_arrow_pen,
-                'old_arrow_brush': old_arrow_brush,
-            })
-
-        try:
-            writer = QPdfWriter(file_path)
-            writer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
-            writer.setResolution(300)
-            writer.setCreator("Sequence Chart")
-            writer.setTitle("Sequence Chart")
-            
-            painter = QPainter(writer)
-            
-            scene = self.chart_widget.scene
-            scene_rect = scene.sceneRect()
-            
-            layout = writer.pageLayout()
-            page_rect = layout.paintRectPixels(writer.resolution())
-            
-            margin = 20
-            available_width = page_rect.width() - 2 * margin
-            available_height = page_rect.height() - 2 * margin
-            
-            scale = available_width / scene_rect.width()
-            scene_page_height = available_height / scale
-            
-            y_pos = 0
-            while y_pos < scene_rect.height():
-                if y_pos > 0:
-                    writer.newPage()
-                
-                source_rect = QRectF(
-                    scene_rect.x(), scene_rect.y() + y_pos, 
-                    scene_rect.width(), min(scene_page_height, scene_rect.height() - y_pos)
-                )
-                target_height = source_rect.height() * scale
-                target_rect = QRectF(margin, margin, available_width, target_height)
-                
-                scene.render(painter, target_rect, source_rect)
-                y_pos += scene_page_height
-                
-            painter.end()
-            QMessageBox.information(self, "Success", f"Saved to {file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to save PDF: {e}")
-        finally:
-            # Restore colors
-            for item in restore_items:
-                item['text_item'].setDefaultTextColor(item['old_text_color'])
-                item['line_item'].setPen(item['old_line_pen'])
-                item['arrow_item'].setPen(item['old_arrow_pen'])
-                item['arrow_item'].setBrush(item['old_arrow_brush'])
-
-class SequenceChartWidget(QWidget):
-    def __init__(self, parent=None):
+    def toggle_coalesce(self, checked):
+        self.chart_widget.set_coalesce(checked, self.chart_widget.rows.idle_gap)
+
+    def set_coalesce(self, enabled, idle_gap):
+        self.group_btn.setChecked(enabled)
+        self.chart_widget.set_coalesce(enabled, idle_gap)
+
+    def show_export_dialog(self):
+        from chart_export import ChartExportDialog  # chart_export builds on this module
+        dialog = ChartExportDialog(self.chart_widget, self.last_save_dir, self)
+        dialog.exec()
+        self.last_save_dir = dialog.last_save_dir
+
+
+class SequenceChartWidget(QAbstractScrollArea):
+    """
+    Message chart over a ChartEventStore that paints only the rows in view: the host lifeline
+    and one lifeline per lane (port, external command) seen.
+    Layout depends on the widest message seen so far, not on the message count.
+    """
+
+    def __init__(self, store=None, parent=None):
         super().__init__(parent)
-        self.layout = QVBoxLayout(self)
-        self.view = QGraphicsView()
-        self.scene = QGraphicsScene()
-        self.view.setScene(self.scene)
-        self.view.setRenderHint(QPainter.Antialiasing)
-        self.view.setAlignment(Qt.AlignLeft | Qt.AlignTop)
-        self.layout.addWidget(self.view)
-        
-        self.host_x = 100
-        self.device_x = 300
-        self.current_y = 50
-        self.step_y = 40
-
-        self.host_line = None
-        self.device_line = None
-
-        self.messages = []
+        self.model = store if store is not None else ChartEventStore()
+        self.rows = ChartRows(self.model)
         self.hex_mode = False
-
-        self.setup_chart()
-        self.recalculate_layout()
         self.auto_scroll = True
-        try:
-            self.view.verticalScrollBar().valueChanged.connect(self._on_vscroll)
-        except Exception:
-            pass
-            
+        self.lane_xs = [100, 300]  # x of each lifeline, host first
+
+        self.text_font = QFont(self.font())
+        self.text_font.setPointSize(11)
+        self.time_font = QFont(self.font())
+        self.time_font.setPointSize(8)
+        self.label_font = QFont(self.font())
+        self.text_metrics = QFontMetrics(self.text_font)
+        self.hex_char_width = max(self.text_metrics.horizontalAdvance(c) for c in "0123456789ABCDEF ")
+        # Widest display text in pixels; hex text is measured from its length
+        self.max_text_width = 0
+        self.max_group_width = 0  # widest group row painted so far
+        self._seen_id = 0     # event id up to which widths were measured
+        self._dropped_seen = 0
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.verticalScrollBar().setSingleStep(STEP_Y // 2)
+        self.verticalScrollBar().valueChanged.connect(self._on_vscroll)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+        self.viewport().setMouseTracking(True)
+        self.reset_view()
+
     def set_hex_mode(self, enabled):
         self.hex_mode = enabled
         self.recalculate_layout()
 
-    def _to_hex(self, text):
-        return ' '.join(f"{ord(c):02X}" for c in text)
-        
-    def setup_chart(self):
-        # Determine colors based on background brightness
-        bg_color = self.view.palette().color(QPalette.Base)
-        is_light_bg = bg_color.lightness() > 128
-        line_color = QColor(60, 60, 60) if is_light_bg else Qt.white
-
-        # Draw initial vertical lines
-        pen = QPen(line_color)
-        pen.setWidth(2)
-        
-        # Host Line
-        self.host_line = self.scene.addLine(self.host_x, 20, self.host_x, 100, pen)
-        self.host_label = self.scene.addText("Host (PC)")
-        self.host_label.setDefaultTextColor(line_color)
-        self.host_label.setPos(self.host_x - self.host_label.boundingRect().width() / 2, 0)
-        self.device_line = self.scene.addLine(self.device_x, 20, self.device_x, 100, pen)
-        self.device_label = self.scene.addText("Device")
-        self.device_label.setDefaultTextColor(line_color)
-        self.device_label.setPos(self.device_x - self.device_label.boundingRect().width() / 2, 0)
-        self.scene.setSceneRect(0, 0, 800, 150)
-        
-    def add_message(self, direction, message, timestamp=None):
-        # Extend vertical lines if needed
-        if self.current_y > self.host_line.line().y2() - 50:
-            new_y2 = self.current_y + 50
-            self.host_line.setLine(self.host_x, 20, self.host_x, new_y2)
-            self.device_line.setLine(self.device_x, 20, self.device_x, new_y2)
-            self.scene.setSceneRect(0, 0, self.scene.sceneRect().width(), new_y2 + 50)
-
-        # Add timestamps
-        if timestamp:
-            current_time = timestamp
-        else:
-            current_time = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        
-        # Time on left of Host
-        time_text_left = self.scene.addText(current_time)
-        time_text_left.setDefaultTextColor(Qt.gray)
-        font = time_text_left.font()
-        font.setPointSize(8)
-        time_text_left.setFont(font)
-        time_text_left.setPos(self.host_x - 75, self.current_y - 10)
-        
-        # Time on right of Device
-        time_text_right = self.scene.addText(current_time)
-        time_text_right.setDefaultTextColor(Qt.gray)
-        time_text_right.setFont(font)
-        time_text_right.setPos(self.device_x + 5, self.current_y - 10)
-
-        pen = QPen(Qt.black)
-        pen.setWidth(1)
-        
-        # Determine colors based on background brightness
-        bg_color = self.view.palette().color(QPalette.Base)
-        is_light_bg = bg_color.lightness() > 128
-
-        if direction == "TX": # Host -> Device
-            start_x = self.host_x
-            end_x = self.device_x
-            color = QColor("darkgreen") if is_light_bg else QColor("lightgreen")
-        else: # Device -> Host
-            start_x = self.device_x
-            end_x = self.host_x
-            color = Qt.black if is_light_bg else QColor("white")
-            
-        pen.setColor(color)
-        
-        # Draw arrow line
-        line = self.scene.addLine(start_x, self.current_y, end_x, self.current_y, pen)
-        
-        # Draw arrow head
-        arrow_path = QPainterPath()
-        arrow_size = 10
-        if direction == "TX":
-            arrow_path.moveTo(end_x, self.current_y)
-            arrow_path.lineTo(end_x - arrow_size, self.current_y - arrow_size / 3)
-            arrow_path.lineTo(end_x - arrow_size, self.current_y + arrow_size / 3)
-            arrow_path.closeSubpath()
+    def set_coalesce(self, enabled, idle_gap):
+        rows = self.rows
+        if enabled == rows.coalesce and idle_gap == rows.idle_gap:
+            return
+        anchor = None
+        if not self.auto_scroll and len(rows):
+            anchor = rows.time_at(self._row_range(self.verticalScrollBar().value(), 0)[0])
+        rows.coalesce = enabled
+        rows.idle_gap = idle_gap
+        rows.reset()
+        self.max_group_width = 0
+        self.recalculate_layout()
+        bar = self.verticalScrollBar()
+        if anchor is None:
+            bar.setValue(bar.maximum())
         else:
-            arrow_path.moveTo(end_x, self.current_y)
-            arrow_path.lineTo(end_x + arrow_size, self.current_y - arrow_size / 3)
-            arrow_path.lineTo(end_x + arrow_size, self.current_y + arrow_size / 3)
-            arrow_path.closeSubpath()
-            
-        arrow_item = self.scene.addPath(arrow_path, pen, color)
-        
-        # Draw text
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        full_msg = ansi_escape.sub('', message).strip()
-        
-        target_text = full_msg
-        if self.hex_mode:
-            target_text = self._to_hex(full_msg)
-
-        display_msg = target_text
-        if len(target_text) > DISPLAY_TEXT_LEN:
-            display_msg = target_text[:DISPLAY_TEXT_LEN] + "..."
-
-        text_item = self.scene.addText(display_msg)
-        text_item.setDefaultTextColor(color)
-        font = text_item.font()
-        font.setPointSize(11)
-        text_item.setFont(font)
-        text_item.setToolTip(target_text)
-
-        fm = QFontMetrics(text_item.font())
-        text_width = fm.horizontalAdvance(display_msg)
-        center_x = (self.host_x + self.device_x) / 2.0
-        text_item.setPos(center_x - text_width / 2.0, self.current_y - 20)
-
-        msg = {
-            'direction': direction,
-            'y': self.current_y,
-            'line_item': line,
-            'arrow_item': arrow_item,
-            'text_item': text_item,
-            'time_left': time_text_left,
-            'time_right': time_text_right,
-            'color': color,
-            'full_text': full_msg,
-        }
-        self.messages.append(msg)
-
-        self.current_y += self.step_y
-        
-        current_gap = abs(self.device_x - self.host_x)
-        if text_width + 100 > current_gap:
+            # Keep the first row in view where it was
+            bar.setValue(TOP_Y + rows.row_at_time(anchor) * STEP_Y - STEP_Y)
+
+    def add_message(self, direction, message, timestamp=None, raw=None):
+        if not isinstance(timestamp, (int, float)):
+            timestamp = time.time()
+        self.model.append(direction, message, float(timestamp), raw)
+        self.events_added()
+
+    def events_added(self):
+        """The store has new events; they are laid out and painted on the next frame"""
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def reset_view(self):
+        """Lay out the whole store again, e.g. when the chart opens on a store that kept recording"""
+        model = self.model
+        # Estimated from the longest text; exact widths are measured for events added from now on
+        chars = min(model.extents()[0], DISPLAY_TEXT_LEN + 3)
+        self.max_text_width = chars * self.text_metrics.averageCharWidth()
+        self._seen_id = model.dropped + len(model)
+        self._dropped_seen = model.dropped
+        self.rows.reset()
+        self.max_group_width = 0
+        self.auto_scroll = True
+        self.recalculate_layout()
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
+    def refresh(self):
+        """Apply events added since the last frame with one layout and scrollbar update"""
+        self._refresh_timer.stop()
+        model = self.model
+        end_id = model.dropped + len(model)
+        if end_id < self._seen_id or model.dropped < self._dropped_seen:
+            self.reset_view()  # cleared
+            return
+        first_id = max(self._seen_id, end_id - MEASURE_LIMIT, model.dropped)
+        metrics = self.text_metrics
+        widest = self.max_text_width
+        for row in range(first_id - model.dropped, end_id - model.dropped):
+            width = metrics.horizontalAdvance(model.display_text(row, False))
+            if width > widest:
+                widest = width
+        self._seen_id = end_id
+        # Keep the rows in view in place when old events are dropped from the top
+        dropped = self.rows.update()
+        self._dropped_seen = model.dropped
+        bar = self.verticalScrollBar()
+        if dropped and not self.auto_scroll:
+            bar.setValue(max(0, bar.value() - dropped * STEP_Y))
+        if widest != self.max_text_width or self.hex_mode or len(self.lane_xs) != len(model.lifeline_names()):
+            self.max_text_width = widest
             self.recalculate_layout()
-
-        # Auto scroll to bottom only when enabled (user hasn't scrolled away)
+        else:
+            self.update_scrollbars()
         if self.auto_scroll:
-            try:
-                sb = self.view.verticalScrollBar()
-                sb.setValue(sb.maximum())
-                self.view.ensureVisible((self.host_x + self.device_x) / 2.0, self.current_y, 1, 1)
-                self.view.viewport().update()
-            except Exception:
-                self.view.ensureVisible(0, self.current_y, 1, 1)
+            bar.setValue(bar.maximum())
+        self.viewport().update()
 
     def clear(self):
-        self.scene.clear()
-        self.messages = []
-        self.current_y = 50
-        self.setup_chart()
-        self.scene.setSceneRect(0, 0, 500, 150)
-        self.view.verticalScrollBar().setValue(0)
-
-    def update_positions(self):
-        """Update positions of all items based on current host_x and device_x."""
-
-        host_y2 = self.host_line.line().y2()
-        self.host_line.setLine(self.host_x, 20, self.host_x, host_y2)
-        self.device_line.setLine(self.device_x, 20, self.device_x, host_y2)
-
-        if hasattr(self, 'host_label') and self.host_label:
-            self.host_label.setPos(self.host_x - self.host_label.boundingRect().width() / 2, 0)
-        if hasattr(self, 'device_label') and self.device_label:
-            self.device_label.setPos(self.device_x - self.device_label.boundingRect().width() / 2, 0)
-
-        self.scene.setSceneRect(0, 0, max(self.view.viewport().width(), self.device_x + 200), host_y2 + 50)
-
-        self._update_message_positions()
-
-    def _update_message_positions(self):
-        fm_cache = {}
-        for msg in self.messages:
-            y = msg['y']
-            direction = msg['direction']
-            color = msg.get('color', QColor('white'))
-            if direction == 'TX':
-                start_x = self.host_x
-                end_x = self.device_x
-            else:
-                start_x = self.device_x
-                end_x = self.host_x
-
-            line_item = msg['line_item']
-            line_item.setLine(start_x, y, end_x, y)
-            # Update arrow path
-            arrow_path = QPainterPath()
-            arrow_size = 10
-            if direction == 'TX':
-                arrow_path.moveTo(end_x, y)
-                arrow_path.lineTo(end_x - arrow_size, y - arrow_size / 3)
-                arrow_path.lineTo(end_x - arrow_size, y + arrow_size / 3)
-                arrow_path.closeSubpath()
-            else:
-                arrow_path.moveTo(end_x, y)
-                arrow_path.lineTo(end_x + arrow_size, y - arrow_size / 3)
-                arrow_path.lineTo(end_x + arrow_size, y + arrow_size / 3)
-                arrow_path.closeSubpath()
-            msg['arrow_item'].setPath(arrow_path)
-            # Update timestamps
-            if msg.get('time_left'):
-                msg['time_left'].setPos(self.host_x - 75, y - 10)
-            if msg.get('time_right'):
-                msg['time_right'].setPos(self.device_x + 5, y - 10)
-            # Update text position and elide if needed
-            text_item = msg['text_item']
-            full_text = msg.get('full_text', text_item.toPlainText())
-            
-            target_text = full_text
-            if self.hex_mode:
-                target_text = self._to_hex(full_text)
-            
-            display_text = target_text
-            if len(target_text) > DISPLAY_TEXT_LEN:
-                display_text = target_text[:DISPLAY_TEXT_LEN] + "...              "
-            
-            if text_item.toPlainText() != display_text:
-                text_item.setPlainText(display_text)
-                text_item.setToolTip(target_text)
-                
-            font = text_item.font() 
-            key = (font.toString())
-            if key not in fm_cache:
-                fm_cache[key] = QFontMetrics(font)
-            fm = fm_cache[key]
-            
-            tw = fm.horizontalAdvance(display_text)
-            center_x = (self.host_x + self.device_x) / 2.0
-            text_item.setPos(center_x - tw / 2.0, y - 20)
+        self.model.clear()
+        self.reset_view()
 
-    def resizeEvent(self, event):
-        self.recalculate_layout()
-        super().resizeEvent(event)
+    def events(self):
+        return self.model.events()
 
-    def initial_layout(self):
-        self.recalculate_layout()
-        try:
-            self.view.viewport().update()
-        except Exception:
-            pass
+    def scroll_to_time(self, timestamp):
+        """Center the view on the first message at or after the given epoch timestamp"""
+        self.refresh()
+        if not len(self.model):
+            return
+        index = self.rows.row_at_time(timestamp)
+        self.auto_scroll = False
+        bar = self.verticalScrollBar()
+        bar.setValue(int(TOP_Y + index * STEP_Y - self.viewport().height() / 2))
+
+    def content_width(self):
+        return max(self.viewport().width(), self.lane_xs[-1] + RIGHT_MARGIN)
+
+    def content_height(self):
+        return TOP_Y + len(self.rows) * STEP_Y + BOTTOM_MARGIN
 
     def recalculate_layout(self):
-        view_w = self.view.viewport().width()
-        if view_w <= 0:
-            view_w = self.width()
+        view_w = self.viewport().width()
         if view_w <= 0:
             view_w = 600
-            
-        max_text_w = 0
-        default_fm = QFontMetrics(QFont())
-        for msg in self.messages:
-            full_text = msg.get('full_text', '')
-            
-            target_text = full_text
-            if self.hex_mode:
-                target_text = self._to_hex(full_text)
-            
-            text = target_text
-            if len(target_text) > DISPLAY_TEXT_LEN:
-                text = target_text[:DISPLAY_TEXT_LEN] + "..."
-
-            if 'text_item' in msg:
-                fm = QFontMetrics(msg['text_item'].font())
-                w = fm.horizontalAdvance(text)
-            else:
-                w = default_fm.horizontalAdvance(text)
-            if w > max_text_w:
-                max_text_w = w
-        
-        target_gap = max(200, max_text_w + 100)
-        min_margin = 50
-        
-        if target_gap + 2 * min_margin <= view_w:
-            center_x = view_w / 2
-            self.host_x = center_x - target_gap / 2
-            self.device_x = center_x + target_gap / 2
+        if self.hex_mode:
+            text_width = min(self.model.extents()[1] * 3 - 1, DISPLAY_TEXT_LEN + 3) * self.hex_char_width
         else:
-            self.host_x = min_margin
-            self.device_x = min_margin + target_gap
-        
-        self.update_positions()
+            text_width = self.max_text_width
+        if self.rows.coalesce:
+            text_width = max(text_width, self.max_group_width)
+        self.lane_xs = lifeline_positions(text_width, view_w, len(self.model.lifeline_names()))
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def update_scrollbars(self):
+        vbar = self.verticalScrollBar()
+        height = self.viewport().height()
+        vbar.setPageStep(height)
+        vbar.setRange(0, max(0, self.content_height() - height))
+        hbar = self.horizontalScrollBar()
+        width = self.viewport().width()
+        hbar.setPageStep(width)
+        hbar.setRange(0, max(0, int(self.content_width() - width)))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.recalculate_layout()
 
     def _on_vscroll(self, value):
-        """Called when the user scrolls the view. If scrollbar is at bottom, enable auto-scroll; otherwise disable it."""
-        sb = self.view.verticalScrollBar()
-        try:
-            if value >= sb.maximum():
-                self.auto_scroll = True
+        """At the bottom new messages keep the view scrolled down; anywhere else it stays put"""
+        self.auto_scroll = value >= self.verticalScrollBar().maximum()
+        self.viewport().update()
+
+    def theme_colors(self):
+        """(lifeline, tx, rx, time) colors for the current background"""
+        is_light_bg = self.palette().color(QPalette.Base).lightness() > 128
+        if is_light_bg:
+            return QColor(60, 60, 60), QColor("darkgreen"), QColor(Qt.black), QColor(Qt.gray)
+        return QColor(Qt.white), QColor("lightgreen"), QColor(Qt.white), QColor(Qt.gray)
+
+    def _row_range(self, top, bottom):
+        first = max(0, int((top - TOP_Y - STEP_Y) // STEP_Y))
+        last = min(len(self.rows), int((bottom - TOP_Y + STEP_Y) // STEP_Y) + 1)
+        return first, last
+
+    def paint_chart(self, painter, top, bottom, colors):
+        """Lifelines and the message rows between chart y coordinates top and bottom"""
+        paint_lifelines(painter, self.lane_xs, max(20, top), min(bottom, self.content_height()), colors[0])
+        first, last = self._row_range(top, bottom)
+        widest = paint_rows(painter, self.rows, first, last, self.lane_xs,
+                            (self.text_font, self.time_font), colors, self.hex_mode)
+        if widest > self.max_group_width and self.rows.coalesce:
+            # Group rows are measured when painted; widen the layout on the next frame
+            self.max_group_width = widest
+            QTimer.singleShot(0, self.recalculate_layout)
+
+    def paint_header(self, painter, color):
+        paint_lifeline_labels(painter, self.label_font, self.lane_xs, self.model.lifeline_names(), color)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setRenderHint(QPainter.Antialiasing)
+        colors = self.theme_colors()
+        top = self.verticalScrollBar().value()
+        left = self.horizontalScrollBar().value()
+        painter.translate(-left, -top)
+        self.paint_chart(painter, top, top + self.viewport().height(), colors)
+        # Labels stay on top while scrolling
+        painter.resetTransform()
+        painter.fillRect(0, 0, self.viewport().width(), HEADER_HEIGHT, self.palette().color(QPalette.Base))
+        painter.translate(-left, 0)
+        self.paint_header(painter, colors[0])
+
+    def row_at(self, pos):
+        """Index of the message whose arrow or text is at a viewport position, or -1"""
+        y = pos.y() + self.verticalScrollBar().value()
+        index = round((y - TOP_Y) / STEP_Y)
+        if index < 0 or index >= len(self.rows) or abs(TOP_Y + index * STEP_Y - y) > STEP_Y / 2:
+            return -1
+        return index
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.ToolTip:
+            index = self.row_at(event.pos())
+            if index >= 0:
+                QToolTip.showText(event.globalPos(), self.rows.full_text(index, self.hex_mode), self.viewport())
             else:
-                self.auto_scroll = False
-        except Exception:
-            self.auto_scroll = False
+                QToolTip.hideText()
+            return True
+        return super().viewportEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        index = self.row_at(event.pos())
+        if index >= 0 and self.rows.toggle(index):
+            self.update_scrollbars()
+            self.viewport().update()
+            return
+        super().mouseDoubleClickEvent(event)
 
     def changeEvent(self, event):
         if event.type() == QEvent.PaletteChange or event.type() == QEvent.StyleChange:
-            self.update_colors()
+            self.viewport().update()
         super().changeEvent(event)
-
-    def update_colors(self):
-        bg_color = self.view.palette().color(QPalette.Base)
-        is_light_bg = bg_color.lightness() > 128
-        
-        line_color = QColor(60, 60, 60) if is_light_bg else Qt.white
-        
-        # Update vertical lines
-        if self.host_line:
-            pen = self.host_line.pen()
-            pen.setColor(line_color)
-            self.host_line.setPen(pen)
-        if self.device_line:
-            pen = self.device_line.pen()
-            pen.setColor(line_color)
-            self.device_line.setPen(pen)
-            
-        if hasattr(self, 'host_label') and self.host_label:
-            self.host_label.setDefaultTextColor(line_color)
-        if hasattr(self, 'device_label') and self.device_label:
-            self.device_label.setDefaultTextColor(line_color)
-        
-        for msg in self.messages:
-            direction = msg['direction']
-            if direction == "TX":
-                new_color = QColor("darkgreen") if is_light_bg else QColor("lightgreen")
-            else:
-                new_color = Qt.black if is_light_bg else QColor("white")
-            
-            msg['color'] = new_color
-            
-            # Update Line
-            pen = msg['line_item'].pen()
-            pen.setColor(new_color)
-            msg['line_item'].setPen(pen)
-            
-            # Update Arrow
-            pen = msg['arrow_item'].pen()
-            pen.setColor(new_color)
-            msg['arrow_item'].setPen(pen)
-            msg['arrow_item'].setBrush(new_color)
-            
-            # Update Text
-            msg['text_item'].setDefaultTextColor(new_color)
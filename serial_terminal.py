@@ -4,6 +4,7 @@ import serial
 import threading
 import time
 import re
+import codecs
 import subprocess
 from datetime import datetime
 from PySide6.QtWidgets import (
@@ -12,11 +13,29 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QIcon, QFont, QAction, QGuiApplication, QRegularExpressionValidator
 from PySide6.QtCore import Signal, Qt, QEvent, QTimer, QRegularExpression, QSize
 import utils
-from terminal_widget import TerminalWidget
+from terminal_widget import TerminalWidget, DIRECTION_RX, DIRECTION_TX, DIRECTION_EXTERNAL, DEFAULT_ADAPTIVE_THRESHOLD
+from screen_grid import ScreenGridWidget, SCREEN_ENTER_PATTERN, SCREEN_EXIT_PATTERN
+from hex_view import RawByteStore, HexDumpWidget
+from framers import LineFramer, create_framer, framing_settings
+from rx_pipeline import RxPipeline, RxFrame, CallbackSink, TERMINAL_SINK_QUEUE
+from external_command import ExternalCommand
+from port_server import PortShareServer, PortShareDialog
+from control_api import ControlServer, RpcError, NOT_CONNECTED, CONNECT_FAILED, INVALID_PARAMS
+from session_replay import SessionRecorder, SessionReplay, ReplayReport, FrameTimer, CAPTURE_FILTER, REPLAY_SPEEDS
+from macro_recorder import MacroRecorder, MacroReviewDialog
+from throughput_test import ThroughputTestDialog
+from latency_stats import LatencyTracker, LatencyStatsDialog, annotation_text
+from command_lists import CommandListSaver, CommandListCache, write_yaml_atomic
+from session_store import SessionSnapshot, SessionLoader, SessionAutosaver, SESSION_FILE, DEFAULT_AUTOSAVE_SEC, MAX_CHART_EVENTS
+from terminal_widget import MAX_TERMINAL_LINES
 from yaml_editor import YamlEditorDialog
 import yaml
 from settings_dialog import SettingsDialog
-from sequence_chart import SequenceChartWindow
+from sequence_chart import (
+    SequenceChartWindow, ChartEventStore, EventMerger, DEFAULT_EVENT_BUDGET_MB, DEFAULT_COALESCE_IDLE_MS,
+    EXTERNAL_LANE, MERGE_WINDOW_SEC
+)
+from highlight_rules import DEFAULT_HIGHLIGHT_RULES
 
 LINEEDIT_MAX_NUMBER = 10
 
@@ -44,11 +63,35 @@ class FindDialog(QDialog):
         layout.addWidget(self.close_btn)
         self.setLayout(layout)
 
+class FilterBar(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.include_lineedit = QLineEdit()
+        self.include_lineedit.setPlaceholderText("Include regex")
+        self.exclude_lineedit = QLineEdit()
+        self.exclude_lineedit.setPlaceholderText("Exclude regex")
+        self.direction_combo = QComboBox()
+        self.direction_combo.addItems(["All", "RX", "TX"])
+        self.case_checkbox = QCheckBox("Case Sensitive")
+        self.count_label = QLabel("")
+        self.count_label.setStyleSheet("color: #888;")
+        self.close_btn = QPushButton("Close")
+        layout.addWidget(QLabel("Filter:"))
+        layout.addWidget(self.include_lineedit)
+        layout.addWidget(self.exclude_lineedit)
+        layout.addWidget(self.direction_combo)
+        layout.addWidget(self.case_checkbox)
+        layout.addWidget(self.count_label)
+        layout.addWidget(self.close_btn)
+        self.setLayout(layout)
+
 class SerialTerminal(QMainWindow):
-    serial_data_signal = Signal(str, str)
+    serial_data_signal = Signal(str, float, str)
     sequential_complete_signal = Signal(bool, str)
     reconnect_signal = Signal()
-    log_data_signal = Signal(str, str, str)
+    log_data_signal = Signal(str, str, float, bytes)  # direction, text, timestamp, raw bytes
 
     @staticmethod
     def clear_layout(layout):
@@ -88,9 +131,15 @@ class SerialTerminal(QMainWindow):
         self.first_load = True
         self.data_buffer = ""
         self.buffer_timeout = None
-        self.ansi_buffer = ""
+        self.framer = LineFramer()
         self.current_cmdlist_file = None
         self.full_command_list = []
+        # Edits are saved in the background once typing pauses
+        self.command_list_saver = CommandListSaver(parent=self)
+        self.command_list_saver.failed.connect(self.on_command_list_save_failed)
+        # Parsed once (all groups preloaded at startup), then again only when a file changes
+        self.command_lists = CommandListCache(self.validate_config_structure, self.command_list_saver, parent=self)
+        self.command_lists.changed.connect(self.on_command_list_changed)
         self.current_page = 0
         self.current_command_group = self.load_current_command_group()
         self.predefined_cmd_mappings = {}
@@ -118,6 +167,11 @@ class SerialTerminal(QMainWindow):
         self.author_label = QLabel("ATCMDer v" + utils.APP_VERSION + " by OllehEugene")
         self.author_label.setStyleSheet("color: #888; margin-left: 12px;")
         self.status.addPermanentWidget(self.author_label)
+        self.catching_up_label = QLabel("Catching up...")
+        self.catching_up_label.setStyleSheet("color: #e5a50a; margin-left: 12px;")
+        self.catching_up_label.setToolTip("High output rate: rendering is throttled until the burst ends")
+        self.catching_up_label.hide()
+        self.status.insertPermanentWidget(0, self.catching_up_label)
 
         menubar = self.menuBar()
 
@@ -161,6 +215,59 @@ class SerialTerminal(QMainWindow):
         settings_menu.addAction(self.font_size_action)
         settings_menu.addSeparator()
 
+        view_menu = menubar.addMenu("View")
+        goto_time_action = QAction("Go to Time...", self)
+        goto_time_action.setShortcut("Ctrl+G")
+        goto_time_action.triggered.connect(self.show_goto_time_dialog)
+        view_menu.addAction(goto_time_action)
+        filter_action = QAction("Filter...", self)
+        filter_action.setShortcut("Ctrl+L")
+        filter_action.triggered.connect(self.show_filter_bar)
+        view_menu.addAction(filter_action)
+        self.screen_mode_action = QAction("Screen Mode", self)
+        self.screen_mode_action.setCheckable(True)
+        self.screen_mode_action.setShortcut("Ctrl+Shift+S")
+        self.screen_mode_action.toggled.connect(self.set_screen_mode)
+        view_menu.addAction(self.screen_mode_action)
+        self.hex_dump_action = QAction("Hex Dump", self)
+        self.hex_dump_action.setCheckable(True)
+        self.hex_dump_action.setShortcut("Ctrl+Shift+H")
+        self.hex_dump_action.toggled.connect(self.toggle_hex_dump)
+        view_menu.addAction(self.hex_dump_action)
+        pipeline_stats_action = QAction("RX Pipeline Statistics...", self)
+        pipeline_stats_action.triggered.connect(self.show_pipeline_stats)
+        view_menu.addAction(pipeline_stats_action)
+
+        tools_menu = menubar.addMenu("Tools")
+        share_port_action = QAction("Share Port over TCP...", self)
+        share_port_action.triggered.connect(self.show_port_share_dialog)
+        tools_menu.addAction(share_port_action)
+        tools_menu.addSeparator()
+        self.record_session_action = QAction("Record Session...", self)
+        self.record_session_action.setCheckable(True)
+        self.record_session_action.setToolTip("Capture RX and TX bytes with timestamps for replay")
+        self.record_session_action.triggered.connect(self.toggle_session_recording)
+        tools_menu.addAction(self.record_session_action)
+        self.replay_action = QAction("Replay Session...", self)
+        self.replay_action.triggered.connect(self.replay_session)
+        tools_menu.addAction(self.replay_action)
+        tools_menu.addSeparator()
+        self.record_macro_action = QAction("Record Macro", self)
+        self.record_macro_action.setCheckable(True)
+        self.record_macro_action.setShortcut("Ctrl+Shift+R")
+        self.record_macro_action.setToolTip("Turn the commands you send into a command list timed from the responses")
+        self.record_macro_action.triggered.connect(self.toggle_macro_recording)
+        tools_menu.addAction(self.record_macro_action)
+        tools_menu.addSeparator()
+        throughput_action = QAction("Throughput Test...", self)
+        throughput_action.setToolTip("Measure sustained RX/TX rates with a verified test pattern")
+        throughput_action.triggered.connect(self.show_throughput_test_dialog)
+        tools_menu.addAction(throughput_action)
+        latency_action = QAction("Command Latency...", self)
+        latency_action.setToolTip("Response times per command, from the command to the first RX and the final result")
+        latency_action.triggered.connect(self.show_latency_dialog)
+        tools_menu.addAction(latency_action)
+
         help_menu = menubar.addMenu("Help")
         about_action = QAction("About", self)
         about_action.triggered.connect(self.show_about_dialog)
@@ -332,6 +439,16 @@ class SerialTerminal(QMainWindow):
         self.terminal_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.terminal_widget.installEventFilter(self)
         self.terminal_widget.request_paste.connect(self.handle_paste)
+        self.terminal_widget.catching_up_changed.connect(self.on_catching_up_changed)
+        # Full-screen device UIs are drawn on a separate grid so the scrollback stays intact
+        self.screen_widget = ScreenGridWidget(self.terminal_widget)
+        self.screen_widget.installEventFilter(self)
+        self.screen_widget.hide()
+        self.screen_mode_active = False
+        # Source bytes of the RX stream, kept alongside the decoded scrollback
+        self.raw_rx_store = RawByteStore()
+        self.hex_dump_widget = HexDumpWidget(self.raw_rx_store, font_family=self.font_family, font_size=self.font_size)
+        self.hex_dump_widget.hide()
         self.clear_btn = QPushButton()
         self.clear_btn.setIcon(QIcon(utils.get_resources(utils.CLEAR_ICON_NAME)))
         self.clear_btn.setFixedSize(28, 28)
@@ -371,7 +488,17 @@ class SerialTerminal(QMainWindow):
         btn_v_layout.addSpacing(10)
         btn_v_layout.addLayout(self.top_right_btn_layout)
         self.right_layout.addLayout(btn_v_layout)
+        self.filter_bar = FilterBar()
+        self.filter_bar.include_lineedit.textChanged.connect(self.on_filter_changed)
+        self.filter_bar.exclude_lineedit.textChanged.connect(self.on_filter_changed)
+        self.filter_bar.direction_combo.currentIndexChanged.connect(self.on_filter_changed)
+        self.filter_bar.case_checkbox.stateChanged.connect(self.on_filter_changed)
+        self.filter_bar.close_btn.clicked.connect(self.close_filter_bar)
+        self.filter_bar.hide()
+        self.right_layout.addWidget(self.filter_bar)
         self.right_layout.addWidget(self.terminal_widget)
+        self.right_layout.addWidget(self.screen_widget)
+        self.right_layout.addWidget(self.hex_dump_widget)
         self.right_widget = QWidget()
         self.right_widget.setLayout(self.right_layout)
         self.toggle_btn = QPushButton()
@@ -404,7 +531,40 @@ class SerialTerminal(QMainWindow):
         self.sequential_complete_signal.connect(self.on_sequential_complete)
         
         self.sequence_chart_window = None
+        # Recorded whether or not the chart is open; the chart renders from it
+        self.chart_events = ChartEventStore()
+        # TX, RX and external output come from different threads; put them in timestamp order first
+        self.chart_merger = EventMerger()
+        self.chart_merge_timer = QTimer(self)
+        self.chart_merge_timer.setSingleShot(True)
+        self.chart_merge_timer.setInterval(int(MERGE_WINDOW_SEC * 1000))
+        self.chart_merge_timer.timeout.connect(lambda: self.deliver_to_chart([]))
+        # Commands and their responses from the same events, annotated on the chart
+        self.latency_tracker = LatencyTracker(self.on_command_transaction)
+        self.latency_dialog = None
         self.log_data_signal.connect(self.on_log_data)
+        self.external_command = None
+        self.external_stdin_sink = None
+        self.setup_rx_pipeline()
+        self.port_share_server = PortShareServer(lambda: self.serial, self)
+        self.port_share_server.client_tx.connect(self.on_share_client_tx)
+        self.port_share_server.clients_changed.connect(self.update_port_share_status)
+        self.port_share_label = QLabel()
+        self.port_share_label.hide()
+        self.status.addPermanentWidget(self.port_share_label)
+        self.control_server = ControlServer(self.control_api_methods(), self)
+        self.session_recorder = None
+        self.session_replay = None
+        self.replay_latencies = None
+        self.last_replay_report = None
+        self.macro_recorder = None
+        self.macro_sink = None
+        self.throughput_probe = None  # PatternVerifier fed by the reader thread during a throughput test
+        self.session_loader = None
+        self.session_autosaver = SessionAutosaver(SESSION_FILE)
+        self.session_saved_key = None
+        self.session_autosave_timer = QTimer(self)
+        self.session_autosave_timer.timeout.connect(self.autosave_session)
         
         # Load settings first
         self.settings = self.load_settings()
@@ -422,6 +582,7 @@ class SerialTerminal(QMainWindow):
         
         # Load the command list for the current selected group
         self.load_current_group_command_list()
+        self.command_lists.preload(self.predefined_cmd_mappings.values())
         
         self.update_config_file_status()
         self.last_ports = set(list_serial_ports())
@@ -437,6 +598,10 @@ class SerialTerminal(QMainWindow):
         # Initialize command group button styles
         self.update_command_group_button_styles()
 
+        # After the window is shown; the previous session streams in from the newest lines
+        if self.settings.get('general', {}).get('session_persist', True):
+            QTimer.singleShot(0, self.restore_session)
+
     def eventFilter(self, obj, event):
         key = None
         text = ""
@@ -480,6 +645,14 @@ class SerialTerminal(QMainWindow):
                 # Check scroll position after resizing
                 QTimer.singleShot(50, lambda: self.check_scroll_position())
                 return False  # Let Qt handle the resizing
+        if obj is self.screen_widget and event.type() == QEvent.Type.KeyPress:
+            if event.key() == Qt.Key.Key_F1:
+                self.show_shortcut_list()
+            elif self.serial and self.serial.is_open:
+                self.send_screen_key(event)
+            return True
+
+        if obj is self.terminal_widget:
             if event.type() == QEvent.Type.KeyPress:
                 key = event.key()
                 text = event.text()
@@ -611,6 +784,7 @@ class SerialTerminal(QMainWindow):
     def edit_current_command_list(self):
         """Open the currently selected predefined command list in an internal YAML editor."""
         file_path = self.current_cmdlist_file
+        self.command_list_saver.flush()
         if not file_path or not os.path.exists(file_path):
             QMessageBox.warning(self, "File Not Found", "No command list file is currently loaded or the file does not exist.")
             return
@@ -618,6 +792,7 @@ class SerialTerminal(QMainWindow):
         dlg = YamlEditorDialog(file_path, self)
         # The exec() method returns True if the dialog was accepted (e.g., Save clicked)
         if dlg.exec():
+            self.command_lists.invalidate(file_path)
             self.load_and_validate_config_file(file_path, popup=False)
             self.update_status_bar(f"Reloaded '{os.path.basename(file_path)}' after editing.")
 
@@ -634,6 +809,11 @@ class SerialTerminal(QMainWindow):
             "Ctrl + 0     : Reset font size\n"
             "Ctrl + C     : Copy selection\n"
             "Ctrl + V     : Paste\n"
+            "Ctrl + G     : Go to time\n"
+            "Ctrl + L     : Filter output\n"
+            "Ctrl+Shift+S : Toggle screen mode\n"
+            "Ctrl+Shift+H : Toggle hex dump of RX bytes\n"
+            "Ctrl+Shift+R : Start/stop macro recording\n"
             "Alt + 0~9    : Send predefined command\n"
             "Ctrl+Alt+1~3 : Change predefined command group 1~3\n"
             "Up/Down      : Command history\n"
@@ -678,13 +858,17 @@ class SerialTerminal(QMainWindow):
     def handle_enter(self):
         """Handle Enter key press"""
         
-        self.terminal_widget.append_text("\n")
+        timestamp = time.time()
+        last_line = len(self.terminal_widget.lines) - 1
+        if self.current_input_buffer:
+            self.terminal_widget.set_line_meta(last_line, timestamp, DIRECTION_TX)
+        self.terminal_widget.append_text("\n", timestamp)
 
         command_to_send = self.current_input_buffer.rstrip() + self.line_ending
-        self.serial.write(command_to_send.encode('utf-8', errors='replace'))
+        command_bytes = command_to_send.encode('utf-8', errors='replace')
+        self.serial.write(command_bytes)
         
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        self.log_data_signal.emit("TX", command_to_send, timestamp)
+        self.log_data_signal.emit("TX", command_to_send, timestamp, command_bytes)
             
         # Add to command history using utils
         self.command_history = utils.add_to_history(
@@ -841,8 +1025,13 @@ class SerialTerminal(QMainWindow):
         # Force update
         self.terminal_widget.viewport().update()
 
-    def update_terminal(self, data, timestamp=None):
+    def update_terminal(self, data, timestamp=None, direction=DIRECTION_RX):
         """Update terminal with new data"""
+        if direction == DIRECTION_RX and (self.screen_mode_active or '\x1b[?' in data):
+            data = self.route_screen_data(data)
+            if not data:
+                return
+
         # Apply ANSI spacing processing before displaying
         data = utils.process_ansi_spacing(data)
         
@@ -850,30 +1039,368 @@ class SerialTerminal(QMainWindow):
         auto_scroll_state = self.terminal_widget.auto_scroll
         
         # Append text - content is always added regardless of auto_scroll state
-        self.terminal_widget.append_text(data, timestamp)
+        self.terminal_widget.append_text(data, timestamp, direction)
+        if not self.filter_bar.isHidden():
+            self.update_filter_count()
+
+        # While catching up, the terminal renders at a reduced frame rate on its own
+        catching_up = self.terminal_widget.catching_up
 
         # Refresh the screen - repaint() can provide more immediate updates
-        self.terminal_widget.update()
+        if not catching_up:
+            self.terminal_widget.update()
 
         # If auto-scroll is enabled, check the scrollbar position
-        if auto_scroll_state:
+        if auto_scroll_state and not catching_up:
             # Set the scrollbar to the maximum value to always show the latest content
             # Here, we don't call set_auto_scroll directly, but use check_scroll_position to
             # calculate the scrollbar position and set the state
             QTimer.singleShot(0, self.check_scroll_position)
 
+    def setup_rx_pipeline(self):
+        """Sinks fed by the reader thread; each has its own bounded queue"""
+        self.rx_pipeline = RxPipeline(self)
+        self.terminal_sink = self.rx_pipeline.add_sink(CallbackSink(
+            "terminal", self.deliver_to_terminal, max_queue=TERMINAL_SINK_QUEUE,
+            directions={DIRECTION_RX, DIRECTION_TX, DIRECTION_EXTERNAL}))
+        self.rx_pipeline.add_sink(CallbackSink(
+            "hex view", self.deliver_to_hex_view, directions={DIRECTION_RX}))
+        self.rx_pipeline.add_sink(CallbackSink(
+            "sequence chart", self.deliver_to_chart, directions={DIRECTION_RX, DIRECTION_TX, DIRECTION_EXTERNAL}))
+        # Runs after the response has reached the terminal
+        self.rx_pipeline.add_sink(CallbackSink(
+            "autocomplete", self.deliver_to_autocomplete, max_queue=100, directions={DIRECTION_RX},
+            ready=lambda: not self.terminal_sink.queue))
+        self.rx_pipeline.add_sink(CallbackSink(
+            "port sharing", self.deliver_to_port_share, directions={DIRECTION_RX}))
+        self.rx_pipeline.add_sink(CallbackSink(
+            "control api", self.deliver_to_control_api, directions={DIRECTION_RX}))
+
+    def deliver_to_terminal(self, frames):
+        if self.replay_latencies is not None:
+            self.replay_latencies.append(time.time() - frames[0].timestamp)
+        # Frames from the same read share a timestamp and are appended together.
+        # Live TX is echoed when it is sent; replayed TX comes here to stay in order with the RX
+        start = 0
+        for i in range(1, len(frames) + 1):
+            if (i == len(frames) or frames[i].timestamp != frames[start].timestamp
+                    or frames[i].direction != frames[start].direction):
+                if frames[start].direction == DIRECTION_TX:
+                    text = ''.join(f"{frame.text}\r\n" for frame in frames[start:i] if frame.replayed)
+                else:
+                    text = ''.join(frame.text for frame in frames[start:i])
+                if text:
+                    self.update_terminal(text, frames[start].timestamp, frames[start].direction)
+                start = i
+
+    def deliver_to_hex_view(self, frames):
+        for frame in frames:
+            if frame.raw:
+                self.raw_rx_store.append(frame.raw, frame.timestamp)
+        self.hex_dump_widget.data_appended()
+
+    def deliver_to_chart(self, frames):
+        merger = self.chart_merger
+        merger.add(frames)
+        frames = merger.release(time.time())
+        if len(merger) and not self.chart_merge_timer.isActive():
+            self.chart_merge_timer.start()
+        if not frames:
+            return
+        store = self.chart_events
+        store.extend(frames)
+        self.latency_tracker.feed(frames, store.dropped + len(store) - len(frames))
+        if self.sequence_chart_window is not None and not self.sequence_chart_window.isHidden():
+            self.sequence_chart_window.chart_widget.events_added()
+
+    def deliver_to_autocomplete(self, frames):
         # If autocomplete result arrived, update input buffer
         # Example: last input was tab, serial response is a single line (command)
-        if hasattr(self, "waiting_for_autocomplete") and self.waiting_for_autocomplete:
+        if getattr(self, "waiting_for_autocomplete", False):
             # Assume autocomplete result is a single line (with line break)
-            lines = data.splitlines()
-            if lines:
+            if any(frame.text.splitlines() for frame in frames):
                 self.show_current_input()
             self.waiting_for_autocomplete = False
 
+    def deliver_to_port_share(self, frames):
+        if self.port_share_server.is_running():
+            self.port_share_server.broadcast(b''.join(frame.raw for frame in frames if frame.raw))
+
+    def deliver_to_control_api(self, frames):
+        self.control_server.publish_rx([(frame.text, frame.timestamp) for frame in frames])
+
+    def show_port_share_dialog(self):
+        sharing_settings = self.settings.setdefault('port_sharing', {})
+        dlg = PortShareDialog(self.port_share_server, sharing_settings, self)
+        dlg.exec()
+        self.save_port_sharing_settings()
+        self.update_port_share_status()
+
+    def save_port_sharing_settings(self):
+        """Write self.settings['port_sharing'] into the settings file, keeping its other keys"""
+        try:
+            settings = {}
+            if os.path.exists(utils.USER_SETTINGS):
+                with open(utils.USER_SETTINGS, "r", encoding="utf-8") as f:
+                    data = yaml.safe_load(f) or {}
+                if isinstance(data, dict):
+                    settings = data
+            settings['port_sharing'] = dict(self.settings.get('port_sharing', {}))
+            # Replaced in one step, so a crash or another writer never sees half a file
+            write_yaml_atomic(utils.USER_SETTINGS, settings)
+        except (OSError, yaml.YAMLError) as e:
+            print(f"Warning: Could not save port sharing settings: {e}")
+
+    def update_port_share_status(self):
+        server = self.port_share_server
+        if server.is_running():
+            self.port_share_label.setText(f"Sharing on :{server.port} ({len(server.clients)} clients)")
+            self.port_share_label.show()
+        else:
+            self.port_share_label.hide()
+
+    def on_share_client_tx(self, address, data):
+        """Bytes from a sharing client go out the same way as typed commands"""
+        if not (self.serial and self.serial.is_open):
+            return
+        try:
+            self.serial.write(data)
+        except Exception as e:
+            self.update_status_bar(f"Send error: {str(e)}")
+            return
+        timestamp = time.time()
+        display = data.decode('utf-8', errors='replace').rstrip('\r\n')
+        self.log_data_signal.emit("TX", display, timestamp, data)
+        self.serial_data_signal.emit(f"{display}\r\n", timestamp, DIRECTION_TX)
+
+    def toggle_session_recording(self, checked):
+        if checked:
+            default_name = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.atcap"
+            path, _ = QFileDialog.getSaveFileName(self, "Record Session", default_name, CAPTURE_FILTER)
+            if not path:
+                self.record_session_action.setChecked(False)
+                return
+            try:
+                self.session_recorder = SessionRecorder(path)
+            except OSError as e:
+                QMessageBox.warning(self, "Record Session", f"Could not create {path}:\n{e}")
+                self.record_session_action.setChecked(False)
+                return
+            self.update_status_bar(f"Recording session to {os.path.basename(path)}")
+        elif self.session_recorder is not None:
+            recorder, self.session_recorder = self.session_recorder, None
+            recorder.close()
+            self.update_status_bar(f"Session recorded: {recorder.records:,} records, {recorder.bytes:,} bytes")
+
+    def replay_session(self):
+        if self.session_replay is not None:
+            self.session_replay.cancel()
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Replay Session", "", CAPTURE_FILTER)
+        if not path:
+            return
+        labels = [label for label, _ in REPLAY_SPEEDS]
+        label, ok = QInputDialog.getItem(self, "Replay Session", "Speed:", labels, 0, False)
+        if ok:
+            self.start_replay(path, dict(REPLAY_SPEEDS)[label])
+
+    def start_replay(self, path, speed, show_report=True):
+        """Feed a capture through the RX path as the serial reader would; speed 0 is as fast as possible"""
+        framer = create_framer(self.framing_settings, self.baudrate, self.parity)
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        replay = SessionReplay(path, speed, framer, lambda frames: self.submit_rx_frames(frames, framer, decoder),
+                               self.submit_replayed_tx, self)
+        replay.progress.connect(self.on_replay_progress)
+        replay.finished.connect(self.on_replay_finished)
+        self.session_replay = replay
+        self.replay_show_report = show_report
+        self.replay_latencies = []
+        self.replay_dropped_before = self.terminal_sink.dropped
+        self.terminal_widget.frame_timer = FrameTimer()
+        self.replay_action.setText("Stop Replay")
+        replay.start()
+        return replay
+
+    def submit_replayed_tx(self, data, timestamp):
+        # Queued behind the replayed RX submitted by the same thread, so every sink keeps the order
+        display = data.decode('utf-8', errors='replace').rstrip('\r\n')
+        self.rx_pipeline.submit([RxFrame(DIRECTION_TX, display, data, timestamp, self.selected_port or None,
+                                         replayed=True)])
+
+    def on_replay_progress(self, percent):
+        self.update_status_bar(f"Replaying {os.path.basename(self.session_replay.path)}: {percent}%")
+
+    def on_replay_finished(self):
+        # Report once the terminal has caught up with everything replayed
+        if self.terminal_sink.queue:
+            QTimer.singleShot(10, self.on_replay_finished)
+            return
+        replay, self.session_replay = self.session_replay, None
+        report = ReplayReport(replay.speed, replay.records, replay.rx_bytes, replay.elapsed, replay.source_duration,
+                              self.replay_latencies, self.terminal_widget.frame_timer.samples(),
+                              self.terminal_sink.dropped - self.replay_dropped_before)
+        self.replay_latencies = None
+        self.terminal_widget.frame_timer = None
+        self.replay_action.setText("Replay Session...")
+        self.last_replay_report = report
+        if replay.error:
+            QMessageBox.warning(self, "Replay Session", replay.error)
+            return
+        self.update_status_bar("Replay finished")
+        if self.replay_show_report:
+            width = max(len(label) for label, _ in report.rows())
+            rows = [f"{label.ljust(width)} : {value}" for label, value in report.rows()]
+            QMessageBox.information(self, "Replay Report", "<pre>" + "\n".join(rows) + "</pre>")
+
+    def show_throughput_test_dialog(self):
+        if not (self.serial and self.serial.is_open):
+            QMessageBox.information(self, "Throughput Test", "Connect to a serial port first.")
+            return
+        ThroughputTestDialog(self, self).exec()
+
+    def show_latency_dialog(self):
+        if self.latency_dialog is None:
+            self.latency_dialog = LatencyStatsDialog(self.latency_tracker, self)
+        self.latency_dialog.show()
+        self.latency_dialog.raise_()
+        self.latency_dialog.activateWindow()
+
+    def on_command_transaction(self, transaction):
+        self.chart_events.annotate(transaction.event_id, annotation_text(transaction))
+
+    def toggle_macro_recording(self, checked):
+        if checked:
+            self.macro_recorder = MacroRecorder()
+            self.macro_sink = self.rx_pipeline.add_sink(CallbackSink(
+                "macro recorder", self.deliver_to_macro_recorder, directions={DIRECTION_RX, DIRECTION_TX}))
+            self.update_status_bar("Recording macro: send commands as usual, press Ctrl+Shift+R to finish")
+            return
+        if self.macro_recorder is None:
+            return
+        # Responses still queued belong to the last command
+        self.rx_pipeline.drain()
+        self.rx_pipeline.remove_sink(self.macro_sink)
+        recorder, self.macro_recorder, self.macro_sink = self.macro_recorder, None, None
+        if not recorder.steps:
+            self.update_status_bar("Macro recording stopped: no commands were sent")
+            return
+        dlg = MacroReviewDialog(recorder.steps, self)
+        if dlg.exec() and dlg.saved_path:
+            answer = QMessageBox.question(self, "Recorded Macro",
+                                          f"Saved {os.path.basename(dlg.saved_path)}.\nLoad it as the current command list?")
+            if answer == QMessageBox.StandardButton.Yes:
+                self.command_lists.invalidate(dlg.saved_path)
+                self.load_and_validate_config_file(dlg.saved_path, popup=False)
+
+    def deliver_to_macro_recorder(self, frames):
+        recorder = self.macro_recorder
+        if recorder is None:
+            return
+        # Commands arrive in order with the responses, live or replayed
+        for frame in frames:
+            if frame.direction != DIRECTION_TX:
+                recorder.rx(frame.text, frame.timestamp)
+            elif frame.text.startswith("HEX: "):
+                recorder.command_sent(frame.text[5:], frame.timestamp, hexmode=True)
+            else:
+                recorder.command_sent(frame.text, frame.timestamp)
+
+    def show_pipeline_stats(self):
+        rows = [f"{'Sink':<16}{'Queued':>8}{'Delivered':>11}{'Dropped':>9}{'Max lag':>10}{'Busy':>9}"]
+        for name, queued, delivered, dropped, max_lag, busy_time in self.rx_pipeline.stats():
+            rows.append(f"{name:<16}{queued:>8}{delivered:>11}{dropped:>9}{max_lag * 1000:>8.0f}ms{busy_time:>8.2f}s")
+        dlg = QMessageBox(self)
+        dlg.setWindowTitle("RX Pipeline")
+        dlg.setText("<pre>" + "\n".join(rows) + "</pre>")
+        reset_btn = dlg.addButton("Reset", QMessageBox.ButtonRole.ResetRole)
+        dlg.addButton(QMessageBox.StandardButton.Ok)
+        dlg.exec()
+        if dlg.clickedButton() is reset_btn:
+            self.rx_pipeline.reset_stats()
+
+    def toggle_hex_dump(self, checked):
+        """Show the hex/ASCII dump of the raw RX bytes below the terminal"""
+        self.hex_dump_widget.setVisible(checked)
+        if checked:
+            self.hex_dump_widget.setFocus()
+        else:
+            self.terminal_widget.setFocus()
+
+    def route_screen_data(self, data):
+        """
+        Feed the parts of data inside the alternate screen to the screen grid.
+        Returns the remaining text for the scrollback.
+        """
+        normal = []
+        while data:
+            if self.screen_mode_active:
+                match = SCREEN_EXIT_PATTERN.search(data)
+                if match is None or self.screen_mode_action.isChecked():
+                    # A manually enabled screen mode stays on until toggled off
+                    self.screen_widget.feed(data)
+                    break
+                self.screen_widget.feed(data[:match.start()])
+                self.set_screen_mode(False)
+            else:
+                match = SCREEN_ENTER_PATTERN.search(data)
+                if match is None:
+                    normal.append(data)
+                    break
+                normal.append(data[:match.start()])
+                self.set_screen_mode(True)
+                self.screen_widget.reset()
+            data = data[match.end():]
+        return ''.join(normal)
+
+    def set_screen_mode(self, enabled):
+        """Swap the scrollback view for the screen grid"""
+        if enabled == self.screen_mode_active:
+            return
+        self.screen_mode_active = enabled
+        if not enabled and self.screen_mode_action.isChecked():
+            self.screen_mode_action.setChecked(False)
+        self.terminal_widget.setVisible(not enabled)
+        self.screen_widget.setVisible(enabled)
+        if enabled:
+            self.screen_widget.setFocus()
+            self.update_status_bar("Screen mode: keys are sent to the device as typed")
+        else:
+            self.terminal_widget.setFocus()
+            self.update_status_bar("Screen mode off")
+
+    def send_screen_key(self, event):
+        """Send a key press straight to the device, as a VT100 terminal would"""
+        key = event.key()
+        sequences = {
+            Qt.Key.Key_Up: '\x1b[A',
+            Qt.Key.Key_Down: '\x1b[B',
+            Qt.Key.Key_Right: '\x1b[C',
+            Qt.Key.Key_Left: '\x1b[D',
+            Qt.Key.Key_Home: '\x1b[H',
+            Qt.Key.Key_End: '\x1b[F',
+            Qt.Key.Key_PageUp: '\x1b[5~',
+            Qt.Key.Key_PageDown: '\x1b[6~',
+            Qt.Key.Key_Delete: '\x1b[3~',
+            Qt.Key.Key_Return: '\r',
+            Qt.Key.Key_Enter: '\r',
+            Qt.Key.Key_Backspace: '\x7f',
+            Qt.Key.Key_Escape: '\x1b',
+            Qt.Key.Key_Tab: '\t',
+        }
+        data = sequences.get(key, event.text())
+        if data:
+            self.serial.write(data.encode('utf-8', errors='replace'))
+
     def clear_terminal(self):
         """Clear terminal"""
+        if self.session_loader is not None:
+            self.session_loader.cancel()
         self.terminal_widget.clear()
+        self.raw_rx_store.clear()
+        self.hex_dump_widget.refresh()
+        self.chart_merger.clear()
+        self.chart_events.clear()
+        self.latency_tracker.cancel_pending()
         if self.sequence_chart_window:
             self.sequence_chart_window.clear()
 
@@ -882,7 +1409,7 @@ class SerialTerminal(QMainWindow):
         if not hasattr(self, 'terminal_widget') or not self.terminal_widget:
             return
 
-        text = self.terminal_widget.export_text()
+        text = self.terminal_widget.export_text(with_timestamps=self.terminal_widget.show_timestamps)
         from datetime import datetime
         default_name = datetime.now().strftime("terminal_%Y%m%d_%H%M%S.txt")
 
@@ -907,11 +1434,18 @@ class SerialTerminal(QMainWindow):
         fixed_font.setStyleHint(QFont.StyleHint.Monospace)
         fixed_font.setPointSize(self.font_size)
         self.terminal_widget.set_font(fixed_font)
+        self.hex_dump_widget.set_font(fixed_font)
     
         # Update the menu text to show current font size
         if hasattr(self, 'font_size_action'):
             self.font_size_action.setText(f"Current Font Size: {self.font_size}")
 
+    def on_catching_up_changed(self, catching_up):
+        """Show the adaptive rendering indicator in the status bar"""
+        self.catching_up_label.setVisible(catching_up)
+        if not catching_up:
+            QTimer.singleShot(0, self.check_scroll_position)
+
     def check_scroll_position(self):
         """Check scrollbar position and set auto-scroll state."""
         if not hasattr(self, 'terminal_widget') or not self.terminal_widget:
@@ -957,6 +1491,15 @@ class SerialTerminal(QMainWindow):
         """Save history on application exit"""
         # Save history using utils
         utils.save_command_history(self.command_history)
+        self.command_list_saver.flush()
+        self.session_autosave_timer.stop()
+        # Not while restoring: the file still holds history that has not been loaded
+        if self.settings.get('general', {}).get('session_persist', True) and self.session_loader is None:
+            self.session_autosaver.save_now(self.session_snapshot())
+        self.port_share_server.stop()
+        self.control_server.stop()
+        if self.session_recorder is not None:
+            self.session_recorder.close()
         if self.serial and self.serial.is_open:
             self.serial.close()
         super().closeEvent(event)
@@ -1296,24 +1839,26 @@ class SerialTerminal(QMainWindow):
     def load_and_validate_config_file(self, file_path, popup=True):
         """Load and validate YAML file, then apply to command list"""
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-            
-            # Validate structure
-            is_valid, message = self.validate_config_structure(data)
+            # Parsed and validated when first read or changed on disk
+            data, error, problem = self.command_lists.get(file_path)
+            if error is not None:
+                raise error
             
-            if not is_valid:
-                self.handle_yaml_file_error(file_path, f"Invalid File Structure: {message}")
+            if problem:
+                self.handle_yaml_file_error(file_path, f"Invalid File Structure: {problem}")
                 return
 
             # Add default hexmode attribute if missing
+            normalized = False
             for item in data:
                 if 'hexmode' not in item:
                     item['hexmode'] = False
+                    normalized = True
 
             # Truncate if more than LINEEDIT_MAX_NUMBER
             if len(data) > LINEEDIT_MAX_NUMBER:
                 data = data[:LINEEDIT_MAX_NUMBER]
+                normalized = True
                 QMessageBox.warning(
                     self,
                     "List Truncated",
@@ -1323,6 +1868,8 @@ class SerialTerminal(QMainWindow):
 
             self.current_cmdlist_file = file_path
             self.apply_config_data_to_ui(data)
+            if normalized:
+                self.command_lists.save(file_path, self.full_command_list)
             self.update_config_file_status()
 
             # Show success message
@@ -1373,6 +1920,7 @@ class SerialTerminal(QMainWindow):
             editor = YamlEditorDialog(file_path, self)
             if editor.exec() == QDialog.Accepted:
                 # Try to reload the file after editing
+                self.command_lists.invalidate(file_path)
                 self.load_and_validate_config_file(file_path, popup=False)
         except Exception as e:
             QMessageBox.warning(
@@ -1418,16 +1966,8 @@ class SerialTerminal(QMainWindow):
         self.current_page = 0
         
         self.update_command_view()
-        
-        target_file = self.current_cmdlist_file if self.current_cmdlist_file else utils.PREDEFINED_COMMAND_LIST1
-        try:
-            with open(target_file, "w", encoding="utf-8") as f:
-                yaml.safe_dump(self.full_command_list, f, allow_unicode=True, sort_keys=False)
-        except Exception as e:
-            self.update_status_bar(f"Warning: Could not save to {os.path.basename(target_file)}: {str(e)}")
 
     def go_to_page(self, page_number):
-        self.load_checkbox_lineedit(self.current_cmdlist_file)
         if self.current_page == page_number:
             self.page_buttons[page_number].setChecked(True)
             return
@@ -1580,50 +2120,14 @@ class SerialTerminal(QMainWindow):
 
     def toggle_serial_connection(self):
         if self.serial and self.serial.is_open:
-            self.running = False
-            if self.thread and self.thread.is_alive():
-                self.thread.join(timeout=0.5)
-            self.serial.close()
-            self.update_status_bar("Disconnected")
-            self.connect_btn.setChecked(False)
-            self.connect_btn.setText("Connect")
-            self.connect_btn.setToolTip(f"Connect Serial Port")
+            self.close_serial_port()
         else:
             if not self.selected_port:
                 self.update_status_bar("Error: No port selected")
                 self.connect_btn.setChecked(False)
                 return
             try:
-                rtscts = (self.flow_control == 'RTS/CTS (Hardware)')
-                xonxoff = (self.flow_control == 'XON/XOFF (Software)')
-
-                parity_map = {
-                    'None': serial.PARITY_NONE,
-                    'Even': serial.PARITY_EVEN,
-                    'Odd': serial.PARITY_ODD,
-                    'Mark': serial.PARITY_MARK,
-                    'Space': serial.PARITY_SPACE
-                }
-                
-                # Create and configure serial port
-                self.serial = serial.Serial()
-                self.serial.port = self.selected_port
-                self.serial.baudrate = self.baudrate
-                self.serial.parity = parity_map.get(self.parity, serial.PARITY_NONE)
-                self.serial.timeout = 0.1
-                self.serial.rtscts = rtscts
-                self.serial.xonxoff = xonxoff
-                
-                self.serial.open()
-                
-                self.running = True
-                self.thread = threading.Thread(target=self.read_serial_data, daemon=True)
-                self.thread.start()
-                self.update_status_bar(f"Connected to {self.selected_port} @ {self.baudrate} bps")
-                self.connect_btn.setChecked(True)
-                self.connect_btn.setText("Disconnect")
-                self.save_recent_port(self.selected_port)  # Save recent port
-                self.connect_btn.setToolTip(f"Disconnect Serial Port")
+                self.open_serial_port()
             except (serial.SerialException, Exception) as e:
                 error_msg = str(e)
                 if "Invalid argument" in error_msg:
@@ -1631,6 +2135,68 @@ class SerialTerminal(QMainWindow):
                 QMessageBox.critical(self, "Connection Error", f"Failed to open {self.selected_port}:\n{error_msg}")
                 self.connect_btn.setChecked(False)
 
+    def open_serial_port(self):
+        """Open the selected port and start the reader; raises on failure"""
+        rtscts = (self.flow_control == 'RTS/CTS (Hardware)')
+        xonxoff = (self.flow_control == 'XON/XOFF (Software)')
+
+        parity_map = {
+            'None': serial.PARITY_NONE,
+            'Even': serial.PARITY_EVEN,
+            'Odd': serial.PARITY_ODD,
+            'Mark': serial.PARITY_MARK,
+            'Space': serial.PARITY_SPACE
+        }
+        
+        # Create and configure serial port
+        self.serial = serial.Serial()
+        self.serial.port = self.selected_port
+        self.serial.baudrate = self.baudrate
+        self.serial.parity = parity_map.get(self.parity, serial.PARITY_NONE)
+        self.serial.timeout = 0.1
+        self.serial.rtscts = rtscts
+        self.serial.xonxoff = xonxoff
+        
+        self.serial.open()
+        
+        self.running = True
+        self.framer = create_framer(self.framing_settings, self.baudrate, self.parity)
+        self.thread = threading.Thread(target=self.read_serial_data, daemon=True)
+        self.thread.start()
+        self.update_status_bar(f"Connected to {self.selected_port} @ {self.baudrate} bps")
+        self.connect_btn.setChecked(True)
+        self.connect_btn.setText("Disconnect")
+        self.save_recent_port(self.selected_port)  # Save recent port
+        self.connect_btn.setToolTip(f"Disconnect Serial Port")
+
+    def reopen_serial_port(self, baudrate, flow_control):
+        """Reopen the selected port with other line settings; returns an error message or None"""
+        if self.serial and self.serial.is_open:
+            self.close_serial_port()
+        self.baudrate = baudrate
+        self.flow_control = flow_control
+        self.baudrate_combo.blockSignals(True)
+        self.baudrate_combo.setCurrentText(str(baudrate))
+        self.baudrate_combo.blockSignals(False)
+        if not self.selected_port:
+            return "No port selected"
+        try:
+            self.open_serial_port()
+        except Exception as e:
+            self.connect_btn.setChecked(False)
+            return f"Failed to open {self.selected_port}: {e}"
+        return None
+
+    def close_serial_port(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=0.5)
+        self.serial.close()
+        self.update_status_bar("Disconnected")
+        self.connect_btn.setChecked(False)
+        self.connect_btn.setText("Connect")
+        self.connect_btn.setToolTip(f"Connect Serial Port")
+
     def refresh_serial_ports(self, auto_connect=False):
         current_port = self.serial_port_combo.currentText()
         if self.serial and self.serial.is_open:
@@ -2032,11 +2598,11 @@ class SerialTerminal(QMainWindow):
                     display_command = f"{command}"
                 
                 bytes_written = self.serial.write(command_bytes)
-                timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                self.log_data_signal.emit("TX", display_command, timestamp)
+                timestamp = time.time()
+                self.log_data_signal.emit("TX", display_command, timestamp, command_bytes)
                 
                 # Display sent command in terminal for verification
-                self.serial_data_signal.emit(f"{display_command}\r\n", timestamp)
+                self.serial_data_signal.emit(f"{display_command}\r\n", timestamp, DIRECTION_TX)
                 
             except Exception as e:
                 # Handle encoding or serial errors
@@ -2066,17 +2632,24 @@ class SerialTerminal(QMainWindow):
 
         if filename is None:
             filename = self.current_cmdlist_file if self.current_cmdlist_file else utils.PREDEFINED_COMMAND_LIST1
-        
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                yaml.safe_dump(self.full_command_list, f, allow_unicode=True, sort_keys=False)
-        except Exception as e:
-            self.update_status_bar(f"Warning: Could not save to {os.path.basename(filename)}: {str(e)}")
+        self.command_lists.save(filename, self.full_command_list)
+
+    def on_command_list_save_failed(self, filename, error):
+        self.update_status_bar(f"Warning: Could not save to {os.path.basename(filename)}: {error}")
+
+    def on_command_list_changed(self, filename):
+        """A cached command list was changed by another program"""
+        if filename == self.current_cmdlist_file:
+            self.load_and_validate_config_file(filename, popup=False)
+            self.update_status_bar(f"Reloaded '{os.path.basename(filename)}' after it changed on disk.")
 
     def show_sequence_chart(self):
         if self.sequence_chart_window is None:
-            self.sequence_chart_window = SequenceChartWindow(self)
-        
+            self.sequence_chart_window = SequenceChartWindow(self.chart_events, self)
+            self.apply_chart_settings(self.settings.get('sequence_chart', {}))
+        else:
+            self.sequence_chart_window.chart_widget.refresh()
+
         self.sequence_chart_window.resize(self.sequence_chart_window.width(), self.height())
         self.sequence_chart_window.show()
         
@@ -2086,71 +2659,46 @@ class SerialTerminal(QMainWindow):
         self.sequence_chart_window.raise_()
         self.sequence_chart_window.activateWindow()
 
-    def on_log_data(self, direction, data, timestamp=None):
-        if self.sequence_chart_window and self.sequence_chart_window.isVisible():
-            self.sequence_chart_window.add_message(direction, data, timestamp)
+    def on_log_data(self, direction, data, timestamp=None, raw=None):
+        if timestamp is None:
+            timestamp = time.time()
+        if direction == DIRECTION_TX and raw and self.session_recorder is not None:
+            self.session_recorder.record(DIRECTION_TX, raw, timestamp)
+        self.rx_pipeline.submit([RxFrame(direction, data, raw, timestamp, self.selected_port or None)])
 
     def load_checkbox_lineedit(self, filename):
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-        except Exception:
+        data, error, _ = self.command_lists.get(filename)
+        if error is not None:
             data = []
         self.apply_config_data_to_ui(data)
 
     def read_serial_data(self):
         """Thread function to read serial data"""
-        buffer_start_time = None
-        emit_batch = []
+        framer = self.framer
+        framer.reset()
+        # Incremental so a multi-byte character split across lines still decodes
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
 
         while self.running and self.serial and self.serial.is_open:
             try:
                 if self.serial.in_waiting > 0:
                     data_bytes = self.serial.read(self.serial.in_waiting)
-                    try:
-                        data_str = data_bytes.decode('utf-8', errors='replace')
-                    except UnicodeDecodeError:
-                        data_str = data_bytes.decode('latin-1', errors='replace')
-
-                    if data_str:
-                        combined_data = self.ansi_buffer + data_str
-                        self.ansi_buffer = ""
-
-                        lines = re.split(r'(\r\n|\n|\r)', combined_data)
-                        i = 0
-                        while i < len(lines) - 1:
-                            line = lines[i]
-                            sep = lines[i+1]
-                            full_line = line + sep
-                            is_complete, incomplete_pos = utils.is_ansi_sequence_complete(full_line)
-
-                            if is_complete:
-                                emit_batch.append(full_line)
-                            else:
-                                self.ansi_buffer = full_line + ''.join(lines[i+2:])
-                                break
-                            i += 2
-
-                        if i == len(lines) - 1:
-                            self.ansi_buffer = lines[i]
-                        buffer_start_time = time.time()
-
-                    # Emit multiple lines at once (performance improvement)
-                    if emit_batch:
-                        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                        for chunk in emit_batch:
-                            self.serial_data_signal.emit(chunk, timestamp)
-                            self.log_data_signal.emit("RX", chunk, timestamp)
-                        emit_batch.clear()
+                    now = time.time()
+                    recorder = self.session_recorder
+                    if recorder is not None:
+                        recorder.record(DIRECTION_RX, data_bytes, now)
+                    probe = self.throughput_probe
+                    if probe is not None:
+                        probe.feed(data_bytes, now)
+                    frames = framer.feed(data_bytes, now)
+                    if probe is not None:
+                        probe.parse_time += time.time() - now
                 else:
-                    # Check for buffer timeout (50ms)
-                    if self.ansi_buffer:
-                        if buffer_start_time is not None and (time.time() - buffer_start_time > 0.05):
-                            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                            self.serial_data_signal.emit(self.ansi_buffer, timestamp)
-                            self.log_data_signal.emit("RX", self.ansi_buffer, timestamp)
-                            self.ansi_buffer = ""
-                            buffer_start_time = None
+                    # Frames that end on a timeout (unterminated lines, inter-frame gaps)
+                    frames = framer.poll(time.time())
+
+                if frames:
+                    self.submit_rx_frames(frames, framer, decoder)
                 time.sleep(0.001)  # Shorter sleep (if CPU is idle)
             except serial.SerialException:
                 self.running = False
@@ -2176,25 +2724,31 @@ class SerialTerminal(QMainWindow):
                 self.running = False
                 break
 
+    def submit_rx_frames(self, frames, framer, decoder):
+        """Hand all frames of one read to the pipeline at once (serial reader and session replay)"""
+        batch = []
+        lane = self.selected_port or None
+        for frame, timestamp in frames:
+            if framer.binary:
+                text = frame.hex(' ').upper() + "\r\n"
+            else:
+                text = decoder.decode(frame)
+            batch.append(RxFrame(DIRECTION_RX, text, frame, timestamp, lane))
+        self.rx_pipeline.submit(batch)
+
     def sequential_send_commands(self):
         if self.serial and self.serial.is_open:
             # Collect all commands to send with their time intervals and hex mode info
             commands_to_send = []
             
-            # Load time intervals and hexmode from YAML file
+            # Time intervals and hexmode of the loaded list
             time_intervals = {}
             hex_modes = {}
-            try:
-                with open(self.current_cmdlist_file, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f)
-                if isinstance(data, list):
-                    for item in data:
-                        idx = item.get("index")
-                        if idx is not None:
-                            time_intervals[idx] = item.get("time", 1.0)  # Default 1 second
-                            hex_modes[idx] = item.get("hexmode", False)  # Default False
-            except Exception:
-                pass
+            for item in self.full_command_list:
+                idx = item.get("index")
+                if idx is not None:
+                    time_intervals[idx] = item.get("time", 1.0)  # Default 1 second
+                    hex_modes[idx] = item.get("hexmode", False)  # Default False
             
             for i in range(LINEEDIT_MAX_NUMBER):
                 lineedit = self.lineedits[i]
@@ -2244,10 +2798,10 @@ class SerialTerminal(QMainWindow):
                                 
                                 QTimer.singleShot(0, lambda cmd=command, num=idx+1, total=len(commands_to_send), interval=time_interval, hex_mode=is_hex_mode: update_status(cmd, num, total, interval, hex_mode))
                                 
-                                timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+                                timestamp = time.time()
                                 # Display sent command in terminal for verification
-                                self.serial_data_signal.emit(f"{display_command}\r\n", timestamp)
-                                self.log_data_signal.emit("TX", display_command, timestamp)
+                                self.serial_data_signal.emit(f"{display_command}\r\n", timestamp, DIRECTION_TX)
+                                self.log_data_signal.emit("TX", display_command, timestamp, command_bytes)
                                 
                                 # Add to history using utils (only for ASCII commands)
                                 if not is_hex_mode:
@@ -2358,6 +2912,7 @@ class SerialTerminal(QMainWindow):
         fixed_font.setStyleHint(QFont.StyleHint.Monospace)
         fixed_font.setPointSize(self.font_size)
         self.terminal_widget.set_font(fixed_font)
+        self.hex_dump_widget.set_font(fixed_font)
         
         # Update the menu text to show current font size
         if hasattr(self, 'font_size_action'):
@@ -2393,6 +2948,7 @@ class SerialTerminal(QMainWindow):
         try:
             self.serial = serial.Serial(self.selected_port, self.baudrate, timeout=0.1)
             self.running = True
+            self.framer = create_framer(self.framing_settings, self.baudrate, self.parity)
             self.thread = threading.Thread(target=self.read_serial_data, daemon=True)
             self.thread.start()
             self.update_status_bar(f"Reconnected to {self.selected_port} @ {self.baudrate} bps")
@@ -2425,6 +2981,66 @@ class SerialTerminal(QMainWindow):
         self.find_dialog.raise_()
         self.find_dialog.lineedit.setFocus()
 
+    def show_goto_time_dialog(self):
+        """Jump the terminal and sequence chart to a time of day"""
+        text, ok = QInputDialog.getText(self, "Go to Time", "Time (HH:MM:SS[.mmm]):")
+        if not ok or not text.strip():
+            return
+
+        line_times = self.terminal_widget.line_times
+        reference = line_times[-1] if line_times else None
+        timestamp = utils.parse_time_of_day(text, reference)
+        if timestamp is None:
+            self.update_status_bar(f"Invalid time: {text}")
+            return
+
+        line_idx = self.terminal_widget.jump_to_time(timestamp)
+        if self.sequence_chart_window:
+            self.sequence_chart_window.scroll_to_time(timestamp)
+        if line_idx >= 0:
+            self.update_status_bar(f"Jumped to line {line_idx + 1} ({utils.format_timestamp(line_times[line_idx])})")
+        else:
+            self.update_status_bar("No output to navigate")
+
+    def show_filter_bar(self):
+        self.filter_bar.show()
+        self.filter_bar.include_lineedit.setFocus()
+        self.filter_bar.include_lineedit.selectAll()
+
+    def close_filter_bar(self):
+        self.filter_bar.hide()
+        self.terminal_widget.clear_filter()
+        self.terminal_widget.setFocus()
+
+    def on_filter_changed(self, *args):
+        """Re-apply the terminal filter view from the filter bar"""
+        direction = self.filter_bar.direction_combo.currentText()
+        directions = None
+        if direction == "RX":
+            directions = {DIRECTION_RX}
+        elif direction == "TX":
+            directions = {DIRECTION_TX}
+        try:
+            self.terminal_widget.set_filter(
+                include=self.filter_bar.include_lineedit.text(),
+                exclude=self.filter_bar.exclude_lineedit.text(),
+                directions=directions,
+                case_sensitive=self.filter_bar.case_checkbox.isChecked()
+            )
+        except re.error as e:
+            self.filter_bar.count_label.setText("Invalid regex")
+            self.update_status_bar(f"Invalid filter regex: {e}")
+            return
+        self.update_filter_count()
+
+    def update_filter_count(self):
+        if self.terminal_widget.filter_active:
+            self.filter_bar.count_label.setText(
+                f"{self.terminal_widget.filtered_line_count()} / {len(self.terminal_widget.lines)} lines"
+            )
+        else:
+            self.filter_bar.count_label.setText("")
+
     def close_find_dialog(self):
         self.find_dialog.hide()
         self.terminal_widget.clear_search()
@@ -2461,6 +3077,12 @@ class SerialTerminal(QMainWindow):
         # Apply output window settings
         self.terminal_widget.set_show_line_numbers(settings['output_window']['show_line_numbers'])
         self.terminal_widget.set_show_timestamps(settings['output_window']['show_time'])
+        self.terminal_widget.set_show_directions(settings['output_window'].get('show_direction', False))
+        self.terminal_widget.set_timestamp_mode(settings['output_window'].get('time_format', 'absolute'))
+        self.terminal_widget.set_adaptive_threshold(settings['output_window'].get('adaptive_render_threshold', DEFAULT_ADAPTIVE_THRESHOLD))
+        self.apply_collapse_repeats(settings['output_window'])
+        self.terminal_widget.set_keep_cr_frames(settings['output_window'].get('keep_cr_frames', 0))
+        self.apply_highlight_rules(settings.get('highlight_rules', DEFAULT_HIGHLIGHT_RULES))
         
         # Apply theme settings - handle both string and dict formats
         theme = settings.get('theme', 'default')
@@ -2512,11 +3134,20 @@ class SerialTerminal(QMainWindow):
         if self.flow_control != new_flow_control:
             self.flow_control = new_flow_control
             is_serial_setting_changed = True
+
+        # The framer is rebuilt from these on reconnect
+        new_framing_settings = framing_settings(serial_settings)
+        if self.framing_settings != new_framing_settings:
+            self.framing_settings = new_framing_settings
+            is_serial_setting_changed = True
             
         if self.serial and self.serial.is_open and is_serial_setting_changed:
             self.toggle_serial_connection() # disconnect
             QTimer.singleShot(100, self.toggle_serial_connection) # reconnect
         
+        self.apply_control_api_settings(settings.get('general', {}))
+        self.apply_session_settings(settings.get('general', {}))
+        self.apply_chart_settings(settings.get('sequence_chart', {}))
         self.update_ext_cmd_tooltip()
 
     def update_ext_cmd_tooltip(self):
@@ -2546,9 +3177,10 @@ class SerialTerminal(QMainWindow):
             default_settings = {
                 'font': {'name': 'Monaco', 'size': 14, 'bold': False},
                 'theme': 'default',  # Keep as string for consistency
-                'output_window': {'show_line_numbers': False, 'show_time': False},
+                'output_window': {'show_line_numbers': False, 'show_time': False, 'show_direction': False, 'time_format': 'absolute', 'adaptive_render_threshold': DEFAULT_ADAPTIVE_THRESHOLD, 'collapse_repeats': False, 'collapse_ignore_pattern': '', 'keep_cr_frames': 0},
                 'history': {'max_entries': 100},
                 'keep_hex_mode': False,
+                'highlight_rules': DEFAULT_HIGHLIGHT_RULES,
                 'serial': {'port': '', 'baudrate': 115200, 'flow_control': 'None', 'parity': 'None'}
             }
             
@@ -2569,12 +3201,30 @@ class SerialTerminal(QMainWindow):
             return {
                 'font': {'name': 'Monaco', 'size': 14, 'bold': False},
                 'theme': 'default',  # Keep as string
-                'output_window': {'show_line_numbers': False, 'show_time': False},
+                'output_window': {'show_line_numbers': False, 'show_time': False, 'show_direction': False, 'time_format': 'absolute', 'adaptive_render_threshold': DEFAULT_ADAPTIVE_THRESHOLD, 'collapse_repeats': False, 'collapse_ignore_pattern': '', 'keep_cr_frames': 0},
                 'history': {'max_entries': 100},
                 'keep_hex_mode': False,
+                'highlight_rules': DEFAULT_HIGHLIGHT_RULES,
                 'serial': {'port': '', 'baudrate': 115200, 'flow_control': 'None', 'parity': 'None'}
             }
 
+    def apply_collapse_repeats(self, output_settings):
+        """Apply the repeated-line collapsing settings to the terminal"""
+        pattern = output_settings.get('collapse_ignore_pattern', '')
+        try:
+            self.terminal_widget.set_collapse_repeats(output_settings.get('collapse_repeats', False), pattern)
+        except re.error as e:
+            print(f"Invalid collapse ignore pattern '{pattern}': {e}")
+            self.terminal_widget.set_collapse_repeats(output_settings.get('collapse_repeats', False))
+
+    def apply_highlight_rules(self, rules):
+        """Compile the highlight rules into the terminal"""
+        errors = self.terminal_widget.set_highlight_rules(rules)
+        for error in errors:
+            print(f"Invalid highlight rule {error}")
+        if errors:
+            self.update_status_bar(f"{len(errors)} highlight rule(s) ignored: invalid regex")
+
     def apply_initial_settings(self):
         """Apply settings when the program starts"""
         # Apply font settings
@@ -2590,6 +3240,12 @@ class SerialTerminal(QMainWindow):
         # Apply output window settings
         self.terminal_widget.set_show_line_numbers(self.settings['output_window']['show_line_numbers'])
         self.terminal_widget.set_show_timestamps(self.settings['output_window']['show_time'])
+        self.terminal_widget.set_show_directions(self.settings['output_window'].get('show_direction', False))
+        self.terminal_widget.set_timestamp_mode(self.settings['output_window'].get('time_format', 'absolute'))
+        self.terminal_widget.set_adaptive_threshold(self.settings['output_window'].get('adaptive_render_threshold', DEFAULT_ADAPTIVE_THRESHOLD))
+        self.apply_collapse_repeats(self.settings['output_window'])
+        self.terminal_widget.set_keep_cr_frames(self.settings['output_window'].get('keep_cr_frames', 0))
+        self.apply_highlight_rules(self.settings.get('highlight_rules', DEFAULT_HIGHLIGHT_RULES))
         
         # Apply theme settings
         if hasattr(self, 'apply_theme'):
@@ -2613,6 +3269,7 @@ class SerialTerminal(QMainWindow):
         self.baudrate = int(serial_settings.get('baudrate', self.baudrate))
         self.parity = serial_settings.get('parity', 'None')
         self.flow_control = serial_settings.get('flow_control', 'None')
+        self.framing_settings = framing_settings(serial_settings)
         self.serial_port_combo.setCurrentText(self.selected_port)
         self.baudrate_combo.setCurrentText(str(self.baudrate))
         
@@ -2620,6 +3277,9 @@ class SerialTerminal(QMainWindow):
         self.terminal_widget.update_scrollbar()
         self.terminal_widget.viewport().update()
         
+        self.apply_control_api_settings(self.settings.get('general', {}))
+        self.apply_session_settings(self.settings.get('general', {}))
+        self.apply_chart_settings(self.settings.get('sequence_chart', {}))
         self.update_ext_cmd_tooltip()
         
         print(f"Initial settings applied - Line numbers: {self.settings['output_window']['show_line_numbers']}, Timestamps: {self.settings['output_window']['show_time']}")
@@ -2739,52 +3399,250 @@ class SerialTerminal(QMainWindow):
         
         print(f"Created empty command file: {file_path}")
 
+    def apply_control_api_settings(self, general):
+        """Start, restart or stop the control API to match the settings"""
+        enabled = general.get('control_api_enabled', False)
+        address = general.get('control_api_address', '')
+        if self.control_server.is_running():
+            if enabled and address == getattr(self, 'control_api_address', None):
+                return
+            self.control_server.stop()
+        self.control_api_address = address
+        if enabled:
+            try:
+                self.control_server.start(address or None)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not start control API: {e}")
+                self.update_status_bar(f"Control API error: {e}")
+
+    def apply_session_settings(self, general):
+        interval = general.get('session_autosave_sec', DEFAULT_AUTOSAVE_SEC)
+        if general.get('session_persist', True) and interval > 0:
+            self.session_autosave_timer.start(int(interval * 1000))
+        else:
+            self.session_autosave_timer.stop()
+
+    def apply_chart_settings(self, chart):
+        budget_mb = chart.get('event_budget_mb', DEFAULT_EVENT_BUDGET_MB)
+        retention_min = chart.get('retention_min', 0)
+        self.chart_events.set_limits(budget_mb << 20, retention_min * 60)
+        if self.sequence_chart_window is not None:
+            idle_gap = chart.get('coalesce_idle_ms', DEFAULT_COALESCE_IDLE_MS) / 1000
+            self.sequence_chart_window.set_coalesce(chart.get('coalesce_rx', False), idle_gap)
+            self.sequence_chart_window.chart_widget.events_added()
+
+    def session_snapshot(self):
+        chart_events = list(self.chart_events.events(MAX_CHART_EVENTS))
+        meta = {"saved_at": time.time()}
+        if not self.find_dialog.isHidden() and self.find_dialog.lineedit.text():
+            meta["search_text"] = self.find_dialog.lineedit.text()
+            meta["search_case_sensitive"] = self.find_dialog.case_checkbox.isChecked()
+        return SessionSnapshot(self.terminal_widget, chart_events, meta)
+
+    def session_state_key(self):
+        """Changes whenever there is something new to save"""
+        t = self.terminal_widget
+        chart_count = self.chart_events.dropped + len(self.chart_events)
+        return (t.lines_trimmed, len(t.lines), len(t.lines[-1]) if t.lines else 0, len(t.line_repeats), chart_count)
+
+    def autosave_session(self):
+        if self.session_loader is not None:
+            return
+        key = self.session_state_key()
+        if key != self.session_saved_key and self.session_autosaver.save(self.session_snapshot()):
+            self.session_saved_key = key
+
+    def restore_session(self):
+        if not os.path.exists(SESSION_FILE):
+            return
+        loader = SessionLoader(SESSION_FILE, MAX_TERMINAL_LINES, self)
+        loader.chart_loaded.connect(self.on_session_chart_loaded)
+        loader.block_loaded.connect(self.on_session_block_loaded)
+        loader.finished.connect(self.on_session_restored)
+        self.session_loader = loader
+        self.session_lines_restored = 0
+        self.update_status_bar("Restoring previous session...")
+        loader.start()
+
+    def on_session_chart_loaded(self, events):
+        if self.session_loader is None or self.session_loader.cancelled:
+            return
+        self.chart_events.prepend(events)
+        if self.sequence_chart_window is not None:
+            self.sequence_chart_window.chart_widget.reset_view()
+
+    def on_session_block_loaded(self, block):
+        if self.session_loader is None or self.session_loader.cancelled:
+            return
+        added = self.terminal_widget.prepend_history(block)
+        self.session_lines_restored += added
+        if not added:
+            self.session_loader.cancel()
+
+    def on_session_restored(self, meta):
+        loader, self.session_loader = self.session_loader, None
+        if loader.error:
+            print(f"Warning: Could not restore session: {loader.error}")
+            self.update_status_bar(f"Could not restore the previous session: {loader.error}")
+            return
+        if loader.cancelled and not self.session_lines_restored:
+            return
+        if meta.get("search_text"):
+            self.find_dialog.case_checkbox.setChecked(meta.get("search_case_sensitive", False))
+            self.find_dialog.lineedit.setText(meta["search_text"])
+            self.show_find_dialog()
+        saved_at = meta.get("saved_at")
+        when = f" (saved {utils.format_timestamp(saved_at)})" if saved_at else ""
+        self.update_status_bar(f"Restored {self.session_lines_restored:,} lines from the previous session{when}")
+
+    def control_api_methods(self):
+        """Control API methods that run on the GUI thread (see control_api.py for the rest)"""
+        return {
+            "status": self.api_status,
+            "list_ports": list_serial_ports,
+            "connect": self.api_connect,
+            "disconnect": self.api_disconnect,
+            "send": self.api_send,
+            "group_commands": self.api_group_commands,
+            "read_scrollback": self.api_read_scrollback,
+            "clear": self.clear_terminal,
+        }
+
+    def api_status(self):
+        t = self.terminal_widget
+        return {
+            "connected": bool(self.serial and self.serial.is_open),
+            "port": self.selected_port,
+            "baudrate": self.baudrate,
+            "first_line": t.lines_trimmed,
+            "next_line": t.lines_trimmed + len(t.lines),
+        }
+
+    def api_connect(self, port=None, baudrate=None):
+        connected = self.serial and self.serial.is_open
+        if connected and ((port and port != self.selected_port) or (baudrate and int(baudrate) != self.baudrate)):
+            self.close_serial_port()
+            connected = False
+        # Combo signals would reconnect on their own, with an error popup on failure
+        self.serial_port_combo.blockSignals(True)
+        self.baudrate_combo.blockSignals(True)
+        if port:
+            self.selected_port = port
+            self.serial_port_combo.setCurrentText(port)
+        if baudrate:
+            self.baudrate = int(baudrate)
+            self.baudrate_combo.setCurrentText(str(self.baudrate))
+        self.serial_port_combo.blockSignals(False)
+        self.baudrate_combo.blockSignals(False)
+        if not connected:
+            if not self.selected_port:
+                raise RpcError(CONNECT_FAILED, "No port selected")
+            try:
+                self.open_serial_port()
+            except Exception as e:
+                self.connect_btn.setChecked(False)
+                raise RpcError(CONNECT_FAILED, f"Failed to open {self.selected_port}: {e}")
+        return self.api_status()
+
+    def api_disconnect(self):
+        if self.serial and self.serial.is_open:
+            self.close_serial_port()
+        return self.api_status()
+
+    def api_send(self, command, hex=False):
+        if not (self.serial and self.serial.is_open):
+            raise RpcError(NOT_CONNECTED, "Not connected to serial port")
+        if hex:
+            command_bytes = self.hex_text_to_bytes(command)
+            display_command = f"HEX: {command}"
+        else:
+            command_bytes = (command + self.line_ending).encode('utf-8', errors='replace')
+            display_command = command
+        self.serial.write(command_bytes)
+        timestamp = time.time()
+        self.log_data_signal.emit("TX", display_command, timestamp, command_bytes)
+        self.serial_data_signal.emit(f"{display_command}\r\n", timestamp, DIRECTION_TX)
+        return {"bytes": len(command_bytes), "timestamp": timestamp}
+
+    def api_group_commands(self, group=None):
+        """Checked commands of a command group (the current one by default) as saved in its file"""
+        file_path = self.current_cmdlist_file if group is None else self.predefined_cmd_mappings.get(int(group))
+        if not file_path or not os.path.exists(file_path):
+            raise RpcError(INVALID_PARAMS, f"No command list for group {group}")
+        data, error, problem = self.command_lists.get(file_path)
+        if error is not None:
+            raise error
+        if problem:
+            raise RpcError(INVALID_PARAMS, problem)
+        return [
+            {"command": item["title"]["text"], "hex": item.get("hexmode", False), "interval": item["time"]}
+            for item in sorted(data, key=lambda item: item["index"])
+            if item["checked"] and item["title"]["text"]
+        ]
+
+    def api_read_scrollback(self, start=None, count=100):
+        """Lines by stable id; without start, the last count lines"""
+        t = self.terminal_widget
+        count = max(0, int(count))
+        if start is None:
+            start = max(t.lines_trimmed, t.lines_trimmed + len(t.lines) - count)
+        return [
+            {"id": line_id, "timestamp": timestamp, "direction": direction, "text": text, "repeats": repeats}
+            for line_id, timestamp, direction, text, repeats in t.line_range(int(start), count)
+        ]
+
     def execute_external_command(self):
+        if self.external_command is not None and self.external_command.is_running():
+            self.external_command.cancel()
+            self.update_status_bar("Stopping external command...")
+            return
+
         cmd = self.settings.get('general', {}).get('external_command', '').strip()
         if not cmd:
             self.update_status_bar("No external command configured.")
             QMessageBox.information(self, "External Command", "No external command configured.\nPlease set it in Settings -> General.")
             return
 
+        pipe_rx = self.settings.get('general', {}).get('external_command_pipe_rx', False)
         self.update_status_bar(f"Executing: {cmd}")
-        self.terminal_widget.append_text(f"\n\x1b[36m> Executing:\n{cmd}\x1b[0m\n")
-        
-        threading.Thread(target=self._run_external_command_thread, args=(cmd,), daemon=True).start()
+        self.terminal_widget.append_text(f"\n\x1b[36m> Executing:\n{cmd}\x1b[0m\n", direction=DIRECTION_EXTERNAL)
 
-    def _run_external_command_thread(self, cmd):
+        self.external_command = ExternalCommand(cmd, self.on_external_output, pipe_stdin=pipe_rx, parent=self)
+        self.external_command.finished.connect(self.on_external_command_finished)
         try:
-            final_cmd = cmd
-            if sys.platform == "darwin":
-                cmd_escaped = cmd.replace("'", "'\\''")
-                final_cmd = f"zsh -c 'source ~/.zshrc; {cmd_escaped}'"
-            elif sys.platform == "linux":
-                cmd_escaped = cmd.replace("'", "'\\''")
-                final_cmd = f"bash -c 'source ~/.bashrc; {cmd_escaped}'"
-
-            process = subprocess.Popen(
-                final_cmd, 
-                shell=True, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = process.communicate()
-            
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            
-            output = ""
-            if stdout:
-                output += f"\x1b[36m{stdout}\x1b[0m"
-            if stderr:
-                output += f"\n\x1b[31m{stderr}\x1b[0m"
-            
-            if output:
-                if not output.endswith('\n'):
-                    output += '\n'
-                self.serial_data_signal.emit(output, timestamp)
-            # else:
-            #     self.serial_data_signal.emit(f"\x1b[36m[Command finished with no output]\x1b[0m\n", timestamp)
-                
+            self.external_command.start()
         except Exception as e:
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            self.serial_data_signal.emit(f"\x1b[31mError executing command: {e}\x1b[0m\n", timestamp)
\ No newline at end of file
+            self.external_command = None
+            self.terminal_widget.append_text(f"\x1b[31mError executing command: {e}\x1b[0m\n", direction=DIRECTION_EXTERNAL)
+            return
+        if pipe_rx:
+            # Live RX goes to the command's stdin; its output comes back as the external stream
+            self.external_stdin_sink = self.rx_pipeline.add_sink(CallbackSink(
+                "external stdin", self.deliver_to_external_command, directions={DIRECTION_RX}))
+        self.ext_cmd_btn.setToolTip(f"Stop External Shell Command:\n{cmd}")
+
+    def on_external_output(self, text, timestamp):
+        """Called from the command's reader threads"""
+        self.rx_pipeline.submit([RxFrame(DIRECTION_EXTERNAL, text, None, timestamp, EXTERNAL_LANE)])
+
+    def deliver_to_external_command(self, frames):
+        if self.external_command is not None:
+            self.external_command.feed(b''.join(frame.raw for frame in frames if frame.raw))
+
+    def on_external_command_finished(self, code):
+        command = self.sender()
+        if self.external_stdin_sink is not None and command is self.external_command:
+            self.rx_pipeline.remove_sink(self.external_stdin_sink)
+            self.external_stdin_sink = None
+        if command.cancelled:
+            message = "Command cancelled"
+        else:
+            message = f"Command exited with code {code}"
+        if command.stdin_dropped:
+            message += f", {command.stdin_dropped} RX bytes dropped from its input"
+        self.rx_pipeline.submit([RxFrame(DIRECTION_EXTERNAL, f"\x1b[36m[{message}]\x1b[0m\n", None, time.time(),
+                                         EXTERNAL_LANE)])
+        self.update_status_bar(message)
+        if command is self.external_command:
+            self.external_command = None
+            self.update_ext_cmd_tooltip()
\ No newline at end of file
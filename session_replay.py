@@ -0,0 +1,199 @@
+import os
+import struct
+import threading
+import time
+from array import array
+from PySide6.QtCore import QObject, Signal
+import utils
+
+CAPTURE_MAGIC = b"ATCMCAP1"
+CAPTURE_FILTER = "AT Commander capture (*.atcap);;All Files (*)"
+# timestamp, direction code, payload length
+RECORD_HEADER = struct.Struct("<dBI")
+CAPTURE_DIRECTIONS = ["RX", "TX"]
+
+REPLAY_SPEEDS = [("Original speed", 1.0), ("2x", 2.0), ("10x", 10.0), ("100x", 100.0), ("As fast as possible", 0.0)]
+POLL_INTERVAL_SEC = 0.001  # same polling interval as the serial reader
+
+
+class SessionRecorder:
+    """Appends (timestamp, direction, bytes) records to a capture file; record() is thread-safe"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(CAPTURE_MAGIC)
+        self.lock = threading.Lock()
+        self.records = 0
+        self.bytes = 0
+
+    def record(self, direction, data, timestamp):
+        if not data:
+            return
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(RECORD_HEADER.pack(timestamp, CAPTURE_DIRECTIONS.index(direction), len(data)))
+            self.file.write(data)
+            self.records += 1
+            self.bytes += len(data)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read_capture(path):
+    """Yield (timestamp, direction, data, file_offset); a truncated last record is ignored"""
+    with open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{os.path.basename(path)} is not an AT Commander capture")
+        header_size = RECORD_HEADER.size
+        while True:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                return
+            timestamp, direction, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield timestamp, CAPTURE_DIRECTIONS[direction], data, f.tell()
+
+
+class ReplayReport:
+    """Throughput, injection-to-terminal latency and paint times of one replay"""
+
+    def __init__(self, speed, records, rx_bytes, elapsed, source_duration, latencies, paints, dropped):
+        self.speed = speed
+        self.records = records
+        self.rx_bytes = rx_bytes
+        self.elapsed = elapsed
+        self.source_duration = source_duration
+        self.latencies = sorted(latencies)
+        self.paints = paints  # (start, duration) per terminal paint
+        self.dropped = dropped
+
+    def rows(self):
+        elapsed = max(self.elapsed, 1e-9)
+        speed = f"{self.speed:g}x" if self.speed else "as fast as possible"
+        rows = [
+            ("speed", f"{speed} ({self.source_duration:.2f} s recorded, replayed in {self.elapsed:.2f} s)"),
+            ("records", f"{self.records:,}"),
+            ("RX throughput", f"{self.rx_bytes / elapsed / 1024:,.1f} KB/s ({self.rx_bytes:,} bytes)"),
+        ]
+        if self.latencies:
+            rows.append(("RX to terminal latency", f"p50 {utils.percentile(self.latencies, 0.5) * 1000:.1f} ms, "
+                                                   f"p99 {utils.percentile(self.latencies, 0.99) * 1000:.1f} ms, "
+                                                   f"max {self.latencies[-1] * 1000:.1f} ms"))
+        if self.paints:
+            durations = sorted(duration for _, duration in self.paints)
+            starts = [start for start, _ in self.paints]
+            longest_gap = max((b - a for a, b in zip(starts, starts[1:])), default=0.0)
+            rows.append(("frames", f"{len(self.paints):,} paints, {len(self.paints) / elapsed:.1f} fps"))
+            rows.append(("paint time", f"p50 {utils.percentile(durations, 0.5) * 1000:.2f} ms, "
+                                       f"p99 {utils.percentile(durations, 0.99) * 1000:.2f} ms, "
+                                       f"max {durations[-1] * 1000:.2f} ms"))
+            rows.append(("longest gap between frames", f"{longest_gap * 1000:.0f} ms"))
+        rows.append(("frames dropped by terminal", f"{self.dropped:,}"))
+        return rows
+
+
+class SessionReplay(QObject):
+    """
+    Plays a capture back on a worker thread, timed like the original (scaled by speed, 0 for
+    as fast as possible). RX bytes go through the framer exactly as the serial reader would
+    feed them: submit_rx(frames) gets the framer's output and submit_tx(data, timestamp) the
+    recorded commands. Timestamps are the replay times, so latencies can be measured.
+    """
+    progress = Signal(int)  # percent of the file replayed
+    finished = Signal()
+
+    def __init__(self, path, speed, framer, submit_rx, submit_tx, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.speed = speed
+        self.framer = framer
+        self.submit_rx = submit_rx
+        self.submit_tx = submit_tx
+        self.records = 0
+        self.rx_bytes = 0
+        self.source_duration = 0.0
+        self.elapsed = 0.0
+        self.error = None
+        self._cancelled = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _wait_until(self, due):
+        # Keep polling the framer while waiting, like the reader between reads
+        while not self._cancelled:
+            now = time.time()
+            frames = self.framer.poll(now)
+            if frames:
+                self.submit_rx(frames)
+            if now >= due:
+                return
+            time.sleep(min(POLL_INTERVAL_SEC, due - now))
+
+    def _run(self):
+        framer = self.framer
+        framer.reset()
+        file_size = max(os.path.getsize(self.path), 1)
+        last_percent = -1
+        first_time = None
+        start = time.time()
+        try:
+            for timestamp, direction, data, offset in read_capture(self.path):
+                if self._cancelled:
+                    break
+                if first_time is None:
+                    first_time = timestamp
+                self.source_duration = timestamp - first_time
+                if self.speed:
+                    self._wait_until(start + self.source_duration / self.speed)
+                now = time.time()
+                if direction == "RX":
+                    frames = framer.feed(data, now)
+                    if frames:
+                        self.submit_rx(frames)
+                    self.rx_bytes += len(data)
+                else:
+                    self.submit_tx(data, now)
+                self.records += 1
+                percent = offset * 100 // file_size
+                if percent != last_percent:
+                    last_percent = percent
+                    self.progress.emit(percent)
+            self.elapsed = time.time() - start
+            # Flush what the framer still holds (unterminated last line, partial frame)
+            self._wait_until(time.time() + 0.6)
+        except (OSError, ValueError) as e:
+            self.error = str(e)
+            self.elapsed = time.time() - start
+        self.finished.emit()
+
+
+class FrameTimer:
+    """Collects (start, duration) of every paint of a widget while attached"""
+
+    def __init__(self):
+        self.starts = array('d')
+        self.durations = array('d')
+
+    def add(self, start, duration):
+        self.starts.append(start)
+        self.durations.append(duration)
+
+    def samples(self):
+        return list(zip(self.starts, self.durations))
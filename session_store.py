@@ -0,0 +1,351 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from PySide6.QtGui import QColor
+from PySide6.QtCore import QObject, Signal
+import utils
+from terminal_widget import RepeatedLine, DIRECTION_RX, DIRECTION_TX, DIRECTION_LOCAL, DIRECTION_EXTERNAL
+
+# File layout: magic, zlib-compressed line blocks (oldest first), one chart block, a JSON footer
+# with the style table and block index, then TAIL (footer offset, footer length, magic).
+# Blocks can be decoded on their own, so the loader starts with the newest lines.
+SESSION_MAGIC = b"ATCMSES1"
+TAIL = struct.Struct("<QI8s")
+SESSION_FILE = utils.get_user_config_path("atcmder_session.bin")
+SESSION_DIRECTIONS = [DIRECTION_RX, DIRECTION_TX, DIRECTION_LOCAL, DIRECTION_EXTERNAL]
+BLOCK_LINES = 4000
+MAX_CHART_EVENTS = 10000
+DEFAULT_AUTOSAVE_SEC = 30
+NO_STYLE = 0xFFFF  # mark without a background color
+NO_RAW = 0xFFFFFFFF  # chart event without raw bytes
+
+# Section lengths of a line block, then the sections in this order
+BLOCK_HEADER = struct.Struct("<9I")
+
+
+class SessionSnapshot:
+    """
+    Copy of the terminal and chart state taken on the GUI thread, cheap enough to take
+    on a timer; write_session() then encodes it on a worker thread.
+    """
+
+    def __init__(self, terminal, chart_events, meta):
+        self.lines = list(terminal.lines)
+        if self.lines:
+            self.lines[-1] = list(self.lines[-1])  # the only line that is still mutated in place
+        self.times = list(terminal.line_times)
+        self.directions = list(terminal.line_directions)
+        self.lines_trimmed = terminal.lines_trimmed
+        self.repeats = {line_id: (array('d', repeat.times), list(repeat.texts) if repeat.texts else None)
+                        for line_id, repeat in terminal.line_repeats.items()}
+        self.highlights = dict(terminal.line_highlights)
+        self.chart_events = chart_events[-MAX_CHART_EVENTS:]  # (timestamp, direction, text, raw, lane)
+        self.meta = meta
+
+
+class StyleTable:
+    """QColor <-> style id; colors are stored as RGBA integers"""
+
+    def __init__(self, rgba=None):
+        self.rgba = list(rgba or [])
+        self.ids = {value: i for i, value in enumerate(self.rgba)}
+        self.colors = [QColor.fromRgba(value) for value in self.rgba]
+
+    def id_of(self, color):
+        value = color.rgba()
+        style_id = self.ids.get(value)
+        if style_id is None:
+            style_id = self.ids[value] = len(self.rgba)
+            self.rgba.append(value)
+        return style_id
+
+
+def _encode_block(snapshot, first, last, styles):
+    dirs = bytearray()
+    run_counts = array('I')
+    run_styles = array('H')
+    run_lengths = array('I')
+    texts = []
+    marks = array('I')     # line offset, start, end, background style, bold
+    repeat_index = array('I')  # line offset, occurrence count, number of texts
+    repeat_times = array('d')
+    repeat_texts = []
+    for offset, line_idx in enumerate(range(first, last)):
+        dirs.append(SESSION_DIRECTIONS.index(snapshot.directions[line_idx]))
+        line_parts = snapshot.lines[line_idx]
+        run_counts.append(len(line_parts))
+        for part, color in line_parts:
+            run_styles.append(styles.id_of(color))
+            run_lengths.append(len(part))
+            texts.append(part)
+        line_id = line_idx + snapshot.lines_trimmed
+        for start, end, background, bold in snapshot.highlights.get(line_id, ()):
+            marks.extend((offset, start, end, NO_STYLE if background is None else styles.id_of(background), bold))
+        repeat = snapshot.repeats.get(line_id)
+        if repeat is not None:
+            times, occurrence_texts = repeat
+            repeat_index.extend((offset, len(times), len(occurrence_texts) if occurrence_texts else 0))
+            repeat_times.extend(times)
+            if occurrence_texts:
+                repeat_texts.extend(occurrence_texts)
+    sections = [
+        array('d', snapshot.times[first:last]).tobytes(), bytes(dirs), run_counts.tobytes(),
+        run_styles.tobytes(), run_lengths.tobytes(), ''.join(texts).encode('utf-8', errors='replace'),
+        marks.tobytes(), repeat_index.tobytes() + repeat_times.tobytes(),
+        '\n'.join(repeat_texts).encode('utf-8', errors='replace'),
+    ]
+    # Repeat index and times share a section; the header splits it with the index length
+    header = BLOCK_HEADER.pack(*(len(section) for section in sections[:7]), len(repeat_index.tobytes()),
+                               len(sections[8]))
+    return zlib.compress(header + b''.join(sections), 1)
+
+
+def _decode_block(data, styles):
+    """(lines, texts, times, directions, {offset: RepeatedLine}, {offset: marks}) of one block"""
+    data = zlib.decompress(data)
+    sizes = BLOCK_HEADER.unpack_from(data)
+    pos = BLOCK_HEADER.size
+    chunks = []
+    for size in sizes[:7]:
+        chunks.append(data[pos:pos + size])
+        pos += size
+    repeat_index_bytes = data[pos:pos + sizes[7]]
+    pos += sizes[7]
+    text_pos = len(data) - sizes[8]
+    repeat_times_bytes = data[pos:text_pos]
+    repeat_texts = data[text_pos:].decode('utf-8', errors='replace').split('\n') if sizes[8] else []
+    times = array('d', chunks[0]).tolist()
+    directions = [SESSION_DIRECTIONS[code] for code in chunks[1]]
+    run_counts = array('I', chunks[2])
+    run_styles = array('H', chunks[3])
+    run_lengths = array('I', chunks[4])
+    text = chunks[5].decode('utf-8', errors='replace')
+    colors = styles.colors
+
+    lines = []
+    texts = []
+    run = 0
+    char = 0
+    for count in run_counts:
+        line_parts = []
+        line_start = char
+        for i in range(run, run + count):
+            length = run_lengths[i]
+            line_parts.append((text[char:char + length], colors[run_styles[i]]))
+            char += length
+        run += count
+        lines.append(line_parts)
+        texts.append(text[line_start:char])
+
+    highlights = {}
+    marks = array('I', chunks[6])
+    for i in range(0, len(marks), 5):
+        offset, start, end, background, bold = marks[i:i + 5]
+        highlights.setdefault(offset, []).append(
+            (start, end, None if background == NO_STYLE else colors[background], bool(bold)))
+
+    repeats = {}
+    repeat_index = array('I', repeat_index_bytes)
+    repeat_times = array('d', repeat_times_bytes)
+    time_pos = 0
+    text_pos = 0
+    for i in range(0, len(repeat_index), 3):
+        offset, count, text_count = repeat_index[i:i + 3]
+        repeat = RepeatedLine(repeat_times[time_pos])
+        repeat.times = repeat_times[time_pos:time_pos + count]
+        time_pos += count
+        if text_count:
+            repeat.texts = repeat_texts[text_pos:text_pos + text_count]
+            text_pos += text_count
+        repeats[offset] = repeat
+    return lines, texts, times, directions, repeats, highlights
+
+
+def _encode_chart(events):
+    times = array('d')
+    dirs = bytearray()
+    text_lengths = array('I')
+    raw_lengths = array('I')
+    texts = []
+    raws = []
+    lanes = bytearray()
+    lane_names = {}
+    for timestamp, direction, text, raw, lane in events:
+        lanes.append(lane_names.setdefault(lane, len(lane_names)))
+        times.append(timestamp)
+        dirs.append(SESSION_DIRECTIONS.index(direction) if direction in SESSION_DIRECTIONS else 0)
+        encoded = text.encode('utf-8', errors='replace')
+        text_lengths.append(len(encoded))
+        texts.append(encoded)
+        raw_lengths.append(NO_RAW if raw is None else len(raw))
+        if raw:
+            raws.append(bytes(raw))
+    # Lanes follow the raws, so files written before lanes existed still decode
+    names = json.dumps(list(lane_names)).encode('utf-8')
+    return zlib.compress(struct.pack("<I", len(events)) + times.tobytes() + bytes(dirs) + text_lengths.tobytes()
+                         + raw_lengths.tobytes() + b''.join(texts) + b''.join(raws)
+                         + struct.pack("<I", len(names)) + names + bytes(lanes), 1)
+
+
+def _decode_chart(data):
+    data = zlib.decompress(data)
+    count = struct.unpack_from("<I", data)[0]
+    pos = 4
+    times = array('d', data[pos:pos + 8 * count])
+    pos += 8 * count
+    dirs = data[pos:pos + count]
+    pos += count
+    text_lengths = array('I', data[pos:pos + 4 * count])
+    pos += 4 * count
+    raw_lengths = array('I', data[pos:pos + 4 * count])
+    pos += 4 * count
+    texts = []
+    for length in text_lengths:
+        texts.append(data[pos:pos + length].decode('utf-8', errors='replace'))
+        pos += length
+    raws = []
+    for length in raw_lengths:
+        raw = None
+        if length != NO_RAW:
+            raw = data[pos:pos + length]
+            pos += length
+        raws.append(raw)
+    lane_names = [None]
+    lanes = bytes(count)
+    if pos < len(data):
+        names_length = struct.unpack_from("<I", data, pos)[0]
+        pos += 4
+        lane_names = json.loads(data[pos:pos + names_length].decode('utf-8'))
+        pos += names_length
+        lanes = data[pos:pos + count]
+    return [(times[i], SESSION_DIRECTIONS[dirs[i]], texts[i], raws[i], lane_names[lanes[i]]) for i in range(count)]
+
+
+def write_session(path, snapshot):
+    """Encode a snapshot and replace the session file atomically (temp file, fsync, rename)"""
+    styles = StyleTable()
+    tmp_path = path + ".tmp"
+    blocks = []
+    with open(tmp_path, "wb") as f:
+        f.write(SESSION_MAGIC)
+        for first in range(0, len(snapshot.lines), BLOCK_LINES):
+            last = min(first + BLOCK_LINES, len(snapshot.lines))
+            data = _encode_block(snapshot, first, last, styles)
+            blocks.append([f.tell(), len(data), last - first])
+            f.write(data)
+        chart = _encode_chart(snapshot.chart_events)
+        chart_offset = f.tell()
+        f.write(chart)
+        footer = json.dumps({
+            "styles": styles.rgba,
+            "blocks": blocks,
+            "chart": [chart_offset, len(chart)],
+            "meta": snapshot.meta,
+        }).encode('utf-8')
+        footer_offset = f.tell()
+        f.write(footer)
+        f.write(TAIL.pack(footer_offset, len(footer), SESSION_MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_footer(f):
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    if size < len(SESSION_MAGIC) + TAIL.size:
+        raise ValueError("session file is truncated")
+    f.seek(0)
+    if f.read(len(SESSION_MAGIC)) != SESSION_MAGIC:
+        raise ValueError("not an AT Commander session file")
+    f.seek(size - TAIL.size)
+    footer_offset, footer_length, magic = TAIL.unpack(f.read(TAIL.size))
+    if magic != SESSION_MAGIC:
+        raise ValueError("session file is truncated")
+    f.seek(footer_offset)
+    return json.loads(f.read(footer_length).decode('utf-8'))
+
+
+class SessionLoader(QObject):
+    """
+    Reads a session file on a worker thread: the chart events first, then the line blocks
+    newest first, so the latest history shows up right away and older lines stream in above it.
+    """
+    chart_loaded = Signal(list)
+    block_loaded = Signal(object)  # _decode_block() result
+    finished = Signal(dict)        # the saved meta data
+
+    def __init__(self, path, max_lines, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.max_lines = max_lines
+        self.lines_loaded = 0
+        self.error = None
+        self.cancelled = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _run(self):
+        meta = {}
+        try:
+            with open(self.path, "rb") as f:
+                footer = read_footer(f)
+                meta = footer.get("meta", {})
+                styles = StyleTable(footer["styles"])
+                chart_offset, chart_length = footer["chart"]
+                f.seek(chart_offset)
+                self.chart_loaded.emit(_decode_chart(f.read(chart_length)))
+                for offset, length, count in reversed(footer["blocks"]):
+                    if self.cancelled or self.lines_loaded >= self.max_lines:
+                        break
+                    f.seek(offset)
+                    self.block_loaded.emit(_decode_block(f.read(length), styles))
+                    self.lines_loaded += count
+        except (OSError, ValueError, KeyError, zlib.error, struct.error) as e:
+            self.error = str(e)
+        self.finished.emit(meta)
+
+
+class SessionAutosaver:
+    """Writes snapshots on a worker thread, one at a time; save() skips if one is in flight"""
+
+    def __init__(self, path):
+        self.path = path
+        self.last_saved = 0.0
+        self.error = None
+        self._thread = None
+
+    def busy(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def save(self, snapshot):
+        if self.busy():
+            return False
+        self._thread = threading.Thread(target=self._write, args=(snapshot,), daemon=True)
+        self._thread.start()
+        return True
+
+    def save_now(self, snapshot):
+        """Blocking save, after any autosave in flight (used on exit)"""
+        if self._thread is not None:
+            self._thread.join()
+        self._write(snapshot)
+
+    def _write(self, snapshot):
+        try:
+            write_session(self.path, snapshot)
+            self.last_saved = time.time()
+            self.error = None
+        except OSError as e:
+            self.error = str(e)
+            print(f"Warning: Could not save session: {e}")
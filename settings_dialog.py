@@ -3,11 +3,26 @@ import yaml
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QWidget,
     QGroupBox, QFormLayout, QFontComboBox, QSpinBox, QCheckBox,
-    QPushButton, QComboBox, QLabel, QMessageBox, QLineEdit, QFileDialog
+    QPushButton, QComboBox, QLabel, QMessageBox, QLineEdit, QFileDialog,
+    QTableWidget, QTableWidgetItem, QHeaderView, QColorDialog, QDoubleSpinBox
 )
 from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QFont, QKeySequence 
+from PySide6.QtGui import QFont, QKeySequence, QColor
 import utils
+from highlight_rules import DEFAULT_HIGHLIGHT_RULES, HighlightEngine, parse_color
+from framers import FRAMING_MODES, FRAMING_LINE, FRAMING_LENGTH_PREFIX, FRAMING_TIMING, DEFAULT_FRAME_GAP_CHARS
+from control_api import default_address
+from session_store import DEFAULT_AUTOSAVE_SEC
+from sequence_chart import DEFAULT_EVENT_BUDGET_MB, DEFAULT_COALESCE_IDLE_MS
+
+# Length prefix choices: (label, bytes, byteorder)
+LENGTH_PREFIX_FORMATS = [
+    ("1 byte", 1, 'big'),
+    ("2 bytes, big endian", 2, 'big'),
+    ("2 bytes, little endian", 2, 'little'),
+    ("4 bytes, big endian", 4, 'big'),
+    ("4 bytes, little endian", 4, 'little'),
+]
 
 SETTINGS_PATH = os.path.join(
     os.path.dirname(__file__), "resources", "atcmder_settings.yaml"
@@ -53,10 +68,45 @@ class SerialTab(QWidget):
 
         serial_group.setLayout(form_layout)
         layout.addWidget(serial_group)
+
+        framing_group = QGroupBox("RX Framing")
+        framing_layout = QFormLayout()
+
+        self.framing_combo = QComboBox()
+        self.framing_combo.addItems(FRAMING_MODES)
+        self.framing_combo.setToolTip("How received bytes are split into frames.\n"
+                                      "Line: text lines with ANSI colors. Binary frames are shown in hex.")
+        self.framing_combo.currentTextChanged.connect(self.update_framing_options)
+        framing_layout.addRow("Framing:", self.framing_combo)
+
+        self.frame_gap_spin = QDoubleSpinBox()
+        self.frame_gap_spin.setRange(1.0, 1000.0)
+        self.frame_gap_spin.setDecimals(1)
+        self.frame_gap_spin.setSingleStep(0.5)
+        self.frame_gap_spin.setSuffix(" chars")
+        self.frame_gap_spin.setToolTip("Silence that ends a frame, in character times at the current baudrate (Modbus RTU: 3.5).")
+        framing_layout.addRow("Frame gap:", self.frame_gap_spin)
+
+        self.length_prefix_combo = QComboBox()
+        self.length_prefix_combo.addItems([label for label, _, _ in LENGTH_PREFIX_FORMATS])
+        framing_layout.addRow("Length field:", self.length_prefix_combo)
+
+        self.length_includes_header_check = QCheckBox("Length includes the length field")
+        framing_layout.addRow("", self.length_includes_header_check)
+
+        framing_group.setLayout(framing_layout)
+        layout.addWidget(framing_group)
         layout.addStretch()
         self.setLayout(layout)
 
         self.refresh_ports()
+        self.update_framing_options()
+
+    def update_framing_options(self, *args):
+        mode = self.framing_combo.currentText()
+        self.frame_gap_spin.setEnabled(mode == FRAMING_TIMING)
+        self.length_prefix_combo.setEnabled(mode == FRAMING_LENGTH_PREFIX)
+        self.length_includes_header_check.setEnabled(mode == FRAMING_LENGTH_PREFIX)
 
     def refresh_ports(self):
         current_port = self.port_combo.currentText()
@@ -89,6 +139,17 @@ class SerialTab(QWidget):
         else:
             self.flow_control_combo.setCurrentIndex(0)
 
+        framing = serial_settings.get('framing', FRAMING_LINE)
+        self.framing_combo.setCurrentText(framing if framing in FRAMING_MODES else FRAMING_LINE)
+        self.frame_gap_spin.setValue(float(serial_settings.get('frame_gap_chars', DEFAULT_FRAME_GAP_CHARS)))
+        prefix = (int(serial_settings.get('length_prefix_bytes', 2)), serial_settings.get('length_prefix_byteorder', 'big'))
+        for i, (_, size, byteorder) in enumerate(LENGTH_PREFIX_FORMATS):
+            if (size, byteorder) == prefix or (size == 1 and prefix[0] == 1):
+                self.length_prefix_combo.setCurrentIndex(i)
+                break
+        self.length_includes_header_check.setChecked(bool(serial_settings.get('length_includes_header', False)))
+        self.update_framing_options()
+
     def save_settings(self, settings):
         settings.setdefault('serial', {})
         settings['serial']['port'] = self.port_combo.currentText()
@@ -98,6 +159,12 @@ class SerialTab(QWidget):
             settings['serial']['baudrate'] = 115200
         settings['serial']['parity'] = self.parity_combo.currentText()
         settings['serial']['flow_control'] = self.flow_control_combo.currentText()
+        settings['serial']['framing'] = self.framing_combo.currentText()
+        settings['serial']['frame_gap_chars'] = self.frame_gap_spin.value()
+        _, size, byteorder = LENGTH_PREFIX_FORMATS[self.length_prefix_combo.currentIndex()]
+        settings['serial']['length_prefix_bytes'] = size
+        settings['serial']['length_prefix_byteorder'] = byteorder
+        settings['serial']['length_includes_header'] = self.length_includes_header_check.isChecked()
 
 class OutputTab(QWidget):
     def __init__(self):
@@ -149,6 +216,40 @@ class OutputTab(QWidget):
         self.show_time_check = QCheckBox("Show Output Time")
         output_layout.addRow(self.show_time_check)
 
+        self.time_format_combo = QComboBox()
+        self.time_format_combo.addItems(["Absolute", "Delta to previous line"])
+        self.time_format_combo.setToolTip("Show the time of each line or the time elapsed since the previous line")
+        output_layout.addRow("Time Format:", self.time_format_combo)
+
+        self.show_direction_check = QCheckBox("Show Direction (RX/TX)")
+        output_layout.addRow(self.show_direction_check)
+
+        self.adaptive_threshold_spin = QSpinBox()
+        self.adaptive_threshold_spin.setRange(0, 1000000)
+        self.adaptive_threshold_spin.setSingleStep(500)
+        self.adaptive_threshold_spin.setSuffix(" lines/s")
+        self.adaptive_threshold_spin.setSpecialValueText("Disabled")
+        self.adaptive_threshold_spin.setMinimumWidth(120)
+        self.adaptive_threshold_spin.setToolTip("Above this output rate the terminal renders at a reduced frame rate until the burst ends")
+        output_layout.addRow("Throttle Rendering Above:", self.adaptive_threshold_spin)
+
+        self.collapse_repeats_check = QCheckBox("Collapse Repeated Lines")
+        self.collapse_repeats_check.setToolTip("Show consecutive identical lines once with a repeat count")
+        output_layout.addRow(self.collapse_repeats_check)
+
+        self.collapse_ignore_edit = QLineEdit()
+        self.collapse_ignore_edit.setPlaceholderText(r"e.g. \d+ to ignore numbers")
+        self.collapse_ignore_edit.setToolTip("Regex removed from lines before comparing them, so counters or timestamps don't break a repeat")
+        output_layout.addRow("Ignore When Comparing:", self.collapse_ignore_edit)
+
+        self.keep_cr_frames_spin = QSpinBox()
+        self.keep_cr_frames_spin.setRange(0, 100000)
+        self.keep_cr_frames_spin.setSpecialValueText("Final state only")
+        self.keep_cr_frames_spin.setMinimumWidth(120)
+        self.keep_cr_frames_spin.setToolTip("Lines rewritten with a carriage return (progress bars) keep only their final state; "
+                                            "set N to also keep every Nth intermediate frame as its own line")
+        output_layout.addRow("Keep Every Nth \\r Frame:", self.keep_cr_frames_spin)
+
         output_group.setLayout(output_layout)
         layout.addWidget(output_group)
 
@@ -231,6 +332,13 @@ class OutputTab(QWidget):
         # Load output window settings
         self.line_number_check.setChecked(settings.get('output_window', {}).get('show_line_numbers', False))
         self.show_time_check.setChecked(settings.get('output_window', {}).get('show_time', False))
+        time_format = settings.get('output_window', {}).get('time_format', 'absolute')
+        self.time_format_combo.setCurrentIndex(1 if time_format == 'delta' else 0)
+        self.show_direction_check.setChecked(settings.get('output_window', {}).get('show_direction', False))
+        self.adaptive_threshold_spin.setValue(settings.get('output_window', {}).get('adaptive_render_threshold', 1000))
+        self.collapse_repeats_check.setChecked(settings.get('output_window', {}).get('collapse_repeats', False))
+        self.collapse_ignore_edit.setText(settings.get('output_window', {}).get('collapse_ignore_pattern', ''))
+        self.keep_cr_frames_spin.setValue(settings.get('output_window', {}).get('keep_cr_frames', 0))
         
         # Load history settings
         import utils
@@ -260,6 +368,12 @@ class OutputTab(QWidget):
         # Save output window settings
         settings['output_window']['show_line_numbers'] = self.line_number_check.isChecked()
         settings['output_window']['show_time'] = self.show_time_check.isChecked()
+        settings['output_window']['time_format'] = 'delta' if self.time_format_combo.currentIndex() == 1 else 'absolute'
+        settings['output_window']['show_direction'] = self.show_direction_check.isChecked()
+        settings['output_window']['adaptive_render_threshold'] = self.adaptive_threshold_spin.value()
+        settings['output_window']['collapse_repeats'] = self.collapse_repeats_check.isChecked()
+        settings['output_window']['collapse_ignore_pattern'] = self.collapse_ignore_edit.text()
+        settings['output_window']['keep_cr_frames'] = self.keep_cr_frames_spin.value()
         
         # Save history settings
         import utils
@@ -326,10 +440,52 @@ class GeneralTab(QWidget):
         self.ext_cmd_edit = QLineEdit()
         self.ext_cmd_edit.setPlaceholderText("Enter shell command here...")
         cmd_layout.addWidget(self.ext_cmd_edit)
+
+        self.ext_cmd_pipe_check = QCheckBox("Pipe serial RX into the command's stdin")
+        self.ext_cmd_pipe_check.setToolTip("Feed received bytes to the running command (e.g. a log decoder) "
+                                           "and show its output as the external stream.\n"
+                                           "Click the command button again to stop it.")
+        cmd_layout.addWidget(self.ext_cmd_pipe_check)
         
         cmd_group.setLayout(cmd_layout)
         layout.addWidget(cmd_group)
 
+        # Control API for test automation
+        api_group = QGroupBox("Control API")
+        api_layout = QVBoxLayout()
+
+        self.control_api_check = QCheckBox("Enable local JSON-RPC control API")
+        api_layout.addWidget(self.control_api_check)
+        self.control_api_address_edit = QLineEdit()
+        self.control_api_address_edit.setPlaceholderText(default_address())
+        self.control_api_address_edit.setToolTip("Unix socket path, or host:port for TCP on this machine (127.0.0.1, ::1 or localhost).\n"
+                                                 "Leave blank for the default.")
+        api_layout.addWidget(self.control_api_address_edit)
+        api_info = QLabel("Newline-delimited JSON-RPC 2.0: connect, disconnect, send, run_sequence, run_group, "
+                          "wait_for, read_scrollback, subscribe.")
+        api_info.setStyleSheet("color: #777; font-size: 11px;")
+        api_info.setWordWrap(True)
+        api_layout.addWidget(api_info)
+
+        api_group.setLayout(api_layout)
+        layout.addWidget(api_group)
+
+        # Session persistence across restarts
+        session_group = QGroupBox("Session")
+        session_layout = QFormLayout()
+        session_layout.setLabelAlignment(Qt.AlignLeft)
+        self.session_persist_check = QCheckBox("Restore scrollback, search and sequence chart on startup")
+        self.session_persist_check.setToolTip("The session is saved on exit and restored in the background on the next start")
+        session_layout.addRow(self.session_persist_check)
+        self.session_autosave_spin = QSpinBox()
+        self.session_autosave_spin.setRange(0, 3600)
+        self.session_autosave_spin.setSuffix(" s")
+        self.session_autosave_spin.setSpecialValueText("Off")
+        self.session_autosave_spin.setToolTip("Crash-safe autosave interval; only saves when something changed")
+        session_layout.addRow("Autosave every:", self.session_autosave_spin)
+        session_group.setLayout(session_layout)
+        layout.addWidget(session_group)
+
         layout.addStretch()
         self.setLayout(layout)
 
@@ -344,12 +500,161 @@ class GeneralTab(QWidget):
         self.save_dir_edit.setText(general.get('save_directory', ''))
         self.auto_save_check.setChecked(general.get('auto_save_enabled', False))
         self.ext_cmd_edit.setText(general.get('external_command', ''))
+        self.ext_cmd_pipe_check.setChecked(general.get('external_command_pipe_rx', False))
+        self.control_api_check.setChecked(general.get('control_api_enabled', False))
+        self.control_api_address_edit.setText(general.get('control_api_address', ''))
+        self.session_persist_check.setChecked(general.get('session_persist', True))
+        self.session_autosave_spin.setValue(general.get('session_autosave_sec', DEFAULT_AUTOSAVE_SEC))
 
     def save_settings(self, settings):
         settings.setdefault('general', {})
         settings['general']['save_directory'] = self.save_dir_edit.text().strip()
         settings['general']['auto_save_enabled'] = self.auto_save_check.isChecked()
         settings['general']['external_command'] = self.ext_cmd_edit.text().strip()
+        settings['general']['external_command_pipe_rx'] = self.ext_cmd_pipe_check.isChecked()
+        settings['general']['control_api_enabled'] = self.control_api_check.isChecked()
+        settings['general']['control_api_address'] = self.control_api_address_edit.text().strip()
+        settings['general']['session_persist'] = self.session_persist_check.isChecked()
+        settings['general']['session_autosave_sec'] = self.session_autosave_spin.value()
+
+class HighlightTab(QWidget):
+    PATTERN_COL, FOREGROUND_COL, BACKGROUND_COL, BOLD_COL, IGNORE_CASE_COL = range(5)
+
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout()
+
+        rules_group = QGroupBox("Highlight Rules")
+        rules_layout = QVBoxLayout()
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Pattern (regex)", "Foreground", "Background", "Bold", "Ignore Case"])
+        self.table.horizontalHeader().setSectionResizeMode(self.PATTERN_COL, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.itemChanged.connect(self.on_item_changed)
+        self.table.cellDoubleClicked.connect(self.on_cell_double_clicked)
+        rules_layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        add_btn = QPushButton("Add")
+        add_btn.clicked.connect(lambda: self.add_rule({'pattern': '', 'foreground': '#ff5555'}))
+        remove_btn = QPushButton("Remove")
+        remove_btn.clicked.connect(self.remove_rule)
+        up_btn = QPushButton("Up")
+        up_btn.clicked.connect(lambda: self.move_rule(-1))
+        down_btn = QPushButton("Down")
+        down_btn.clicked.connect(lambda: self.move_rule(1))
+        btn_layout.addWidget(add_btn)
+        btn_layout.addWidget(remove_btn)
+        btn_layout.addWidget(up_btn)
+        btn_layout.addWidget(down_btn)
+        btn_layout.addStretch()
+        rules_layout.addLayout(btn_layout)
+
+        info_label = QLabel("Lines are colored when they are complete. Rules are tried in order; double-click a color to pick it.")
+        info_label.setStyleSheet("color: #777; font-size: 11px;")
+        info_label.setWordWrap(True)
+        rules_layout.addWidget(info_label)
+
+        rules_group.setLayout(rules_layout)
+        layout.addWidget(rules_group)
+        self.setLayout(layout)
+
+    def add_rule(self, rule, row=None):
+        if row is None:
+            row = self.table.rowCount()
+        self.table.blockSignals(True)
+        self.table.insertRow(row)
+        self.table.setItem(row, self.PATTERN_COL, QTableWidgetItem(rule.get('pattern', '')))
+        for col, key in ((self.FOREGROUND_COL, 'foreground'), (self.BACKGROUND_COL, 'background')):
+            self.table.setItem(row, col, QTableWidgetItem(rule.get(key) or ''))
+        for col, key in ((self.BOLD_COL, 'bold'), (self.IGNORE_CASE_COL, 'ignore_case')):
+            item = QTableWidgetItem()
+            item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+            item.setCheckState(Qt.Checked if rule.get(key) else Qt.Unchecked)
+            self.table.setItem(row, col, item)
+        self.table.blockSignals(False)
+        for col in (self.FOREGROUND_COL, self.BACKGROUND_COL):
+            self.on_item_changed(self.table.item(row, col))
+        self.validate_patterns()
+
+    def remove_rule(self):
+        row = self.table.currentRow()
+        if row >= 0:
+            self.table.removeRow(row)
+            self.validate_patterns()
+
+    def move_rule(self, step):
+        row = self.table.currentRow()
+        target = row + step
+        if row < 0 or not (0 <= target < self.table.rowCount()):
+            return
+        rule = self.rule_at(row)
+        self.table.removeRow(row)
+        self.add_rule(rule, target)
+        self.table.setCurrentCell(target, self.PATTERN_COL)
+
+    def rule_at(self, row):
+        return {
+            'pattern': self.table.item(row, self.PATTERN_COL).text(),
+            'foreground': self.table.item(row, self.FOREGROUND_COL).text().strip(),
+            'background': self.table.item(row, self.BACKGROUND_COL).text().strip(),
+            'bold': self.table.item(row, self.BOLD_COL).checkState() == Qt.Checked,
+            'ignore_case': self.table.item(row, self.IGNORE_CASE_COL).checkState() == Qt.Checked,
+        }
+
+    def on_item_changed(self, item):
+        """Flag invalid patterns and show color swatches"""
+        if item is None:
+            return
+        if item.column() == self.PATTERN_COL:
+            self.validate_patterns()
+            return
+        self.table.blockSignals(True)
+        if item.column() in (self.FOREGROUND_COL, self.BACKGROUND_COL):
+            color = parse_color(item.text().strip())
+            item.setBackground(color if color is not None else QColor(0, 0, 0, 0))
+        self.table.blockSignals(False)
+
+    def validate_patterns(self):
+        """Flag the patterns the highlight engine would leave out, checked the same way"""
+        rows = [row for row in range(self.table.rowCount())
+                if self.table.item(row, self.PATTERN_COL) is not None]
+        engine = HighlightEngine([{'pattern': self.table.item(row, self.PATTERN_COL).text()}
+                                  for row in rows])
+        errors = {rows[position]: error for position, error in zip(engine.rejected, engine.errors)}
+        self.table.blockSignals(True)
+        for row in rows:
+            item = self.table.item(row, self.PATTERN_COL)
+            if row in errors:
+                item.setForeground(QColor(220, 50, 50))
+                # Engine errors read "pattern: message"
+                item.setToolTip(f"Invalid regex: {errors[row][len(item.text()) + 2:]}")
+            else:
+                item.setForeground(QColor())
+                item.setToolTip("")
+        self.table.blockSignals(False)
+
+    def on_cell_double_clicked(self, row, col):
+        if col not in (self.FOREGROUND_COL, self.BACKGROUND_COL):
+            return
+        item = self.table.item(row, col)
+        initial = parse_color(item.text().strip()) or QColor(255, 255, 255)
+        color = QColorDialog.getColor(initial, self, "Select Color")
+        if color.isValid():
+            item.setText(color.name())
+
+    def load_settings(self, settings):
+        self.table.setRowCount(0)
+        for rule in settings.get('highlight_rules', DEFAULT_HIGHLIGHT_RULES):
+            if isinstance(rule, dict):
+                self.add_rule(rule)
+
+    def save_settings(self, settings):
+        settings['highlight_rules'] = [
+            rule for rule in (self.rule_at(row) for row in range(self.table.rowCount()))
+            if rule['pattern']
+        ]
 
 class WindowsTab(QWidget):
     def __init__(self, parent_dialog=None):
@@ -407,7 +712,34 @@ class WindowsTab(QWidget):
         
         hex_mode_group.setLayout(hex_mode_layout)
         layout.addWidget(hex_mode_group)
-        
+
+        # Sequence Chart settings
+        chart_group = QGroupBox("Sequence Chart")
+        chart_layout = QFormLayout()
+        self.chart_budget_spin = QSpinBox()
+        self.chart_budget_spin.setRange(1, 1024)
+        self.chart_budget_spin.setSuffix(" MB")
+        self.chart_budget_spin.setToolTip("TX/RX events are recorded even while the chart is closed; "
+                                          "the oldest are dropped beyond this size")
+        chart_layout.addRow("Event memory:", self.chart_budget_spin)
+        self.chart_retention_spin = QSpinBox()
+        self.chart_retention_spin.setRange(0, 10080)
+        self.chart_retention_spin.setSuffix(" min")
+        self.chart_retention_spin.setSpecialValueText("Until memory is full")
+        chart_layout.addRow("Keep events for:", self.chart_retention_spin)
+        self.chart_coalesce_check = QCheckBox("Group RX lines between commands into one message")
+        self.chart_coalesce_check.setToolTip("Double-click a group in the chart to expand it")
+        chart_layout.addRow(self.chart_coalesce_check)
+        self.chart_idle_gap_spin = QSpinBox()
+        self.chart_idle_gap_spin.setRange(0, 60000)
+        self.chart_idle_gap_spin.setSingleStep(100)
+        self.chart_idle_gap_spin.setSuffix(" ms")
+        self.chart_idle_gap_spin.setSpecialValueText("Only at commands")
+        self.chart_idle_gap_spin.setToolTip("Also start a new group after RX has been idle this long")
+        chart_layout.addRow("Split groups after idle:", self.chart_idle_gap_spin)
+        chart_group.setLayout(chart_layout)
+        layout.addWidget(chart_group)
+
         layout.addStretch()
         self.setLayout(layout)
     
@@ -417,6 +749,12 @@ class WindowsTab(QWidget):
         
         # Load Keep HEX mode setting
         self.keep_hex_mode_check.setChecked(settings.get('keep_hex_mode', False))
+
+        chart = settings.get('sequence_chart', {})
+        self.chart_budget_spin.setValue(chart.get('event_budget_mb', DEFAULT_EVENT_BUDGET_MB))
+        self.chart_retention_spin.setValue(chart.get('retention_min', 0))
+        self.chart_coalesce_check.setChecked(chart.get('coalesce_rx', False))
+        self.chart_idle_gap_spin.setValue(chart.get('coalesce_idle_ms', DEFAULT_COALESCE_IDLE_MS))
         
         # Load Command Group count
         try:
@@ -440,6 +778,13 @@ class WindowsTab(QWidget):
         
         # Save Keep HEX mode setting
         settings['keep_hex_mode'] = self.keep_hex_mode_check.isChecked()
+
+        settings['sequence_chart'] = {
+            'event_budget_mb': self.chart_budget_spin.value(),
+            'retention_min': self.chart_retention_spin.value(),
+            'coalesce_rx': self.chart_coalesce_check.isChecked(),
+            'coalesce_idle_ms': self.chart_idle_gap_spin.value(),
+        }
         
         # Save Command Group count and update UI
         new_count = self.command_group_spin.value()
@@ -476,12 +821,14 @@ class SettingsDialog(QDialog):
         self.serial_tab = SerialTab()
         self.general_tab = GeneralTab()
         self.output_tab = OutputTab()
+        self.highlight_tab = HighlightTab()
         self.windows_tab = WindowsTab(self)  # Pass parent dialog reference
         
         # Add tabs
         self.tab_widget.addTab(self.serial_tab, "Serial")
         self.tab_widget.addTab(self.general_tab, "General")
         self.tab_widget.addTab(self.output_tab, "Terminal")
+        self.tab_widget.addTab(self.highlight_tab, "Highlight")
         self.tab_widget.addTab(self.windows_tab, "Window")
         
         layout.addWidget(self.tab_widget)
@@ -574,6 +921,7 @@ class SettingsDialog(QDialog):
         self.serial_tab.load_settings(settings)
         self.general_tab.load_settings(settings)
         self.output_tab.load_settings(settings)
+        self.highlight_tab.load_settings(settings)
         self.windows_tab.load_settings(settings)
         
         return settings
@@ -587,6 +935,7 @@ class SettingsDialog(QDialog):
         self.serial_tab.save_settings(self.settings)
         self.general_tab.save_settings(self.settings)
         self.output_tab.save_settings(self.settings)
+        self.highlight_tab.save_settings(self.settings)
         self.windows_tab.save_settings(self.settings)
         
         try:
@@ -634,6 +983,7 @@ class SettingsDialog(QDialog):
             # Update settings from tabs first
             self.general_tab.save_settings(self.settings)
             self.output_tab.save_settings(self.settings)
+            self.highlight_tab.save_settings(self.settings)
             self.windows_tab.save_settings(self.settings)
             
             # Save to file
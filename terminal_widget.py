@@ -1,12 +1,87 @@
 from PySide6.QtWidgets import QAbstractScrollArea, QSizePolicy, QMenu
 from PySide6.QtGui import QPainter, QColor, QFont, QFontMetrics, QPalette, QGuiApplication, QDesktopServices
 from PySide6.QtCore import Qt, QTimer, QUrl, QRect, Signal
+import operator
 import re
+import time
 import unicodedata
+from array import array
+from bisect import bisect_left
+from itertools import compress
+import utils
+from highlight_rules import HighlightEngine
 MAX_TERMINAL_LINES = 100000
 
+# Per-line direction tags stored alongside each scrollback line
+DIRECTION_RX = "RX"
+DIRECTION_TX = "TX"
+DIRECTION_LOCAL = "LOCAL"
+DIRECTION_EXTERNAL = "EXT"
+
+DIRECTION_LABELS = {
+    DIRECTION_RX: "RX",
+    DIRECTION_TX: "TX",
+    DIRECTION_LOCAL: "--",
+    DIRECTION_EXTERNAL: "EX",
+}
+DIRECTION_COLORS = {
+    DIRECTION_RX: QColor(120, 170, 230),
+    DIRECTION_TX: QColor(120, 200, 120),
+    DIRECTION_LOCAL: QColor(110, 110, 110),
+    DIRECTION_EXTERNAL: QColor(17, 168, 205),
+}
+
+TIMESTAMP_MODE_ABSOLUTE = "absolute"
+TIMESTAMP_MODE_DELTA = "delta"
+
+# Adaptive rendering: above the line rate threshold the terminal keeps ingesting at full speed
+# but only repaints every FLOOD_FRAME_INTERVAL_MS until the burst is over
+DEFAULT_ADAPTIVE_THRESHOLD = 1000  # lines per second, 0 disables adaptive rendering
+FRAME_INTERVAL_MS = 16
+FLOOD_FRAME_INTERVAL_MS = 250
+RATE_WINDOW_SEC = 0.25
+FLOOD_EXIT_SEC = 1.0
+
+REPEAT_MARK_COLOR = QColor(150, 150, 150)
+
+# Controls that rewrite the current line in place: carriage return and EL (erase in line)
+LINE_CONTROL_PATTERN = re.compile(r'\r|\x1b\[[012]?K')
+
+class RepeatedLine:
+    """Consecutive repeats folded into one scrollback line"""
+    __slots__ = ("times", "texts")
+
+    def __init__(self, first_time):
+        self.times = array('d', [first_time])  # time of every occurrence, first one included
+        self.texts = None  # text of every occurrence, only kept once an occurrence differs
+
+    @property
+    def count(self):
+        return len(self.times)
+
+    @property
+    def first_time(self):
+        return self.times[0]
+
+    @property
+    def last_time(self):
+        return self.times[-1]
+
+    def add(self, timestamp, text, first_text):
+        if self.texts is None and text != first_text:
+            self.texts = [first_text] * len(self.times)
+        self.times.append(timestamp)
+        if self.texts is not None:
+            self.texts.append(text)
+
+    def occurrences(self, first_text):
+        """(timestamp, text) of every occurrence"""
+        texts = self.texts if self.texts is not None else [first_text] * len(self.times)
+        return zip(self.times, texts)
+
 class TerminalWidget(QAbstractScrollArea):
     request_paste = Signal()
+    catching_up_changed = Signal(bool)
     def __init__(self, parent=None, font_family="Monaco", font_size=14):
         super().__init__(parent)
         
@@ -45,6 +120,28 @@ class TerminalWidget(QAbstractScrollArea):
         # Use consistent character width for monospace font (for Latin characters)
         self.char_width = self.font_metrics.horizontalAdvance('M')
         self.lines = []
+        # Per-line metadata, kept parallel to self.lines
+        self.line_times = []       # epoch seconds, non-decreasing so it can be bisected
+        self.line_directions = []  # one of the DIRECTION_* tags
+        self.line_texts = []       # plain text of finished lines (all but the last one)
+        # Lines dropped from the top, less restored lines added above; line_idx + lines_trimmed is
+        # a stable line id (negative for lines restored from a saved session)
+        self.lines_trimmed = 0
+        self._max_line_width = 0   # widest finished line in pixels, for the horizontal scrollbar
+        self._max_line_width_font = None
+        # Repeated-line collapsing: stable line id -> RepeatedLine, in id order
+        self.collapse_repeats = False
+        self.repeat_normalize = None
+        self.line_repeats = {}
+        # Highlight rules: applied once when a line is finished; background/bold marks by stable line id
+        self.highlighter = None
+        self.line_highlights = {}
+        self._bold_font_cache = None
+        # Carriage return overwrite: column the next text is written at on the last line
+        # (None appends), and how many \r frames to skip before one is kept as its own line
+        self._write_col = None
+        self._cr_frames = 0
+        self.keep_cr_every = 0
         self.scroll_offset = 0
         self.auto_scroll = True 
 
@@ -58,6 +155,7 @@ class TerminalWidget(QAbstractScrollArea):
             97: QColor(255, 255, 255),
         }
         self.default_color = QColor(200, 200, 200)
+        self.background_color = QColor(30, 30, 30)
         self.current_color = self.default_color
 
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
@@ -65,17 +163,25 @@ class TerminalWidget(QAbstractScrollArea):
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         self.setAutoFillBackground(True)
         palette = self.palette()
-        palette.setColor(QPalette.ColorRole.Base, QColor(30, 30, 30))
+        palette.setColor(QPalette.ColorRole.Base, self.background_color)
         self.setPalette(palette)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         # Fast rendering with QTimer
         self._update_pending = False
         self._update_timer = QTimer(self)
-        self._update_timer.setInterval(16)  # 60fps
+        self._update_timer.setInterval(FRAME_INTERVAL_MS)  # 60fps
         self._update_timer.timeout.connect(self._do_update)
         self._update_timer.start()
 
+        # Adaptive rendering under RX floods
+        self.adaptive_threshold = DEFAULT_ADAPTIVE_THRESHOLD
+        self.catching_up = False
+        self.frame_timer = None  # set to a FrameTimer to measure paints (session replay report)
+        self._rate_window_start = time.monotonic()
+        self._rate_window_lines = 0
+        self._last_flood_time = 0.0
+
         # Block selection variables
         self.selection_start = None  # (line, col)
         self.selection_end = None    # (line, col)
@@ -94,8 +200,17 @@ class TerminalWidget(QAbstractScrollArea):
         self.horizontalScrollBar().setRange(0, 1)
 
         self.search_text = ""
+        self.search_case_sensitive = False
         self.search_matches = []
         self.search_index = -1
+
+        # Filter view: sorted stable ids (line_idx + lines_trimmed) of finished lines that match.
+        # The last line is still growing and is matched on the fly.
+        self.filter_active = False
+        self.filter_include = None
+        self.filter_exclude = None
+        self.filter_directions = None
+        self.filter_index = []
         
         # Line number settings
         self.show_line_numbers = False
@@ -104,10 +219,12 @@ class TerminalWidget(QAbstractScrollArea):
         self._line_number_digit_count = 0
         self._last_line_count = 0
         
-        # Timestamp settings
+        # Timestamp / direction gutter settings
         self.show_timestamps = False
+        self.show_directions = False
+        self.timestamp_mode = TIMESTAMP_MODE_ABSOLUTE
         self.timestamp_width = 0
-        self.timestamp_padding = 4  # Padding between timestamp and text
+        self.timestamp_padding = 10  # Padding between timestamp gutter and text
 
         # URL detection
         self.url_pattern = re.compile(r'((?:https?|ftp)://[^\s<>"\)]+)')
@@ -150,73 +267,52 @@ class TerminalWidget(QAbstractScrollArea):
             self.cursor_col = 0
         self.viewport().update()
 
-    def append_text(self, text, timestamp=None):
-        """Add text to terminal with optional timestamp"""
+    def append_text(self, text, timestamp=None, direction=DIRECTION_LOCAL):
+        """Add text to terminal, tagging new lines with timestamp and direction metadata"""
         if not text:
             return
 
-        # Enable a setting to ensure the scrollbar is always shown.
-        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
-        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+        if not self.catching_up:
+            # Enable a setting to ensure the scrollbar is always shown.
+            self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+            self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
 
-        # Record the current line count (before adding text)
-        lines_before = len(self.lines)
+        # Record the current row count (before adding text)
+        rows_before = self._row_count()
         last_line_length_before = len(self._line_text(self.lines[-1])) if self.lines else 0
 
-        # Handle ANSI cursor home (ESC[H])
-        cursor_home_pattern = re.compile(r'\x1B\[H')
-        if cursor_home_pattern.search(text):
-            # Move cursor to the top-left (0, 0)
-            self.cursor_line = 0
-            self.cursor_col = 0
-            self.cursor_visible = True
-            self.clear()
-            self.viewport().update()
+        # Cursor home (ESC[H) outside screen mode starts a new line; full-screen
+        # redraws are rendered by the screen grid and never clear the scrollback
+        if '\x1b[H' in text:
             text = text.replace('\x1b[H', '\n')
 
-        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        text = text.replace('\r\n', '\n')
         lines = text.split('\n')
+        self._rate_window_lines += len(lines) - 1
+        self._check_line_rate()
         
-        # Get current timestamp
-        from datetime import datetime
-        if timestamp:
-            timestamp_str = timestamp
-        else:
-            current_time = datetime.now()
-            timestamp_str = current_time.strftime("%H:%M:%S.%f")[:-3]  # HH:MM:SS.mmm format
-        
+        if timestamp is None:
+            timestamp = time.time()
+
         for i, line in enumerate(lines):
-            # Update timestamp of the current line if it's empty (only has a timestamp)
-            if i == 0 and self.lines and self.show_timestamps and len(self.lines[-1]) == 1:
-                timestamp_color = QColor(100, 100, 100)  # Gray timestamp
-                timestamp_text = f"{timestamp_str} "
-                self.lines[-1][0] = (timestamp_text, timestamp_color)
+            # An empty current line takes the metadata of the text that fills it
+            if i == 0 and self.lines and not self.lines[-1]:
+                self.set_line_meta(len(self.lines) - 1, timestamp, direction)
 
             if i > 0 or not self.lines:
-                self.lines.append([])
-                
-            # Add timestamp to the beginning of each new line if enabled
-            if self.show_timestamps and (i > 0 or not self.lines or len(self.lines) == 1):
-                # Add timestamp with a different color
-                timestamp_color = QColor(100, 100, 100)  # Gray timestamp
-                timestamp_text = f"{timestamp_str} "
-                self.lines[-1].append((timestamp_text, timestamp_color))
-            
-            parsed = self.parse_ansi_text(line)
-            merged = []
-            for part, color in parsed:
-                if merged and merged[-1][1] == color:
-                    merged[-1] = (merged[-1][0] + part, color)
-                else:
-                    merged.append((part, color))
-            self.lines[-1].extend(merged)
-        
-        if len(self.lines) > MAX_TERMINAL_LINES:
-            overflow = len(self.lines) - MAX_TERMINAL_LINES
-            del self.lines[:overflow]
-            if self.scroll_offset > 0:
-                self.scroll_offset = max(0, self.scroll_offset - overflow)
-        
+                self._append_line(timestamp, direction)
+
+            if '\r' in line or '\x1b[' in line:
+                pos = 0
+                for match in LINE_CONTROL_PATTERN.finditer(line):
+                    self._write_text(line[pos:match.start()])
+                    self._line_control(match.group(), timestamp, direction)
+                    pos = match.end()
+                line = line[pos:]
+            self._write_text(line)
+
+        self._trim_scrollback()
+
         # Update line number width if line numbers are enabled
         if self.show_line_numbers:
             lines_count = len(self.lines)
@@ -229,18 +325,13 @@ class TerminalWidget(QAbstractScrollArea):
 
             self._last_line_count = lines_count
         
-        # Update timestamp width if timestamps are enabled
-        if self.show_timestamps:
-            self._update_timestamp_width()
-        
         # Ensure the scroll offset remains stable after adding data to avoid view shifting
         visible_lines = max(1, self.viewport().height() // self.line_height)
 
         # If auto-scroll is disabled, adjust the scroll offset to maintain the current position when new content is added
         if not self.auto_scroll and self.scroll_offset > 0:
-            # Calculate the number of newly added lines
-            lines_after = len(self.lines)
-            new_lines_added = lines_after - lines_before
+            # Calculate the number of newly added (visible) lines
+            new_lines_added = self._row_count() - rows_before
 
             # If text was added to the existing last line (without a line break), no offset adjustment is needed
             # Only adjust the offset if new lines were added
@@ -260,7 +351,8 @@ class TerminalWidget(QAbstractScrollArea):
         self._schedule_update()
 
         # If auto-scroll is enabled, move the cursor to the bottom and scroll
-        if self.auto_scroll:
+        # (while catching up, the next frame in _do_update does this once)
+        if self.auto_scroll and not self.catching_up:
             # Reset scroll offset (scroll to bottom)
             self.scroll_offset = 0
             self.set_cursor_to_end()
@@ -270,16 +362,534 @@ class TerminalWidget(QAbstractScrollArea):
             if verticalBar:
                 verticalBar.setValue(verticalBar.maximum())
 
+    def _write_text(self, text):
+        """Write text to the last line at the write column (appending by default)"""
+        if not text:
+            return
+        parsed = self.parse_ansi_text(text)
+        merged = []
+        for part, color in parsed:
+            if merged and merged[-1][1] == color:
+                merged[-1] = (merged[-1][0] + part, color)
+            else:
+                merged.append((part, color))
+        if self._write_col is None:
+            self.lines[-1].extend(merged)
+            return
+
+        # Overwrite in place, keeping whatever lies beyond the written text
+        line_parts = self.lines[-1]
+        line_length = self._line_length(line_parts)
+        col = self._write_col
+        written = sum(len(part) for part, _ in merged)
+        head = self._slice_parts(line_parts, 0, col)
+        if col > line_length:
+            head.append((' ' * (col - line_length), self.default_color))
+        tail = self._slice_parts(line_parts, col + written, line_length)
+        self.lines[-1] = head + merged + tail
+        self._write_col = col + written if tail else None
+
+    def _slice_parts(self, line_parts, start, end):
+        """Style runs covering columns [start, end) of a line"""
+        result = []
+        offset = 0
+        for part, color in line_parts:
+            part_end = offset + len(part)
+            if part_end > start and offset < end:
+                result.append((part[max(start - offset, 0):min(end, part_end) - offset], color))
+            offset = part_end
+            if offset >= end:
+                break
+        return result
+
+    def _line_control(self, control, timestamp, direction):
+        """Apply a carriage return or erase-in-line to the last line"""
+        if control == '\r':
+            if not self.lines[-1]:
+                self._write_col = None
+                return
+            self._cr_frames += 1
+            if self.keep_cr_every > 0 and self._cr_frames % self.keep_cr_every == 0:
+                # Keep this frame in scrollback; the next one starts on a new line
+                self._append_line(timestamp, direction)
+                return
+            self._write_col = 0
+            return
+
+        col = self._write_col
+        if control == '\x1b[2K':
+            self.lines[-1] = []
+        elif control == '\x1b[1K':
+            if col is None:
+                self.lines[-1] = []
+            else:
+                end = col + 1
+                line_parts = self.lines[-1]
+                tail = self._slice_parts(line_parts, end, self._line_length(line_parts))
+                self.lines[-1] = [(' ' * end, self.default_color)] + tail
+        elif col is not None:
+            # ESC[K / ESC[0K: erase from the write column to the end of the line
+            self.lines[-1] = self._slice_parts(self.lines[-1], 0, col)
+            self._write_col = None
+        if not self.lines[-1] and not col:
+            self._write_col = None
+
+    def set_keep_cr_frames(self, every):
+        """Keep every Nth carriage-return frame as its own line (0 keeps only the final state)"""
+        self.keep_cr_every = max(0, int(every))
+
+    def _append_line(self, timestamp, direction):
+        """Start a new scrollback line with its metadata"""
+        if self.line_times and timestamp < self.line_times[-1]:
+            # Keep the time index sorted; producers on other threads may lag by a few ms
+            timestamp = self.line_times[-1]
+        if self.lines:
+            self._finish_line()
+        self._write_col = None
+        self._cr_frames = 0
+        self.lines.append([])
+        self.line_times.append(timestamp)
+        self.line_directions.append(direction)
+
+    def _finish_line(self):
+        """The last line will not grow any more: cache its text and index it for the filter"""
+        line_idx = len(self.lines) - 1
+        text = self._line_text(self.lines[line_idx])
+        if self.collapse_repeats and line_idx > 0 and self._fold_repeat(line_idx, text):
+            return
+        if self.highlighter is not None:
+            self._highlight_line(line_idx, text)
+        self.line_texts.append(text)
+        if self._max_line_width_font is not None:
+            self._max_line_width = max(self._max_line_width, self._text_pixel_width(text))
+        if self.filter_active and self._line_matches_filter(line_idx, text):
+            self.filter_index.append(line_idx + self.lines_trimmed)
+
+    def _highlight_line(self, line_idx, text):
+        """Apply the highlight rules to a finished line and cache the result in its style runs"""
+        line_parts, marks = self.highlighter.apply(self.lines[line_idx], text)
+        self.lines[line_idx] = line_parts
+        if marks:
+            self.line_highlights[line_idx + self.lines_trimmed] = marks
+
+    def _bold_font(self):
+        if self._bold_font_cache is None or self._bold_font_cache[0] != self.font.toString():
+            bold_font = QFont(self.font)
+            bold_font.setBold(True)
+            self._bold_font_cache = (self.font.toString(), bold_font)
+        return self._bold_font_cache[1]
+
+    def set_highlight_rules(self, rules):
+        """
+        Set the highlight rules (dicts with pattern/foreground/background/bold/ignore_case).
+        Rules apply to lines finished from now on. Returns the list of rule errors.
+        """
+        engine = HighlightEngine(rules or [])
+        self.highlighter = engine if engine else None
+        return engine.errors
+
+    def _repeat_key(self, text):
+        if self.repeat_normalize is not None:
+            return self.repeat_normalize.sub('', text)
+        return text
+
+    def _fold_repeat(self, line_idx, text):
+        """Fold the finished last line into the previous one if it repeats it"""
+        prev_idx = line_idx - 1
+        prev_text = self.line_texts[prev_idx]
+        if not text or self.line_directions[line_idx] != self.line_directions[prev_idx]:
+            return False
+        if text != prev_text and self._repeat_key(text) != self._repeat_key(prev_text):
+            return False
+
+        prev_id = prev_idx + self.lines_trimmed
+        repeat = self.line_repeats.get(prev_id)
+        if repeat is None:
+            repeat = self.line_repeats[prev_id] = RepeatedLine(self.line_times[prev_idx])
+        repeat.add(self.line_times[line_idx], text, prev_text)
+
+        self.lines.pop()
+        self.line_times.pop()
+        self.line_directions.pop()
+        if self.cursor_line > prev_idx:
+            self.cursor_line = prev_idx
+        return True
+
+    def repeat_at(self, line_idx):
+        """RepeatedLine info for a collapsed line, or None"""
+        if not self.line_repeats:
+            return None
+        return self.line_repeats.get(line_idx + self.lines_trimmed)
+
+    def set_collapse_repeats(self, enabled, normalize_pattern=None):
+        """
+        Fold consecutive identical lines into one line with a repeat count.
+        normalize_pattern is removed from lines before comparing them (e.g. r'\d+' to ignore numbers).
+        Raises re.error for an invalid pattern. Disabling expands all folded lines.
+        """
+        self.repeat_normalize = re.compile(normalize_pattern) if normalize_pattern else None
+        self.collapse_repeats = bool(enabled)
+        if not self.collapse_repeats and self.line_repeats:
+            self.expand_repeats()
+
+    def expand_repeats(self, line_idx=None):
+        """Turn folded lines back into one scrollback line per occurrence (all of them by default)"""
+        if line_idx is None:
+            targets = set(self.line_repeats)
+        else:
+            targets = {line_idx + self.lines_trimmed} & set(self.line_repeats)
+        if not targets:
+            return
+
+        lines, times, directions, texts = [], [], [], []
+        repeats = {}
+        highlights = {}
+        finished = len(self.line_texts)
+        for idx, line_parts in enumerate(self.lines):
+            line_id = idx + self.lines_trimmed
+            repeat = self.line_repeats.get(line_id)
+            marks = self.line_highlights.get(line_id)
+            if repeat is None or line_id not in targets:
+                if repeat is not None:
+                    repeats[len(lines) + self.lines_trimmed] = repeat
+                if marks is not None:
+                    highlights[len(lines) + self.lines_trimmed] = marks
+                lines.append(line_parts)
+                times.append(self.line_times[idx])
+                directions.append(self.line_directions[idx])
+                if idx < finished:
+                    texts.append(self.line_texts[idx])
+                continue
+
+            first_text = self.line_texts[idx]
+            color = line_parts[0][1] if line_parts else self.default_color
+            for timestamp, text in repeat.occurrences(first_text):
+                new_id = len(lines) + self.lines_trimmed
+                if text == first_text:
+                    lines.append(list(line_parts))
+                    if marks is not None:
+                        highlights[new_id] = marks
+                else:
+                    occurrence_parts = [(text, color)]
+                    if self.highlighter is not None:
+                        occurrence_parts, occurrence_marks = self.highlighter.apply(occurrence_parts, text)
+                        if occurrence_marks:
+                            highlights[new_id] = occurrence_marks
+                    lines.append(occurrence_parts)
+                times.append(timestamp)
+                directions.append(self.line_directions[idx])
+                texts.append(text)
+
+        self.lines = lines
+        self.line_times = times
+        self.line_directions = directions
+        self.line_texts = texts
+        self.line_repeats = repeats
+        self.line_highlights = highlights
+        self._max_line_width_font = None  # re-measure on the next scrollbar update
+        self._trim_scrollback()
+        if self.filter_active:
+            self._rebuild_filter_index()
+        if self.search_text:
+            self.start_search(self.search_text, self.search_case_sensitive)
+        self.selection_start = None
+        self.selection_end = None
+        self.set_cursor_to_end()
+        self._schedule_update()
+
+    def prepend_history(self, block):
+        """
+        Insert older lines above the current ones (a restored session, loaded newest block first).
+        block is (lines, texts, times, directions, repeats, highlights) with repeats and highlights
+        keyed by line offset in the block. Returns the number of lines added.
+        """
+        lines, texts, times, directions, repeats, highlights = block
+        room = MAX_TERMINAL_LINES - len(self.lines)
+        if room <= 0 or not lines:
+            return 0
+        skip = max(0, len(lines) - room)
+        if skip:
+            lines, texts, times, directions = lines[skip:], texts[skip:], times[skip:], directions[skip:]
+        count = len(lines)
+        if not self.lines:
+            texts = texts[:-1]  # the newest restored line is the growing last line
+        # Restored lines take the ids below the current first one, so existing ids stay valid
+        base = self.lines_trimmed - count
+        restored_repeats = {offset - skip + base: repeat for offset, repeat in repeats.items() if offset >= skip}
+        restored_repeats.update(self.line_repeats)
+        self.line_repeats = restored_repeats
+        restored_highlights = {offset - skip + base: marks for offset, marks in highlights.items() if offset >= skip}
+        restored_highlights.update(self.line_highlights)
+        self.line_highlights = restored_highlights
+        self.lines_trimmed = base
+
+        self.lines[:0] = lines
+        self.line_times[:0] = times
+        self.line_directions[:0] = directions
+        self.line_texts[:0] = texts
+        self.cursor_line += count
+        if self.selection_start is not None and self.selection_end is not None:
+            self.selection_start = (self.selection_start[0] + count, self.selection_start[1])
+            self.selection_end = (self.selection_end[0] + count, self.selection_end[1])
+        self._max_line_width_font = None  # re-measure on the next scrollbar update
+        if self.filter_active:
+            self._rebuild_filter_index()
+        if self.search_text:
+            self.start_search(self.search_text, self.search_case_sensitive)
+        if self.show_line_numbers:
+            self._update_line_number_width()
+        self.update_scrollbar()
+        self._schedule_update()
+        return count
+
+    def _pop_line(self):
+        """Remove the last scrollback line and its metadata"""
+        self.lines.pop()
+        self.line_times.pop()
+        self.line_directions.pop()
+        if self.lines:
+            # The previous line becomes the growing last line again
+            self.line_texts.pop()
+            if self.filter_index and self.filter_index[-1] == len(self.lines) - 1 + self.lines_trimmed:
+                self.filter_index.pop()
+
+    def _trim_scrollback(self):
+        """Drop the oldest lines beyond MAX_TERMINAL_LINES"""
+        if len(self.lines) > MAX_TERMINAL_LINES:
+            overflow = len(self.lines) - MAX_TERMINAL_LINES
+            rows_before = self._row_count()
+            del self.lines[:overflow]
+            del self.line_times[:overflow]
+            del self.line_directions[:overflow]
+            del self.line_texts[:overflow]
+            self.lines_trimmed += overflow
+            while self.line_repeats:
+                first_id = next(iter(self.line_repeats))
+                if first_id >= self.lines_trimmed:
+                    break
+                del self.line_repeats[first_id]
+            while self.line_highlights:
+                first_id = next(iter(self.line_highlights))
+                if first_id >= self.lines_trimmed:
+                    break
+                del self.line_highlights[first_id]
+            if self.filter_active:
+                del self.filter_index[:bisect_left(self.filter_index, self.lines_trimmed)]
+            if self.scroll_offset > 0:
+                self.scroll_offset = max(0, self.scroll_offset - (rows_before - self._row_count()))
+
+    def _line_text_at(self, line_idx):
+        """Plain text of a line, using the cache for finished lines"""
+        if line_idx < len(self.line_texts):
+            return self.line_texts[line_idx]
+        return self._line_text(self.lines[line_idx])
+
+    def _line_matches_filter(self, line_idx, text=None):
+        if self.filter_directions and self.line_directions[line_idx] not in self.filter_directions:
+            return False
+        if self.filter_include is None and self.filter_exclude is None:
+            return True
+        if text is None:
+            text = self._line_text_at(line_idx)
+        if self.filter_include is not None and not self.filter_include.search(text):
+            return False
+        if self.filter_exclude is not None and self.filter_exclude.search(text):
+            return False
+        return True
+
+    def set_filter(self, include=None, exclude=None, directions=None, case_sensitive=False):
+        """
+        Show only lines matching the include regex, not matching the exclude regex
+        and tagged with one of the given directions. Raises re.error for invalid patterns.
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        include_re = re.compile(include, flags) if include else None
+        exclude_re = re.compile(exclude, flags) if exclude else None
+        directions = set(directions) if directions else None
+        if include_re is None and exclude_re is None and directions is None:
+            self.clear_filter()
+            return
+
+        self.filter_include = include_re
+        self.filter_exclude = exclude_re
+        self.filter_directions = directions
+        self.filter_active = True
+        self._rebuild_filter_index()
+
+        self.auto_scroll = True
+        self.scroll_offset = 0
+        self.selection_start = None
+        self.selection_end = None
+        self.update_scrollbar()
+        self.viewport().update()
+
+    def _rebuild_filter_index(self):
+        """Evaluate the filter over all finished lines in bulk"""
+        texts = self.line_texts
+        selectors = None
+        if self.filter_include is not None:
+            selectors = map(self.filter_include.search, texts)
+        if self.filter_exclude is not None:
+            excluded = map(self.filter_exclude.search, texts)
+            if selectors is None:
+                selectors = map(operator.not_, excluded)
+            else:
+                selectors = map(lambda hit, miss: hit and not miss, selectors, excluded)
+        if self.filter_directions:
+            allowed = self.filter_directions.__contains__
+            direction_ok = map(allowed, self.line_directions[:len(texts)])
+            selectors = direction_ok if selectors is None else map(operator.and_, map(bool, selectors), direction_ok)
+        first_id = self.lines_trimmed
+        self.filter_index = list(compress(range(first_id, first_id + len(texts)), selectors))
+
+    def clear_filter(self):
+        """Show all lines again"""
+        if not self.filter_active:
+            return
+        self.filter_active = False
+        self.filter_include = None
+        self.filter_exclude = None
+        self.filter_directions = None
+        self.filter_index = []
+        self.auto_scroll = True
+        self.scroll_offset = 0
+        self.update_scrollbar()
+        self.viewport().update()
+
+    def filtered_line_count(self):
+        """Number of lines shown by the filter view"""
+        return self._row_count()
+
+    def _tail_visible(self):
+        return bool(self.lines) and self._line_matches_filter(len(self.lines) - 1)
+
+    def _row_count(self):
+        """Number of displayed rows (all lines, or the filtered ones)"""
+        if not self.filter_active:
+            return len(self.lines)
+        return len(self.filter_index) + (1 if self._tail_visible() else 0)
+
+    def _row_to_line(self, row):
+        """Map a displayed row to its line index"""
+        if not self.filter_active:
+            return row
+        if row < len(self.filter_index):
+            return self.filter_index[row] - self.lines_trimmed
+        return len(self.lines) - 1
+
+    def _line_to_row(self, line_idx):
+        """Map a line index to the nearest displayed row"""
+        if not self.filter_active:
+            return line_idx
+        return bisect_left(self.filter_index, line_idx + self.lines_trimmed)
+
+    def set_line_meta(self, line_idx, timestamp=None, direction=None):
+        """Update the timestamp and/or direction of an existing line"""
+        if line_idx < 0 or line_idx >= len(self.lines):
+            return
+        if timestamp is not None:
+            lower = self.line_times[line_idx - 1] if line_idx > 0 else timestamp
+            upper = self.line_times[line_idx + 1] if line_idx + 1 < len(self.line_times) else timestamp
+            self.line_times[line_idx] = min(max(timestamp, lower), upper)
+        if direction is not None:
+            self.line_directions[line_idx] = direction
+            if self.filter_active and self.filter_directions and line_idx < len(self.line_texts):
+                self._rebuild_filter_index()
+
+    def line_index_at_time(self, timestamp):
+        """Return the index of the first line at or after the given epoch timestamp"""
+        if not self.line_times:
+            return -1
+        return min(bisect_left(self.line_times, timestamp), len(self.line_times) - 1)
+
+    def scroll_to_line(self, line_idx):
+        """Scroll so that the given line is centered and select it"""
+        if line_idx < 0 or line_idx >= len(self.lines):
+            return
+        visible_lines = max(1, self.viewport().height() // self.line_height)
+        total_rows = self._row_count()
+        start_row = max(0, self._line_to_row(line_idx) - visible_lines // 2)
+        self.auto_scroll = False
+        self.scroll_offset = max(0, total_rows - visible_lines - start_row)
+        self.selection_start = (line_idx, 0)
+        self.selection_end = (line_idx, self._line_length(self.lines[line_idx]))
+        self.update_scrollbar()
+        self.viewport().update()
+
+    def jump_to_time(self, timestamp):
+        """Scroll to the first line at or after the timestamp; returns its index or -1"""
+        line_idx = self.line_index_at_time(timestamp)
+        if line_idx >= 0:
+            self.scroll_to_line(line_idx)
+        return line_idx
+
+    def _format_line_time(self, line_idx):
+        timestamp = self.line_times[line_idx]
+        if self.timestamp_mode == TIMESTAMP_MODE_DELTA:
+            previous = self.line_times[line_idx - 1] if line_idx > 0 else timestamp
+            return f"+{timestamp - previous:.3f}"
+        return utils.format_timestamp(timestamp)
+
+    def _text_start_x(self):
+        """X position where line text starts (after the line number and timestamp gutters)"""
+        text_start_x = 0
+        if self.show_line_numbers:
+            text_start_x += self.line_number_width
+        if self.show_timestamps or self.show_directions:
+            text_start_x += self.timestamp_width
+        return text_start_x
+
     def _schedule_update(self):
         if not self._update_pending:
             self._update_pending = True
 
     def _do_update(self):
+        self._check_line_rate()
         if self._update_pending:
+            if self.catching_up and self.auto_scroll:
+                # Jump straight to the newest state instead of every intermediate scroll position
+                self.scroll_offset = 0
+                self.set_cursor_to_end()
             self.update_scrollbar()
             self.viewport().update()
             self._update_pending = False
 
+    def _check_line_rate(self):
+        """Switch between full and reduced frame rate based on the incoming line rate"""
+        now = time.monotonic()
+        elapsed = now - self._rate_window_start
+        if elapsed < RATE_WINDOW_SEC:
+            return
+        rate = self._rate_window_lines / elapsed
+        self._rate_window_start = now
+        self._rate_window_lines = 0
+
+        if self.adaptive_threshold > 0 and rate > self.adaptive_threshold:
+            self._last_flood_time = now
+            if not self.catching_up:
+                self._set_catching_up(True)
+        elif self.catching_up and now - self._last_flood_time >= FLOOD_EXIT_SEC:
+            self._set_catching_up(False)
+
+    def _set_catching_up(self, enabled):
+        self.catching_up = enabled
+        self._update_timer.setInterval(FLOOD_FRAME_INTERVAL_MS if enabled else FRAME_INTERVAL_MS)
+        if not enabled:
+            # Burst is over: render the final state at full fidelity
+            self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+            self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+            if self.auto_scroll:
+                self.scroll_offset = 0
+                self.set_cursor_to_end()
+            self._schedule_update()
+        self.catching_up_changed.emit(enabled)
+
+    def set_adaptive_threshold(self, lines_per_sec):
+        """Set the line rate above which rendering is throttled (0 disables)"""
+        self.adaptive_threshold = max(0, int(lines_per_sec))
+        if self.adaptive_threshold == 0 and self.catching_up:
+            self._set_catching_up(False)
+
     def parse_ansi_text(self, text):
         """Parse ANSI color sequences (color only)"""
         result = []
@@ -307,11 +917,19 @@ class TerminalWidget(QAbstractScrollArea):
         return result
 
     def paintEvent(self, event):
+        if self.frame_timer is None:
+            self._paint(event)
+            return
+        start = time.perf_counter()
+        self._paint(event)
+        self.frame_timer.add(start, time.perf_counter() - start)
+
+    def _paint(self, event):
         painter = QPainter(self.viewport())
         painter.setFont(self.font)
         # Set text rendering hints for better alignment
         painter.setRenderHint(QPainter.RenderHint.TextAntialiasing, True)
-        painter.fillRect(self.viewport().rect(), QColor(30, 30, 30))
+        painter.fillRect(self.viewport().rect(), self.background_color)
         
         if not self.lines:
             painter.end()
@@ -326,15 +944,11 @@ class TerminalWidget(QAbstractScrollArea):
             effective_height -= self.horizontalScrollBar().height()
         visible_lines = max(1, effective_height // self.line_height)
         h_scroll_offset = self.horizontalScrollBar().value()
-        total_lines = len(self.lines)
+        total_lines = self._row_count()
         
         # Calculate text start position (after line numbers and timestamps)
-        text_start_x = 0
-        if self.show_line_numbers:
-            text_start_x += self.line_number_width
-        if self.show_timestamps:
-            text_start_x += self.timestamp_width
-        
+        text_start_x = self._text_start_x()
+
         if self.auto_scroll:
             start_line = max(0, total_lines - visible_lines)
             self.scroll_offset = 0
@@ -348,20 +962,23 @@ class TerminalWidget(QAbstractScrollArea):
             painter.end()
             return
 
-        # Draw line number background if enabled
-        if self.show_line_numbers and self.line_number_width > 0:
-            line_number_rect = viewport_rect.adjusted(0, 0, -(effective_width - self.line_number_width)-12, 0)
-            painter.fillRect(line_number_rect, QColor(40, 40, 40))  # Slightly lighter background
-            
+        # Draw gutter background (line numbers, timestamps, directions) if enabled
+        if text_start_x > 0:
+            separator_x = text_start_x - self.line_number_padding // 2
+            painter.fillRect(QRect(0, 0, separator_x, viewport_rect.height()), QColor(40, 40, 40))  # Slightly lighter background
+
             # Draw separator line
             painter.setPen(QColor(60, 60, 60))
-            painter.drawLine(self.line_number_width - self.line_number_padding // 2, 0, 
-                           self.line_number_width - self.line_number_padding // 2, effective_height)
-        
+            painter.drawLine(separator_x, 0, separator_x, effective_height)
+        show_time_gutter = self.show_timestamps or self.show_directions
+        time_gutter_x = self.line_number_width if self.show_line_numbers else 0
+        direction_label_width = self.font_metrics.horizontalAdvance("RX ")
+
         y = 5
-        for line_idx in range(start_line, end_line):
+        for row in range(start_line, end_line):
+            line_idx = self._row_to_line(row)
             line_parts = self.lines[line_idx]
-            line_text_full = self._line_text(line_parts)
+            line_text_full = self._line_text_at(line_idx)
             line_url_matches = list(self.url_pattern.finditer(line_text_full)) if line_text_full else []
             line_base_x = text_start_x + 5 - h_scroll_offset
             x = line_base_x
@@ -377,10 +994,37 @@ class TerminalWidget(QAbstractScrollArea):
                 painter.drawText(line_number_x, y_line, line_number)
                 painter.restore()
 
+            # Draw timestamp / direction gutter from the line metadata
+            if show_time_gutter:
+                gutter_x = time_gutter_x
+                if self.show_directions:
+                    direction = self.line_directions[line_idx]
+                    painter.setPen(DIRECTION_COLORS.get(direction, self.default_color))
+                    painter.drawText(gutter_x, y_line, DIRECTION_LABELS.get(direction, "  "))
+                    gutter_x += direction_label_width
+                if self.show_timestamps:
+                    painter.setPen(QColor(100, 100, 100))  # Gray timestamp
+                    painter.drawText(gutter_x, y_line, self._format_line_time(line_idx))
+
             text_clip_rect = QRect(text_start_x, y, max(0, effective_width - text_start_x), self.line_height)
             painter.save()
             painter.setClipRect(text_clip_rect)
             
+            # Highlight rule backgrounds; bold ranges are applied while drawing characters
+            bold_ranges = None
+            marks = self.line_highlights.get(line_idx + self.lines_trimmed) if self.line_highlights else None
+            if marks:
+                for start_col, end_col, background, bold in marks:
+                    if background is not None:
+                        painter.fillRect(x + start_col * self.char_width, y,
+                                         (end_col - start_col) * self.char_width, self.line_height, background)
+                    if bold:
+                        if bold_ranges is None:
+                            bold_ranges = []
+                        bold_ranges.append((start_col, end_col))
+            col = 0
+            is_bold = False
+
             # Selection highlight
             if self.selection_start and self.selection_end:
                 sel_start, sel_end = sorted([self.selection_start, self.selection_end])
@@ -436,6 +1080,13 @@ class TerminalWidget(QAbstractScrollArea):
                             if abs(char_display_width - self.char_width) < 2: # Small tolerance
                                 char_display_width = self.char_width
 
+                        if bold_ranges is not None:
+                            in_bold = any(start <= col < end for start, end in bold_ranges)
+                            if in_bold != is_bold:
+                                is_bold = in_bold
+                                painter.setFont(self._bold_font() if is_bold else self.font)
+                            col += 1
+
                         # Only draw if text is in visible area
                         if current_x_for_part >= text_start_x and current_x_for_part < effective_width - 5:
                             painter.drawText(current_x_for_part, y_line, char)
@@ -444,6 +1095,14 @@ class TerminalWidget(QAbstractScrollArea):
 
                     x = current_x_for_part # Update x for the next text_part
 
+            if is_bold:
+                painter.setFont(self.font)
+
+            repeat = self.repeat_at(line_idx)
+            if repeat is not None and x < effective_width - 5:
+                painter.setPen(REPEAT_MARK_COLOR)
+                painter.drawText(x + self.char_width, y_line, f"... (x{repeat.count})")
+
             # Draw URL underline after text so it stays visible
             if line_url_matches:
                 painter.save()
@@ -499,6 +1158,18 @@ class TerminalWidget(QAbstractScrollArea):
     def _line_text(self, line_parts):
         return ''.join(part for part, _ in line_parts)
 
+    def _text_pixel_width(self, text):
+        """Calculate actual pixel width of a line"""
+        if text.isascii():
+            return len(text) * self.char_width
+        line_width = 0
+        for char in text:
+            char_display_width = self.font_metrics.horizontalAdvance(char)
+            if unicodedata.east_asian_width(char) not in ('W', 'F', 'A') and abs(char_display_width - self.char_width) < 2:
+                char_display_width = self.char_width
+            line_width += char_display_width
+        return line_width
+
     def _line_length(self, line_parts):
         return len(self._line_text(line_parts))
 
@@ -532,14 +1203,10 @@ class TerminalWidget(QAbstractScrollArea):
             effective_width -= self.verticalScrollBar().width()
         
         visible_lines = max(1, effective_height // self.line_height)
-        total_lines = len(self.lines)
+        total_lines = self._row_count()
 
         # Calculate gutter width (line numbers + timestamps) so we know actual text area width
-        text_start_x = 0
-        if self.show_line_numbers:
-            text_start_x += self.line_number_width
-        if self.show_timestamps:
-            text_start_x += self.timestamp_width
+        text_start_x = self._text_start_x()
         text_area_width = max(1, effective_width - text_start_x - 5)
         
         # Vertical Scrollbar 업데이트
@@ -590,20 +1257,14 @@ class TerminalWidget(QAbstractScrollArea):
         self.verticalScrollBar().blockSignals(False)
         
         # Horizontal Scrollbar 업데이트
-        max_line_width = 0
+        # Finished lines are measured once in _finish_line; only a font change needs a full pass
+        font_key = self.font.toString()
+        if font_key != self._max_line_width_font:
+            self._max_line_width_font = font_key
+            self._max_line_width = max(map(self._text_pixel_width, self.line_texts), default=0)
+        max_line_width = self._max_line_width
         if self.lines:
-            for line_parts in self.lines:
-                line_text = self._line_text(line_parts)
-                
-                # Calculate actual pixel width of the line
-                line_width = 0
-                for char in line_text:
-                    char_display_width = self.font_metrics.horizontalAdvance(char)
-                    if unicodedata.east_asian_width(char) not in ('W', 'F', 'A') and abs(char_display_width - self.char_width) < 2:
-                        char_display_width = self.char_width
-                    line_width += char_display_width
-
-                max_line_width = max(max_line_width, line_width)
+            max_line_width = max(max_line_width, self._text_pixel_width(self._line_text(self.lines[-1])))
         content_text_width = max_line_width + (self.char_width * 2) + 10
         
         self.horizontalScrollBar().blockSignals(True)
@@ -635,15 +1296,21 @@ class TerminalWidget(QAbstractScrollArea):
         self.line_number_width = self.font_metrics.horizontalAdvance(sample_digits) + self.line_number_padding + 2
 
     def _update_timestamp_width(self):
-        """Calculate the width needed for timestamps"""
-        if not self.show_timestamps:
+        """Calculate the width needed for the timestamp / direction gutter"""
+        if not (self.show_timestamps or self.show_directions):
             self.timestamp_width = 0
             return
-        
-        # Use a sample timestamp to calculate width
-        sample_timestamp = "12:34:56.789 "  # HH:MM:SS.mmm format without brackets
-        # self.timestamp_width = self.font_metrics.horizontalAdvance(sample_timestamp) + self.timestamp_padding
-        self.timestamp_width = self.timestamp_padding
+
+        # Use sample strings to calculate width
+        sample = ""
+        if self.show_directions:
+            sample += "RX "
+        if self.show_timestamps:
+            if self.timestamp_mode == TIMESTAMP_MODE_DELTA:
+                sample += "+9999.999"
+            else:
+                sample += "12:34:56.789"  # HH:MM:SS.mmm format without brackets
+        self.timestamp_width = self.font_metrics.horizontalAdvance(sample) + self.timestamp_padding
 
     def set_show_timestamps(self, show):
         """Enable or disable timestamp display"""
@@ -652,6 +1319,20 @@ class TerminalWidget(QAbstractScrollArea):
         self.update_scrollbar()
         self.viewport().update()
 
+    def set_show_directions(self, show):
+        """Enable or disable the RX/TX direction column"""
+        self.show_directions = show
+        self._update_timestamp_width()
+        self.update_scrollbar()
+        self.viewport().update()
+
+    def set_timestamp_mode(self, mode):
+        """Show absolute times or the delta to the previous line"""
+        self.timestamp_mode = mode if mode == TIMESTAMP_MODE_DELTA else TIMESTAMP_MODE_ABSOLUTE
+        self._update_timestamp_width()
+        self.update_scrollbar()
+        self.viewport().update()
+
     def set_show_line_numbers(self, show):
         """Enable or disable line number display"""
         self.show_line_numbers = show
@@ -677,7 +1358,7 @@ class TerminalWidget(QAbstractScrollArea):
         scroll_lines = 3  # Scroll speed adjustment
 
         visible_lines = max(1, self.viewport().height() // self.line_height)
-        total_lines = len(self.lines)
+        total_lines = self._row_count()
         max_scroll = max(0, total_lines - visible_lines)
         
         old_offset = self.scroll_offset
@@ -712,7 +1393,7 @@ class TerminalWidget(QAbstractScrollArea):
     def scrollContentsBy(self, dx, dy):
         if dy != 0:  # Vertical scroll change
             visible_lines = max(1, self.viewport().height() // self.line_height)
-            total_lines = len(self.lines)
+            total_lines = self._row_count()
             
             if total_lines > visible_lines:
                 scroll_value = self.verticalScrollBar().value()
@@ -784,6 +1465,16 @@ class TerminalWidget(QAbstractScrollArea):
         paste_action = menu.addAction("Paste")
         select_all_action = menu.addAction("Select All")
 
+        expand_action = None
+        expand_all_action = None
+        if self.line_repeats:
+            clicked_line, _ = self._pos_to_linecol(event.pos())
+            menu.addSeparator()
+            repeat = self.repeat_at(clicked_line) if clicked_line < len(self.lines) else None
+            if repeat is not None:
+                expand_action = menu.addAction(f"Expand Repeated Line (x{repeat.count})")
+            expand_all_action = menu.addAction("Expand All Repeated Lines")
+
         has_selection = (
             self.selection_start is not None and
             self.selection_end is not None and
@@ -800,6 +1491,10 @@ class TerminalWidget(QAbstractScrollArea):
             self.request_paste.emit()
         elif chosen == select_all_action:
             self.select_all()
+        elif chosen is not None and chosen == expand_action:
+            self.expand_repeats(clicked_line)
+        elif chosen is not None and chosen == expand_all_action:
+            self.expand_repeats()
 
     def mouseDoubleClickEvent(self, event):
         """Handle double-click to select word"""
@@ -833,27 +1528,24 @@ class TerminalWidget(QAbstractScrollArea):
         
         y = pos.y() - 5
         visible_lines = max(1, effective_height // self.line_height)
-        total_lines = len(self.lines)
-        start_line = max(0, total_lines - visible_lines - self.scroll_offset)
-        line = y // self.line_height + start_line
-        
-        if line < 0:
-            line = 0
-        if line >= len(self.lines):
-            line = len(self.lines) - 1 if self.lines else 0
+        total_rows = self._row_count()
+        start_row = max(0, total_rows - visible_lines - self.scroll_offset)
+        row = y // self.line_height + start_row
+
+        if row < 0:
+            row = 0
+        if row >= total_rows:
+            row = total_rows - 1 if total_rows else 0
+        line = self._row_to_line(row) if self.lines else 0
         
         # Calculate text start position (after line numbers and timestamps)
-        text_start_x = 0
-        if self.show_line_numbers:
-            text_start_x += self.line_number_width
-        if self.show_timestamps:
-            text_start_x += self.timestamp_width
-        
+        text_start_x = self._text_start_x()
+
         # Adjust x position to account for line numbers and timestamps
         x = pos.x() - 5 - text_start_x + self.horizontalScrollBar().value()
-        
+
         # If click is in the line number or timestamp area, set column to 0
-        if (self.show_line_numbers or self.show_timestamps) and pos.x() < text_start_x:
+        if text_start_x > 0 and pos.x() < text_start_x:
             return (line, 0)
         
         text = self._line_text(self.lines[line]) if line < len(self.lines) else ""
@@ -916,7 +1608,10 @@ class TerminalWidget(QAbstractScrollArea):
         for i in range(sel_start[0], sel_end[0] + 1):
             if i >= len(self.lines):
                 break
-            line = self._line_text(self.lines[i])
+            if self.filter_active and not self._line_matches_filter(i):
+                # Copy what is shown in the filter view
+                continue
+            line = self._line_text_at(i)
             if i == sel_start[0] and i == sel_end[0]:
                 # Selection is within one line
                 lines.append(line[sel_start[1]:sel_end[1]])
@@ -948,6 +1643,16 @@ class TerminalWidget(QAbstractScrollArea):
     def clear(self):
         """Clear the terminal"""
         self.lines = []
+        self.line_times = []
+        self.line_directions = []
+        self._write_col = None
+        self._cr_frames = 0
+        self.line_texts = []
+        self.lines_trimmed = 0
+        self._max_line_width = 0
+        self.line_repeats = {}
+        self.line_highlights = {}
+        self.filter_index = []
         self.cursor_line = 0
         self.cursor_col = 0
         self.selection_start = None
@@ -972,9 +1677,8 @@ class TerminalWidget(QAbstractScrollArea):
             self._update_line_number_width()
         
         # Update timestamp width if timestamps are enabled
-        if self.show_timestamps:
-            self._update_timestamp_width()
-            
+        self._update_timestamp_width()
+
         self.update_scrollbar()
         self.viewport().update()
 
@@ -985,6 +1689,7 @@ class TerminalWidget(QAbstractScrollArea):
     def start_search(self, text, case_sensitive=False):
         """Start text search"""
         self.search_text = text
+        self.search_case_sensitive = case_sensitive
         self.search_matches = []
         self.search_index = -1
         
@@ -993,8 +1698,8 @@ class TerminalWidget(QAbstractScrollArea):
             return
         
         # Search through all lines
-        for line_idx, line_parts in enumerate(self.lines):
-            line_text = self._line_text(line_parts)
+        for line_idx in range(len(self.lines)):
+            line_text = self._line_text_at(line_idx)
             search_text = text if case_sensitive else text.lower()
             line_search_text = line_text if case_sensitive else line_text.lower()
             
@@ -1005,6 +1710,15 @@ class TerminalWidget(QAbstractScrollArea):
                     break
                 self.search_matches.append((line_idx, pos, pos + len(text)))
                 start = pos + 1
+
+            # A folded line also matches if one of its other occurrences does
+            repeat = self.repeat_at(line_idx)
+            if start == 0 and repeat is not None and repeat.texts is not None:
+                for occurrence in repeat.texts:
+                    occurrence_text = occurrence if case_sensitive else occurrence.lower()
+                    if search_text in occurrence_text:
+                        self.search_matches.append((line_idx, 0, len(line_text)))
+                        break
         
         if self.search_matches:
             self.search_index = 0
@@ -1038,7 +1752,7 @@ class TerminalWidget(QAbstractScrollArea):
         if not self.lines[-1]:
             # Current line is empty, remove previous line if exists
             if len(self.lines) > 1:
-                self.lines.pop()
+                self._pop_line()
             self._schedule_update()
             return
         
@@ -1057,7 +1771,7 @@ class TerminalWidget(QAbstractScrollArea):
         # If the line became empty, ensure it's not completely removed unless it's not the last line
         if not self.lines[-1] and len(self.lines) > 1:
             # Check if this is truly an empty line or just no text parts
-            self.lines.pop()
+            self._pop_line()
             
         self._schedule_update()
 
@@ -1067,8 +1781,8 @@ class TerminalWidget(QAbstractScrollArea):
             return
             
         if not self.lines:
-            self.lines.append([])
-        
+            self._append_line(time.time(), DIRECTION_LOCAL)
+
         # Parse ANSI colors but don't create new lines
         parsed = self.parse_ansi_text(text)
         
@@ -1084,9 +1798,33 @@ class TerminalWidget(QAbstractScrollArea):
         
         self._schedule_update()
 
-    def export_text(self):
-        """Return terminal contents as a plain-text string."""
-        return '\n'.join(self._line_text(line_parts) for line_parts in self.lines)
+    def export_text(self, with_timestamps=False):
+        """Return terminal contents as a plain-text string, with folded repeats written out in full."""
+        return '\n'.join(
+            f"{utils.format_timestamp(timestamp)} {text}" if with_timestamps else text
+            for timestamp, text in self._iter_occurrences()
+        )
+
+    def line_range(self, start_id, count):
+        """(line_id, timestamp, direction, text, repeat_count) for up to count lines from a stable line id"""
+        first = max(start_id - self.lines_trimmed, 0)
+        last = min(first + count, len(self.lines))
+        result = []
+        for line_idx in range(first, last):
+            repeat = self.repeat_at(line_idx)
+            result.append((line_idx + self.lines_trimmed, self.line_times[line_idx], self.line_directions[line_idx],
+                           self._line_text_at(line_idx), repeat.count if repeat else 1))
+        return result
+
+    def _iter_occurrences(self):
+        """(timestamp, text) of every received line, expanding folded repeats"""
+        for line_idx, timestamp in enumerate(self.line_times):
+            text = self._line_text_at(line_idx)
+            repeat = self.repeat_at(line_idx)
+            if repeat is None:
+                yield timestamp, text
+            else:
+                yield from repeat.occurrences(text)
 
     def on_port_changed(self, port):
         self.selected_port = port
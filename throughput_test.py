@@ -0,0 +1,438 @@
+import threading
+import time
+from array import array
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QComboBox, QLineEdit, QDoubleSpinBox, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QLabel, QCheckBox, QApplication
+)
+from PySide6.QtCore import QObject, Signal, QTimer
+import utils
+
+# Pattern line: b"TP" + 8-digit sequence number + fill derived from it + CRLF, 64 bytes in all.
+# A simulator or echo firmware can produce the same lines with pattern_line().
+PATTERN_LINE_BYTES = 64
+PATTERN_PREFIX = b"TP"
+PATTERN_ALPHABET = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+MODE_LOOPBACK = "Loopback / echo (send and verify)"
+MODE_DEVICE = "Device sends the pattern (verify only)"
+TEST_MODES = [MODE_LOOPBACK, MODE_DEVICE]
+FLOW_CONTROL_OPTIONS = ['None', 'RTS/CTS (Hardware)', 'XON/XOFF (Software)']
+DEFAULT_RATE_STEPS = "25, 50, 75, 100"
+DEFAULT_STAGE_SEC = 3.0
+SETTLE_SEC = 0.5          # wait for in-flight bytes after a stage before counting losses
+SEND_INTERVAL_SEC = 0.005
+SENDER_JOIN_SEC = 1.0     # how long a stage end waits for the sender thread to exit
+# A stage counts as falling behind when the terminal is this far behind the reader,
+# or when framing takes this share of the reader thread's time
+RENDER_LAG_LIMIT_SEC = 0.5
+PARSER_BUSY_LIMIT = 0.8
+
+PATTERN_FILL_BYTES = PATTERN_LINE_BYTES - len(PATTERN_PREFIX) - 8 - 2
+
+
+def pattern_line(seq):
+    start = seq % len(PATTERN_ALPHABET)
+    rotated = PATTERN_ALPHABET[start:] + PATTERN_ALPHABET[:start]
+    return PATTERN_PREFIX + b"%08d" % (seq % 100000000) + rotated[:PATTERN_FILL_BYTES] + b"\r\n"
+
+
+class PatternVerifier:
+    """
+    Checks pattern lines as the serial reader receives them (called on the reader thread).
+    Lost lines show up as gaps in the sequence numbers, corrupted ones as content mismatches.
+    """
+
+    def __init__(self, tx_times=None):
+        self.tx_times = tx_times  # write time per sequence number, for latency (loopback only)
+        self.buffer = b""
+        self.expected = None
+        self.rx_bytes = 0
+        self.reads = 0
+        self.max_read = 0
+        self.lines_ok = 0
+        self.lost = 0
+        self.corrupt = 0
+        self.first_time = None
+        self.last_time = None
+        self.latencies = array('d')  # one per read that completed a line
+        self.parse_time = 0.0  # added by the reader around framer.feed()
+
+    def feed(self, data, timestamp):
+        if self.first_time is None:
+            self.first_time = timestamp
+        self.last_time = timestamp
+        self.rx_bytes += len(data)
+        self.reads += 1
+        if len(data) > self.max_read:
+            self.max_read = len(data)
+        lines = (self.buffer + data).split(b"\r\n")
+        self.buffer = lines.pop()
+        last_seq = None
+        for line in lines:
+            if len(line) != PATTERN_LINE_BYTES - 2 or not line.startswith(PATTERN_PREFIX) \
+                    or not line[2:10].isdigit():
+                self.corrupt += 1
+                if self.expected is not None:
+                    self.expected += 1
+                continue
+            seq = int(line[2:10])
+            if line + b"\r\n" != pattern_line(seq):
+                self.corrupt += 1
+            else:
+                self.lines_ok += 1
+            if self.expected is not None and seq > self.expected:
+                self.lost += seq - self.expected
+            self.expected = seq + 1
+            last_seq = seq
+        if last_seq is not None and self.tx_times is not None and last_seq < len(self.tx_times):
+            self.latencies.append(timestamp - self.tx_times[last_seq])
+
+    @property
+    def rx_rate(self):
+        if self.first_time is None or self.last_time <= self.first_time:
+            return 0.0
+        return self.rx_bytes / (self.last_time - self.first_time)
+
+
+class PatternSender:
+    """Writes pattern lines at a target byte rate on a worker thread"""
+
+    def __init__(self, port, rate, duration):
+        self.port = port
+        self.rate = rate
+        self.duration = duration
+        self.tx_times = array('d')
+        self.tx_bytes = 0
+        self.elapsed = 0.0
+        self.error = None
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Ask the thread to end, cancelling a write that flow control is holding back"""
+        self._stop = True
+        if self._thread.is_alive():
+            try:
+                self.port.cancel_write()
+            except (AttributeError, NotImplementedError, OSError):
+                pass
+
+    def join(self, timeout=None):
+        """Wait for the thread to exit; True once tx_times, tx_bytes and elapsed are final"""
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        start = time.time()
+        seq = 0
+        try:
+            while not self._stop:
+                now = time.time()
+                elapsed = now - start
+                if elapsed >= self.duration:
+                    break
+                due_lines = int(elapsed * self.rate / PATTERN_LINE_BYTES) + 1 - seq
+                if due_lines > 0:
+                    chunk = b"".join(pattern_line(seq + i) for i in range(due_lines))
+                    for _ in range(due_lines):
+                        self.tx_times.append(now)
+                    seq += due_lines
+                    # Blocks while flow control holds the line, which shows up as a lower TX rate
+                    self.port.write(chunk)
+                    self.tx_bytes += len(chunk)
+                time.sleep(SEND_INTERVAL_SEC)
+        except Exception as e:
+            self.error = str(e)
+        self.elapsed = time.time() - start
+
+
+class StageResult:
+    def __init__(self, baudrate, flow_control, target_rate):
+        self.baudrate = baudrate
+        self.flow_control = flow_control
+        self.target_rate = target_rate  # bytes/s, None when the device sets the pace
+        self.tx_rate = None
+        self.rx_rate = 0.0
+        self.lines_ok = 0
+        self.lost = 0
+        self.corrupt = 0
+        self.reads = 0
+        self.max_read = 0
+        self.latency_p50 = None
+        self.latency_p99 = None
+        self.parser_busy = 0.0
+        self.render_lag = 0.0
+        self.render_dropped = 0
+        self.error = None
+
+    @property
+    def bottleneck(self):
+        """The first stage of the RX path that did not keep up, or None"""
+        if self.error:
+            return "error"
+        if self.lost or self.corrupt:
+            return "reader"
+        if self.tx_rate and self.rx_rate < self.tx_rate * 0.95:
+            return "reader"
+        if self.parser_busy > PARSER_BUSY_LIMIT:
+            return "parser"
+        if self.render_dropped or self.render_lag > RENDER_LAG_LIMIT_SEC:
+            return "renderer"
+        return None
+
+    def cells(self):
+        rate = lambda value: "-" if value is None else f"{value / 1024:,.1f}"
+        ms = lambda value: "-" if value is None else f"{value * 1000:.1f}"
+        return [
+            str(self.baudrate),
+            self.flow_control,
+            rate(self.target_rate),
+            rate(self.tx_rate),
+            rate(self.rx_rate),
+            f"{self.lines_ok:,}",
+            f"{self.lost:,}",
+            f"{self.corrupt:,}",
+            f"{self.max_read:,}",
+            f"{ms(self.latency_p50)} / {ms(self.latency_p99)}",
+            f"{self.parser_busy * 100:.0f}",
+            f"{self.render_lag * 1000:.0f}",
+            self.error or (f"behind: {self.bottleneck}" if self.bottleneck else "ok"),
+        ]
+
+
+RESULT_HEADERS = ["Baudrate", "Flow control", "Target KB/s", "TX KB/s", "RX KB/s", "Lines OK", "Lost",
+                  "Corrupt", "Max read", "Latency p50/p99 ms", "Parser busy %", "Render lag ms", "Result"]
+
+
+class ThroughputTest(QObject):
+    """
+    Runs the stages of a throughput test against the main window's serial port.
+    For each baudrate and flow control the port is reopened, then every rate step runs for
+    stage_sec: the pattern is written at that fraction of the link capacity (loopback mode)
+    and verified by the serial reader, while the terminal keeps rendering what arrives.
+    """
+    stage_finished = Signal(object)
+    finished = Signal()
+
+    def __init__(self, terminal, mode, baudrates, flow_controls, rate_steps, stage_sec, parent=None):
+        super().__init__(parent)
+        self.terminal = terminal
+        self.mode = mode
+        self.plan = [(baudrate, flow, step) for baudrate in baudrates for flow in flow_controls
+                     for step in (rate_steps if mode == MODE_LOOPBACK else [None])]
+        self.stage_sec = stage_sec
+        self.results = []
+        self.cancelled = False
+        self._current = None
+        self._restore = (terminal.baudrate, terminal.flow_control)
+
+    def start(self):
+        self._next_stage()
+
+    def cancel(self):
+        self.cancelled = True
+        if self._current:
+            sender = self._current[1]
+            if sender:
+                sender.stop()
+
+    def _next_stage(self):
+        if self.cancelled or not self.plan:
+            terminal = self.terminal
+            terminal.throughput_probe = None
+            if (terminal.baudrate, terminal.flow_control) != self._restore:
+                terminal.reopen_serial_port(*self._restore)
+            self.finished.emit()
+            return
+        baudrate, flow_control, step = self.plan.pop(0)
+        terminal = self.terminal
+        if terminal.baudrate != baudrate or terminal.flow_control != flow_control \
+                or not (terminal.serial and terminal.serial.is_open):
+            error = terminal.reopen_serial_port(baudrate, flow_control)
+            if error:
+                result = StageResult(baudrate, flow_control, None)
+                result.error = error
+                self._finish(result)
+                return
+        capacity = baudrate / 10  # 8N1: 10 bits per byte
+        result = StageResult(baudrate, flow_control, capacity * step / 100 if step else None)
+        sender = None
+        if result.target_rate:
+            sender = PatternSender(terminal.serial, result.target_rate, self.stage_sec)
+        verifier = PatternVerifier(sender.tx_times if sender else None)
+        sink = terminal.terminal_sink
+        sink.max_lag = 0.0
+        self._current = (result, sender, verifier, sink.dropped)
+        terminal.throughput_probe = verifier
+        if sender:
+            sender.start()
+        QTimer.singleShot(int((self.stage_sec + SETTLE_SEC) * 1000), self._end_stage)
+
+    def _end_stage(self):
+        result, sender, verifier, dropped_before = self._current
+        self._current = None
+        terminal = self.terminal
+        terminal.throughput_probe = None
+        if sender:
+            sender.stop()
+            if not sender.join(SENDER_JOIN_SEC):
+                sender.error = sender.error or "sender still blocked in write"
+            result.tx_rate = sender.tx_bytes / sender.elapsed if sender.elapsed else 0.0
+            result.error = sender.error
+            # Lines sent but never received at all
+            result.lost = max(verifier.lost, len(sender.tx_times) - verifier.lines_ok - verifier.corrupt)
+        else:
+            result.lost = verifier.lost
+        result.rx_rate = verifier.rx_rate
+        result.lines_ok = verifier.lines_ok
+        result.corrupt = verifier.corrupt
+        result.reads = verifier.reads
+        result.max_read = verifier.max_read
+        latencies = sorted(verifier.latencies)
+        if latencies:
+            result.latency_p50 = utils.percentile(latencies, 0.5)
+            result.latency_p99 = utils.percentile(latencies, 0.99)
+        duration = sender.elapsed if sender else self.stage_sec
+        result.parser_busy = verifier.parse_time / duration if duration else 0.0
+        result.render_lag = terminal.terminal_sink.max_lag
+        result.render_dropped = terminal.terminal_sink.dropped - dropped_before
+        if result.target_rate is None and not verifier.rx_bytes:
+            result.error = "no pattern received"
+        self._finish(result)
+
+    def _finish(self, result):
+        self.results.append(result)
+        self.stage_finished.emit(result)
+        QTimer.singleShot(0, self._next_stage)
+
+
+def first_bottleneck(results):
+    """(result, component) of the first stage per port setting that fell behind"""
+    found = {}
+    for result in results:
+        key = (result.baudrate, result.flow_control)
+        if key not in found and result.bottleneck and result.bottleneck != "error":
+            found[key] = result
+    return found
+
+
+class ThroughputTestDialog(QDialog):
+    """Test settings and the per-stage result table"""
+
+    def __init__(self, terminal, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Throughput Test")
+        self.resize(980, 480)
+        self.terminal = terminal
+        self.test = None
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(TEST_MODES)
+        form.addRow("Mode:", self.mode_combo)
+        self.baudrates_edit = QLineEdit(str(terminal.baudrate))
+        self.baudrates_edit.setToolTip("Comma-separated; the port is reopened at each baudrate")
+        form.addRow("Baudrates:", self.baudrates_edit)
+        flow_widget = QHBoxLayout()
+        self.flow_checks = []
+        for option in FLOW_CONTROL_OPTIONS:
+            check = QCheckBox(option)
+            check.setChecked(option == terminal.flow_control)
+            self.flow_checks.append(check)
+            flow_widget.addWidget(check)
+        form.addRow("Flow control:", flow_widget)
+        self.rates_edit = QLineEdit(DEFAULT_RATE_STEPS)
+        self.rates_edit.setToolTip("Send rates in percent of the link capacity (baudrate / 10 bytes per second)")
+        form.addRow("Rate steps (%):", self.rates_edit)
+        self.stage_spin = QDoubleSpinBox()
+        self.stage_spin.setRange(0.5, 600.0)
+        self.stage_spin.setValue(DEFAULT_STAGE_SEC)
+        self.stage_spin.setSuffix(" s")
+        form.addRow("Stage duration:", self.stage_spin)
+        layout.addLayout(form)
+
+        info = QLabel(f"Pattern: 'TP' + 8-digit sequence + fill + CRLF, {PATTERN_LINE_BYTES} bytes per line. "
+                      "Loopback needs TX wired to RX or echo firmware.")
+        info.setStyleSheet("color: #777; font-size: 11px;")
+        info.setWordWrap(True)
+        layout.addWidget(info)
+
+        self.table = QTableWidget(0, len(RESULT_HEADERS))
+        self.table.setHorizontalHeaderLabels(RESULT_HEADERS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        self.start_btn = QPushButton("Start")
+        self.start_btn.clicked.connect(self.toggle_test)
+        btn_layout.addWidget(self.start_btn)
+        copy_btn = QPushButton("Copy Report")
+        copy_btn.clicked.connect(self.copy_report)
+        btn_layout.addWidget(copy_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+    def toggle_test(self):
+        if self.test is not None:
+            self.test.cancel()
+            return
+        try:
+            baudrates = [int(value) for value in self.baudrates_edit.text().replace(" ", "").split(",") if value]
+            steps = [float(value) for value in self.rates_edit.text().replace(" ", "").split(",") if value]
+        except ValueError:
+            self.summary_label.setText("Baudrates and rate steps must be comma-separated numbers")
+            return
+        flows = [check.text() for check in self.flow_checks if check.isChecked()] or [self.terminal.flow_control]
+        if not baudrates or not steps:
+            return
+        self.table.setRowCount(0)
+        self.summary_label.setText("Running...")
+        self.test = ThroughputTest(self.terminal, self.mode_combo.currentText(), baudrates, flows, steps,
+                                   self.stage_spin.value(), self)
+        self.test.stage_finished.connect(self.add_result)
+        self.test.finished.connect(self.on_finished)
+        self.start_btn.setText("Stop")
+        self.test.start()
+
+    def add_result(self, result):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for col, value in enumerate(result.cells()):
+            self.table.setItem(row, col, QTableWidgetItem(value))
+        self.table.scrollToBottom()
+
+    def on_finished(self):
+        results = self.test.results
+        self.test = None
+        self.start_btn.setText("Start")
+        lines = []
+        for (baudrate, flow), result in first_bottleneck(results).items():
+            target = f"{result.target_rate / 1024:,.1f} KB/s" if result.target_rate else "the device's rate"
+            lines.append(f"{baudrate} bps, {flow}: {result.bottleneck} falls behind first at {target}")
+        self.summary_label.setText("\n".join(lines) or "All stages kept up.")
+
+    def copy_report(self):
+        rows = ["\t".join(RESULT_HEADERS)]
+        for row in range(self.table.rowCount()):
+            rows.append("\t".join(self.table.item(row, col).text() for col in range(self.table.columnCount())))
+        rows.append(self.summary_label.text())
+        QApplication.clipboard().setText("\n".join(rows))
+
+    def reject(self):
+        if self.test is not None:
+            self.test.cancel()
+        super().reject()
@@ -4,6 +4,8 @@ import yaml
 import re
 import serial.tools.list_ports
 import shutil
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 
 APP_ICON_NAME               = "app_icon.png"
@@ -111,6 +113,34 @@ def get_app_data_folder():
         return os.path.expanduser("~/.atcmder")
 
 
+def format_timestamp(timestamp):
+    """Format an epoch timestamp as HH:MM:SS.mmm"""
+    return datetime.fromtimestamp(timestamp).strftime("%H:%M:%S.%f")[:-3]
+
+def parse_time_of_day(text, reference=None):
+    """
+    Convert 'HH:MM[:SS[.mmm]]' to an epoch timestamp on the day of the reference timestamp.
+    Times later than the reference are taken from the previous day. Returns None if unparsable.
+    """
+    match = re.fullmatch(r'\s*(\d{1,2}):(\d{2})(?::(\d{2})(?:[.,](\d{1,6}))?)?\s*', text or "")
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    second = int(match.group(3) or 0)
+    microsecond = int((match.group(4) or "0").ljust(6, "0"))
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+
+    base = datetime.fromtimestamp(reference if reference is not None else time.time())
+    candidate = base.replace(hour=hour, minute=minute, second=second, microsecond=microsecond)
+    if candidate > base + timedelta(seconds=1):
+        candidate -= timedelta(days=1)
+    return candidate.timestamp()
+
+def percentile(ordered, q):
+    """The q quantile (0..1) of an ascending sequence, 0.0 when it is empty"""
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
 def expand_ansi_tabs(text, tabsize=4):
     ansi_pattern = re.compile(r'(\x1b\[[0-9;]*m)')
     parts = ansi_pattern.split(text)
@@ -171,6 +201,51 @@ def is_ansi_sequence_complete(data):
     
     return True, -1
 
+ANSI_CSI_PATTERN = re.compile(r'\x1b\[[0-9;:<=>?]*[a-zA-Z@~]')
+# Final result codes that end the response to an AT command (V.250, 27.007 and 27.005)
+AT_FINAL_RESULT_PATTERN = re.compile(
+    r'^(OK|ERROR|\+CME ERROR:.*|\+CMS ERROR:.*|NO CARRIER|BUSY|NO ANSWER|NO DIALTONE|CONNECT(?: .*)?)$')
+
+def strip_ansi(text):
+    return ANSI_CSI_PATTERN.sub('', text)
+
+def at_final_result(line):
+    """The final result code a response line carries (e.g. 'OK', '+CME ERROR: 10'), or None"""
+    match = AT_FINAL_RESULT_PATTERN.match(strip_ansi(line).strip())
+    return match.group(1) if match else None
+
+class AtResponseParser:
+    """
+    Follows the RX of one AT command, chunk by chunk: 'started' turns True once anything other
+    than the command's echo (ATE1) has arrived, and feed() returns the final result code.
+    """
+
+    def __init__(self, command):
+        self.command = strip_ansi(command).strip()
+        self.started = False
+        self.final = None
+        self._partial = ""
+
+    def feed(self, text):
+        """The final result code once this chunk completes the response, otherwise None"""
+        if self.final is not None:
+            return None
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        if not self.started:
+            self.started = any(strip_ansi(line).strip() != self.command for line in lines)
+            if not self.started:
+                partial = strip_ansi(self._partial).strip()
+                # A partial line may still turn out to be the echo
+                self.started = bool(partial) and not self.command.startswith(partial)
+        for line in lines:
+            final = at_final_result(line)
+            if final:
+                self.final = final
+                self._partial = ""
+                return final
+        return None
+
 def process_ansi_spacing(data: str) -> str:
     """Process only space-related ANSI control characters to implement proper spacing and alignment."""
     # Tab character (\t) processing - convert to 8 spaces
@@ -221,10 +296,8 @@ def process_ansi_spacing(data: str) -> str:
     # Insert specified number of blank characters (ECH - Erase Character, ESC[<n>X)
     data = re.sub(r'\x1b\[(\d+)?X', lambda m: ' ' * int(m.group(1) or 1), data)
     
-    # Line erase related (EL - Erase in Line)
-    data = re.sub(r'\x1b\[0?K', '', data)  # Erase from cursor to end of line
-    data = re.sub(r'\x1b\[1K', '', data)   # Erase from start of line to cursor
-    data = re.sub(r'\x1b\[2K', '', data)   # Erase entire line
+    # Line erase (EL - Erase in Line, ESC[K / ESC[1K / ESC[2K) is kept: the terminal
+    # widget applies it to the current line together with carriage returns
     
     # Screen erase related (ED - Erase in Display)
     data = re.sub(r'\x1b\[0?J', '', data)  # Erase from cursor to end of screen
@@ -263,26 +336,9 @@ def process_ansi_spacing(data: str) -> str:
     data = data.replace('\u200C', '')  # Zero-width non-joiner
     data = data.replace('\u200D', '')  # Zero-width joiner
     data = data.replace('\uFEFF', '')  # Zero-width no-break space (BOM)
-    
-    # Carriage return (\r) processing - overwrite current line without line break
-    # But standalone \r is simply processed as move to line start
-    if '\r' in data and '\r\n' not in data:
-        lines = data.split('\n')
-        processed_lines = []
-        
-        for line in lines:
-            if line.endswith('\r'):
-                # Remove \r at end of line (cursor position reset without line break)
-                processed_line = line[:-1]
-            elif '\r' in line:
-                parts = line.split('\r')
-                # Keep only the last part (overwrite effect)
-                processed_line = parts[-1] if parts else ""
-            else:
-                processed_line = line
-            processed_lines.append(processed_line)
-        
-        data = '\n'.join(processed_lines)
+
+    # Standalone carriage returns (\r) are kept as well: the terminal widget rewrites
+    # the current line in place so progress output doesn't create new lines
     
     return data
 